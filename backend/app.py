@@ -3,6 +3,12 @@ from flask_cors import CORS
 from config import get_config
 import os
 from routes.mappings import mappings_bp
+from json_provider import init_json_provider
+from compression import init_compression
+from services.tracing import init_tracing
+from services.metrics import init_metrics
+from routes.admission import get_admission_status
+from routes.caching import init_caching
 
 def create_app(config_name=None):
     app = Flask(__name__)
@@ -11,6 +17,19 @@ def create_app(config_name=None):
     config_obj = get_config(config_name)
     app.config.from_object(config_obj)
     
+    # Fast JSON serialization and response compression
+    init_json_provider(app)
+    init_compression(app)
+    
+    # Per-request stage timing (Server-Timing header)
+    init_tracing(app)
+    
+    # Prometheus /metrics endpoint and request latency histograms
+    init_metrics(app)
+    
+    # Per-worker data version cache for ETag checks
+    init_caching(app)
+    
     # Enable CORS for React frontend
     # Enable CORS for React frontend
     CORS(app, 
@@ -32,7 +51,11 @@ def create_app(config_name=None):
     
     @app.route('/')
     def health_check():
-        return {'status': 'Flask backend is running!', 'env': app.config['FLASK_ENV']}
+        return {
+            'status': 'Flask backend is running!',
+            'env': app.config['FLASK_ENV'],
+            'admission': get_admission_status()
+        }
     
     return app
 
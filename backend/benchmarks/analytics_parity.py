@@ -0,0 +1,84 @@
+"""Check the DuckDB analytics backend returns the same report data as Postgres.
+
+Run from the backend folder against a database that already has data loaded:
+
+    python -m benchmarks.analytics_parity                 # every company and period
+    python -m benchmarks.analytics_parity --company "Acme Ltd"
+
+Exits non-zero if any line differs by more than --tolerance.
+"""
+import argparse
+import os
+import sys
+import time
+
+import config  # noqa: F401 - loads DATABASE_URL from .env
+from services import analytics_service
+from services.database_service import (
+    get_report_data,
+    get_available_companies,
+    get_available_periods
+)
+
+
+def get_report_data_from(backend, report_type, period_end_date, company):
+    """Run get_report_data against a specific backend, returning (data, milliseconds)"""
+    previous = os.environ.get('ANALYTICS_BACKEND')
+    os.environ['ANALYTICS_BACKEND'] = backend
+    try:
+        start = time.perf_counter()
+        data = get_report_data(report_type, period_end_date, company)
+        return data, (time.perf_counter() - start) * 1000
+    finally:
+        if previous is None:
+            os.environ.pop('ANALYTICS_BACKEND', None)
+        else:
+            os.environ['ANALYTICS_BACKEND'] = previous
+
+
+def compare_report_data(expected, actual, tolerance):
+    """Return a list of (column, line_id, expected, actual) mismatches"""
+    mismatches = []
+    for column in sorted(set(expected) | set(actual)):
+        expected_lines = expected.get(column, {})
+        actual_lines = actual.get(column, {})
+        for line_id in sorted(set(expected_lines) | set(actual_lines), key=str):
+            expected_amount = expected_lines.get(line_id, 0)
+            actual_amount = actual_lines.get(line_id, 0)
+            if abs(expected_amount - actual_amount) > tolerance:
+                mismatches.append((column, line_id, expected_amount, actual_amount))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--company', action='append', help='Company to check (repeatable)')
+    parser.add_argument('--tolerance', type=float, default=0.005)
+    args = parser.parse_args()
+    
+    companies = args.company or get_available_companies()
+    failures = 0
+    checks = 0
+    
+    for company in companies:
+        analytics_service.invalidate_snapshots(company)
+        for period in get_available_periods(company):
+            for report_type in ['profit_loss', 'balance_sheet']:
+                expected, postgres_ms = get_report_data_from('postgres', report_type, period, company)
+                actual, duckdb_ms = get_report_data_from('duckdb', report_type, period, company)
+                mismatches = compare_report_data(expected, actual, args.tolerance)
+                checks += 1
+                
+                status = '✅' if not mismatches else '❌'
+                print(f"{status} {company} {period} {report_type:<14} "
+                      f"postgres {postgres_ms:8.2f} ms   duckdb {duckdb_ms:8.2f} ms")
+                for column, line_id, expected_amount, actual_amount in mismatches:
+                    print(f"     {column}/{line_id}: postgres={expected_amount} duckdb={actual_amount}")
+                failures += bool(mismatches)
+    
+    print(f"{checks - failures}/{checks} reports match")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
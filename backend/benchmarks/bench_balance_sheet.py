@@ -0,0 +1,90 @@
+"""Benchmark the single round trip Balance Sheet query against the old two query path.
+
+Run from the backend folder against a database that already has data loaded:
+
+    python -m benchmarks.bench_balance_sheet --company "Acme Ltd" --period 2025-03-31
+"""
+import argparse
+import statistics
+import time
+
+import config  # noqa: F401 - loads DATABASE_URL from .env
+from psycopg2.extras import RealDictCursor
+from services.database_service import get_db_connection, get_balance_sheet_data
+
+
+def get_balance_sheet_data_two_query(period_end_date, company):
+    """Previous Balance Sheet path: BS lines, then a second full P&L scan for reserves"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT 
+                    grm.line_id,
+                    SUM(CASE WHEN tbd.data_type = 'actual' AND tbd.period_end_date = %s::date 
+                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as actual,
+                    SUM(CASE WHEN tbd.data_type = 'budget' AND tbd.period_end_date = %s::date 
+                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as budget,
+                    SUM(CASE WHEN tbd.data_type = 'actual' AND tbd.period_end_date = %s::date - INTERVAL '1 year'
+                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as prior_year,
+                    SUM(CASE WHEN tbd.data_type = 'actual' AND tbd.period_end_date = %s::date - INTERVAL '1 month'
+                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as prior_month
+                FROM trial_balance_data tbd
+                JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
+                JOIN gl_report_mapping grm ON tbd.gl_code = grm.gl_code
+                WHERE tbu.company = %s
+                AND grm.report_type = 'balance_sheet'
+                GROUP BY grm.line_id
+            """, (period_end_date, period_end_date, period_end_date, period_end_date, company))
+            results = cursor.fetchall()
+            
+            cursor.execute("""
+                SELECT 
+                    SUM(CASE WHEN tbd.data_type = 'actual' AND tbd.period_end_date = %s::date 
+                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as actual_profit,
+                    SUM(CASE WHEN tbd.data_type = 'budget' AND tbd.period_end_date = %s::date 
+                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as budget_profit,
+                    SUM(CASE WHEN tbd.data_type = 'actual' AND tbd.period_end_date = %s::date - INTERVAL '1 year'
+                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as prior_year_profit
+                FROM trial_balance_data tbd
+                JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
+                JOIN gl_report_mapping grm ON tbd.gl_code = grm.gl_code
+                WHERE tbu.company = %s
+                AND grm.report_type = 'profit_loss'
+            """, (period_end_date, period_end_date, period_end_date, company))
+            return results, cursor.fetchone()
+    finally:
+        conn.close()
+
+
+def time_calls(func, args, repeat):
+    """Call func repeat times and return the timings in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--company', required=True)
+    parser.add_argument('--period', required=True, help='Period end date, YYYY-MM-DD')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    paths = {
+        'two_query': get_balance_sheet_data_two_query,
+        'single_round_trip': get_balance_sheet_data,
+    }
+    
+    for name, func in paths.items():
+        func(args.period, args.company)  # warm up
+        timings = time_calls(func, (args.period, args.company), args.repeat)
+        print(f"{name:<20} median {statistics.median(timings):8.2f} ms   "
+              f"min {min(timings):8.2f} ms   max {max(timings):8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
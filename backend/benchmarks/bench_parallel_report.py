@@ -0,0 +1,51 @@
+"""Benchmark the monolithic report query against the parallel per-column queries.
+
+Run from the backend folder against a database that already has data loaded:
+
+    python -m benchmarks.bench_parallel_report --company "Acme Ltd" --period 2025-03-31
+"""
+import argparse
+import os
+import statistics
+
+import config  # noqa: F401 - loads DATABASE_URL from .env
+from benchmarks.bench_balance_sheet import time_calls
+from services.database_service import get_report_data
+
+
+def get_report_data_in_mode(mode):
+    """Wrap get_report_data so it runs with a given REPORT_QUERY_MODE"""
+    def run(report_type, period_end_date, company):
+        os.environ['REPORT_QUERY_MODE'] = mode
+        return get_report_data(report_type, period_end_date, company)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--company', required=True)
+    parser.add_argument('--period', required=True, help='Period end date, YYYY-MM-DD')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    os.environ.pop('ANALYTICS_BACKEND', None)
+    
+    for report_type in ['profit_loss', 'balance_sheet']:
+        results = {}
+        for mode in ['single', 'parallel']:
+            func = get_report_data_in_mode(mode)
+            results[mode] = func(report_type, args.period, args.company)  # warm up
+            timings = time_calls(func, (report_type, args.period, args.company), args.repeat)
+            print(f"{report_type:<14} {mode:<9} median {statistics.median(timings):8.2f} ms   "
+                  f"min {min(timings):8.2f} ms   max {max(timings):8.2f} ms")
+        
+        # Sanity check the two modes agree
+        for column, lines in results['single'].items():
+            for line_id, amount in lines.items():
+                parallel_amount = results['parallel'][column].get(line_id, 0)
+                if abs(amount - parallel_amount) > 0.005:
+                    print(f"  ⚠️ {column}/{line_id}: single={amount} parallel={parallel_amount}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark JSON serialization and response compression on report-sized payloads.
+
+Needs no database - payloads are synthetic but shaped like the P&L report and
+the GL-code listing (RealDictRow rows with Decimal and date values):
+
+    python -m benchmarks.bench_serialization --accounts 5000
+"""
+import argparse
+import gzip
+import statistics
+import time
+from datetime import date
+from decimal import Decimal
+
+from flask import Flask
+from psycopg2.extras import RealDictRow
+
+from compression import brotli
+from json_provider import OrjsonProvider, StdlibProvider, orjson
+
+
+def build_gl_listing(accounts):
+    """Rows shaped like the GL code and trial balance list endpoints"""
+    rows = []
+    for index in range(accounts):
+        row = RealDictRow()
+        row['gl_code'] = str(100000 + index)
+        row['account_name'] = f"Account {index} - Operating Expense"
+        row['period_end_date'] = date(2025, 1 + index % 12, 28)
+        row['amount'] = Decimal(f"{index * 13.37:.2f}")
+        rows.append(row)
+    return {'gl_codes': rows}
+
+
+def build_report(lines):
+    """Payload shaped like generate_profit_loss_report output"""
+    columns = ['actual', 'budget', 'prior_year', 'actual_ytd', 'budget_ytd', 'prior_year_ytd']
+    return {
+        'report_title': 'Profit & Loss Statement',
+        'period_end_date': '2025-03-31',
+        'data': [
+            {
+                'name': f"  Line {index}",
+                'amounts': {column: index * 101.25 for column in columns},
+                'is_header': False,
+                'is_bold': False,
+                'indent_level': 1,
+                'type': 'line_item'
+            }
+            for index in range(lines)
+        ]
+    }
+
+
+def time_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--level', type=int, default=5)
+    args = parser.parse_args()
+    
+    payloads = {
+        'gl_listing': build_gl_listing(args.accounts),
+        'report': build_report(args.accounts)
+    }
+    providers = {'stdlib': StdlibProvider}
+    if orjson is not None:
+        providers['orjson'] = OrjsonProvider
+    
+    app = Flask(__name__)
+    for payload_name, payload in payloads.items():
+        print(f"\n{payload_name} ({args.accounts} rows)")
+        body = None
+        for provider_name, provider_class in providers.items():
+            provider = provider_class(app)
+            median, body = time_ms(lambda: provider.dumps(payload).encode(), args.repeat)
+            print(f"  serialize {provider_name:<7} {median:8.2f} ms   {len(body):>10,} bytes")
+        
+        median, compressed = time_ms(lambda: gzip.compress(body, compresslevel=args.level), args.repeat)
+        print(f"  gzip -{args.level}          {median:8.2f} ms   {len(compressed):>10,} bytes")
+        if brotli is not None:
+            median, compressed = time_ms(lambda: brotli.compress(body, quality=args.level), args.repeat)
+            print(f"  brotli q{args.level}        {median:8.2f} ms   {len(compressed):>10,} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Compare storage and scan time of the fact table against the pre-006 trial_balance_data.
+
+Run from the backend folder after migrations/006_gl_account_dimension.sql,
+while trial_balance_data_legacy still exists:
+
+    python -m benchmarks.bench_storage
+    python -m benchmarks.bench_storage --company "Acme Ltd" --repeat 10
+
+Prints table + index sizes of both layouts, checks the converted totals
+match, and times a full-table aggregation and a one-company period scan.
+"""
+import argparse
+import statistics
+import time
+
+import config  # noqa: F401 - loads DATABASE_URL from .env
+from services.database_service import get_db_connection
+
+LEGACY_TABLES = ['trial_balance_data_legacy']
+FACT_TABLES = ['trial_balance_facts', 'gl_accounts', 'calendar_periods']
+
+LEGACY_TOTALS = """
+    SELECT COUNT(*), SUM(amount) FROM trial_balance_data_legacy
+"""
+FACT_TOTALS = """
+    SELECT COUNT(*), SUM(amount) FROM trial_balance_facts
+"""
+
+LEGACY_COMPANY_SCAN = """
+    SELECT tbd.gl_code, tbd.data_type, tbd.period_end_date, SUM(tbd.amount)
+    FROM trial_balance_data_legacy tbd
+    JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
+    WHERE tbu.company = %s
+    GROUP BY tbd.gl_code, tbd.data_type, tbd.period_end_date
+"""
+FACT_COMPANY_SCAN = """
+    SELECT ga.gl_code, tbf.data_type, cp.period_end_date, SUM(tbf.amount)
+    FROM trial_balance_facts tbf
+    JOIN trial_balance_uploads tbu ON tbf.upload_key = tbu.upload_key
+    JOIN gl_accounts ga ON tbf.account_id = ga.account_id
+    JOIN calendar_periods cp ON tbf.period_key = cp.period_key
+    WHERE tbu.company = %s
+    GROUP BY ga.gl_code, tbf.data_type, cp.period_end_date
+"""
+
+
+def total_size(cursor, tables):
+    """Table + index + TOAST bytes of a set of tables"""
+    cursor.execute("SELECT SUM(pg_total_relation_size(to_regclass(name))) FROM unnest(%s::text[]) AS name",
+                   (tables,))
+    return int(cursor.fetchone()[0] or 0)
+
+
+def time_ms(cursor, query, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(query, params)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--company', help='Company for the period scan (defaults to the largest)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('trial_balance_data_legacy') IS NOT NULL")
+            if not cursor.fetchone()[0]:
+                print("❌ trial_balance_data_legacy not found - run before dropping the legacy table")
+                return
+
+            legacy_bytes = total_size(cursor, LEGACY_TABLES)
+            fact_bytes = total_size(cursor, FACT_TABLES)
+            print(f"{'legacy trial_balance_data':<30} {legacy_bytes / 1024 / 1024:10.1f} MB")
+            print(f"{'facts + accounts + periods':<30} {fact_bytes / 1024 / 1024:10.1f} MB   "
+                  f"({legacy_bytes / max(fact_bytes, 1):.1f}x smaller)")
+
+            cursor.execute(LEGACY_TOTALS)
+            legacy_count, legacy_sum = cursor.fetchone()
+            cursor.execute(FACT_TOTALS)
+            fact_count, fact_sum = cursor.fetchone()
+            if (legacy_count, legacy_sum) == (fact_count, fact_sum):
+                print(f"✅ {fact_count} rows converted, totals match")
+            else:
+                print(f"❌ Legacy {legacy_count} rows / {legacy_sum} vs facts {fact_count} rows / {fact_sum}")
+
+            company = args.company
+            if not company:
+                cursor.execute("""
+                    SELECT tbu.company FROM trial_balance_facts tbf
+                    JOIN trial_balance_uploads tbu ON tbf.upload_key = tbu.upload_key
+                    GROUP BY tbu.company ORDER BY COUNT(*) DESC LIMIT 1
+                """)
+                row = cursor.fetchone()
+                company = row[0] if row else ''
+
+            print(f"{'full scan, legacy':<30} {time_ms(cursor, LEGACY_TOTALS, (), args.repeat):10.2f} ms")
+            print(f"{'full scan, facts':<30} {time_ms(cursor, FACT_TOTALS, (), args.repeat):10.2f} ms")
+            print(f"{'company scan, legacy':<30} "
+                  f"{time_ms(cursor, LEGACY_COMPANY_SCAN, (company,), args.repeat):10.2f} ms   ({company})")
+            print(f"{'company scan, facts':<30} "
+                  f"{time_ms(cursor, FACT_COMPANY_SCAN, (company,), args.repeat):10.2f} ms")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
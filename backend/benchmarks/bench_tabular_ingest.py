@@ -0,0 +1,114 @@
+"""Compare parse throughput of Excel uploads against CSV / Parquet exports.
+
+Needs no database. Generates one synthetic trial balance and writes it as an
+.xlsx workbook and as one CSV and one Parquet file per data type, then times
+the parse half of each upload path - pd.read_excel + process_worksheet for
+the workbook, the Arrow readers + wide_to_long for CSV / Parquet - and checks
+all three produce the same rows:
+
+    python -m benchmarks.bench_tabular_ingest --gl-count 5000 --months 24
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks.synthetic import SHEETS, generate_frames, write_workbook
+
+
+def parse_excel(path):
+    """The parse steps of process_trial_balance_file"""
+    import pandas as pd
+    from services.excel_processor import process_worksheet, find_sheet_name, combine_worksheet_data
+    from services.excel_processor import ACTUAL_SHEET_NAMES, BUDGET_SHEET_NAMES, PRIOR_YEAR_SHEET_NAMES
+
+    excel_file = pd.ExcelFile(path)
+    parsed = []
+    for data_type, names in [('actual', ACTUAL_SHEET_NAMES), ('budget', BUDGET_SHEET_NAMES),
+                             ('prior_year', PRIOR_YEAR_SHEET_NAMES)]:
+        frame = pd.read_excel(excel_file, sheet_name=find_sheet_name(excel_file.sheet_names, names))
+        parsed.append(process_worksheet(frame, data_type))
+    excel_file.close()
+    return combine_worksheet_data(*parsed)
+
+
+def parse_tabular(folder, extension):
+    """The parse steps of process_tabular_trial_balance"""
+    from services.tabular_ingest import parse_tabular_sources
+
+    sources = {data_type: (f"{data_type}.{extension}", os.path.join(folder, f"{data_type}.{extension}"))
+               for data_type in SHEETS}
+    return parse_tabular_sources(sources)[0]
+
+
+def time_ms(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def row_key(row):
+    return (row['gl_code'], row['account_name'], row['period_end_date'], round(row['amount'], 2), row['data_type'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--gl-count', type=int, default=2000)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--sparsity', type=float, default=0.3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='bench_tabular_')
+    try:
+        workbook_path = write_workbook(os.path.join(folder, 'tb.xlsx'),
+                                       generate_frames(args.gl_count, args.months, args.sparsity))
+        # ERP exports write ISO date headers
+        for data_type, frame in generate_frames(args.gl_count, args.months, args.sparsity,
+                                                header_format='iso').items():
+            frame.to_csv(os.path.join(folder, f"{data_type}.csv"), index=False)
+            frame.to_parquet(os.path.join(folder, f"{data_type}.parquet"), index=False)
+
+        cells = args.gl_count * args.months * len(SHEETS)
+        print(f"🔍 {args.gl_count} GLs x {args.months} months x {len(SHEETS)} data types = {cells:,} cells")
+
+        paths = {
+            'excel': [workbook_path],
+            'csv': [os.path.join(folder, f"{data_type}.csv") for data_type in SHEETS],
+            'parquet': [os.path.join(folder, f"{data_type}.parquet") for data_type in SHEETS]
+        }
+        parsers = {
+            'excel': lambda: parse_excel(workbook_path),
+            'csv': lambda: parse_tabular(folder, 'csv'),
+            'parquet': lambda: parse_tabular(folder, 'parquet')
+        }
+
+        results = {}
+        for name, parse in parsers.items():
+            median, rows = time_ms(parse, args.repeat)
+            results[name] = (median, Counter(map(row_key, rows)), len(rows))
+            size = sum(os.path.getsize(path) for path in paths[name])
+            print(f"  {name:<8} {median:10.1f} ms   {cells / (median / 1000):>14,.0f} cells/s   "
+                  f"{len(rows):>9,} rows   {size / 1024:>9,.0f} KB")
+
+        excel_median, excel_rows, _ = results['excel']
+        for name in ('csv', 'parquet'):
+            median, rows, _ = results[name]
+            status = '✅ same rows' if rows == excel_rows else '❌ rows differ from Excel'
+            print(f"  {name} vs excel: {excel_median / median:.1f}x faster, {status}")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Cold-start import budget check for the app factory.
+
+Runs `python -X importtime` on a fresh interpreter that builds the app with
+create_app(), then fails (exit 1) if the import time exceeds the budget or if
+a heavy dependency that should load lazily was imported during start-up.
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --budget-ms 600 --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed for uploads / exports / analytics - must not load at start-up
+LAZY_MODULES = ['pandas', 'numpy', 'openpyxl', 'duckdb', 'pyarrow']
+
+STARTUP_CODE = "from app import create_app; create_app()"
+
+
+def measure_startup():
+    """One cold start: (total import ms, {top-level module: cumulative ms})"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"❌ App start-up failed:\n{result.stderr}")
+
+    modules = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Root imports are unindented; nested ones are already in their parent's cumulative time
+        if not name.startswith('  '):
+            total_us += int(cumulative)
+        modules[name.strip()] = int(cumulative) / 1000
+    return total_us / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('IMPORT_BUDGET_MS', 500)))
+    parser.add_argument('--runs', type=int, default=3, help='Cold starts to take the median of')
+    parser.add_argument('--top', type=int, default=10, help='Slowest modules to list')
+    args = parser.parse_args()
+
+    runs = [measure_startup() for _ in range(args.runs)]
+    total_ms = statistics.median(total for total, _ in runs)
+    modules = runs[-1][1]
+
+    print(f"{'module':<40} {'cumulative ms':>14}")
+    for name, ms in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<40} {ms:>14.1f}")
+    print(f"\n🔍 Start-up imports: {total_ms:.1f} ms (median of {args.runs}), budget {args.budget_ms:.0f} ms")
+
+    failures = []
+    eager = [name for name in LAZY_MODULES if name in modules]
+    if eager:
+        failures.append(f"heavy modules imported at start-up: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Within import budget")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""HTTP load test for mixed report, lookup and upload traffic.
+
+Seeds a throwaway schema in a local Postgres with synthetic trial balances,
+starts the app from create_app() in a threaded WSGI server (one worker) and
+drives it with closed-loop clients at rising concurrency. Prints p50 / p95 /
+p99 latency, errors and throughput per concurrency level.
+
+    BENCH_DATABASE_URL=postgresql://localhost/postgres python -m benchmarks.load_test
+    python -m benchmarks.load_test --mix reports=95,lookups=4,uploads=1 --levels 1,4,16,64 --duration 20
+    python -m benchmarks.load_test --url http://localhost:5000 --company "Acme Ltd"   # existing server
+"""
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import uuid
+from urllib.parse import urlencode, urlparse
+
+from benchmarks.run_suite import create_schema, drop_schema, with_search_path, seed_mappings
+from benchmarks.synthetic import generate_frames, generate_gl_codes, write_workbook
+
+
+def parse_mix(mix):
+    """'reports=95,lookups=4,uploads=1' -> {'reports': 95, ...}"""
+    weights = {}
+    for part in mix.split(','):
+        name, weight = part.split('=')
+        weights[name.strip()] = float(weight)
+    unknown = set(weights) - {'reports', 'lookups', 'uploads'}
+    if unknown:
+        raise SystemExit(f"Unknown traffic types: {', '.join(sorted(unknown))}")
+    return weights
+
+
+def build_upload_body(gl_count, months):
+    """Multipart body for POST /api/upload with a small synthetic workbook"""
+    workbook = io.BytesIO()
+    write_workbook(workbook, generate_frames(gl_count, months, seed=7))
+    boundary = uuid.uuid4().hex
+
+    def build(company):
+        return boundary, b''.join([
+            f'--{boundary}\r\nContent-Disposition: form-data; name="company"\r\n\r\n{company}\r\n'.encode(),
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="load.xlsx"\r\n'
+            f'Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n'.encode(),
+            workbook.getvalue(),
+            f'\r\n--{boundary}--\r\n'.encode()
+        ])
+    return build
+
+
+class TrafficGenerator:
+    """Picks the next request according to the traffic mix"""
+
+    def __init__(self, weights, companies, periods, upload_body, conditional):
+        self.kinds = list(weights)
+        self.weights = [weights[kind] for kind in self.kinds]
+        self.companies = companies
+        self.periods = periods
+        self.upload_body = upload_body
+        self.conditional = conditional
+
+    def next_request(self, rng):
+        kind = rng.choices(self.kinds, self.weights)[0]
+        company = rng.choice(self.companies)
+
+        if kind == 'reports':
+            report = rng.choice(['profit-loss', 'balance-sheet'])
+            query = urlencode({'period_end_date': rng.choice(self.periods), 'company': company})
+            return kind, 'GET', f"/api/reports/{report}?{query}", None, {}
+
+        if kind == 'lookups':
+            path = rng.choice([
+                '/api/reports/available-companies',
+                f"/api/reports/available-periods?{urlencode({'company': company})}",
+                '/api/mappings/report-lines/profit_loss'
+            ])
+            return kind, 'GET', path, None, {}
+
+        boundary, body = self.upload_body(f"Load Upload {uuid.uuid4().hex[:8]}")
+        headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+        return kind, 'POST', '/api/upload', body, headers
+
+
+def run_level(base_url, traffic, concurrency, duration, seed):
+    """Run `concurrency` closed-loop clients for `duration` seconds"""
+    target = urlparse(base_url)
+    samples = []
+    samples_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(client_id):
+        rng = random.Random(seed + client_id)
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=120)
+        etags = {}
+        local = []
+        while time.perf_counter() < deadline:
+            kind, method, path, body, headers = traffic.next_request(rng)
+            if traffic.conditional and path in etags:
+                headers = {**headers, 'If-None-Match': etags[path]}
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status < 400
+                if response.getheader('ETag'):
+                    etags[path] = response.getheader('ETag')
+            except Exception:
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=120)
+            local.append((kind, (time.perf_counter() - start) * 1000, ok))
+        conn.close()
+        with samples_lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(samples, elapsed):
+    """Latency percentiles, error count and throughput overall and per traffic type"""
+    summary = {}
+    groups = {'all': samples}
+    for kind in sorted({sample[0] for sample in samples}):
+        groups[kind] = [sample for sample in samples if sample[0] == kind]
+    for name, group in groups.items():
+        latencies = sorted(sample[1] for sample in group)
+        summary[name] = {
+            'requests': len(group),
+            'errors': sum(1 for sample in group if not sample[2]),
+            'rps': round(len(group) / elapsed, 1) if elapsed else 0,
+            'p50_ms': round(statistics.median(latencies), 2) if latencies else 0,
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2)
+        }
+    return summary
+
+
+def seed_database(args):
+    """Create a throwaway schema with mappings and synthetic trial balances"""
+    from services.database_service import save_complete_trial_balance_multi_period
+    from services.excel_processor import process_worksheet, combine_worksheet_data
+
+    url = args.database_url or os.environ.get('BENCH_DATABASE_URL')
+    if not url:
+        raise SystemExit("Set BENCH_DATABASE_URL (or --database-url), or pass --url for an existing server")
+
+    schema = f"load_{uuid.uuid4().hex[:8]}"
+    create_schema(url, schema)
+    os.environ['DATABASE_URL'] = with_search_path(url, schema)
+    seed_mappings(generate_gl_codes(args.gl_count))
+
+    companies = [f"Load Co {index}" for index in range(args.companies)]
+    periods = set()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index, company in enumerate(companies):
+            frames = generate_frames(args.gl_count, args.months, args.sparsity, seed=index)
+            parsed = {data_type: process_worksheet(frame, data_type) for data_type, frame in frames.items()}
+            combined = combine_worksheet_data(parsed['actual'], parsed['budget'], parsed['prior_year'])
+            periods.update(row['period_end_date'].isoformat() for row in parsed['actual'])
+            period = max(row['period_end_date'] for row in combined)
+            save_complete_trial_balance_multi_period(str(uuid.uuid4()), 'seed.xlsx', period, combined, company)
+
+    print(f"✅ Seeded schema {schema}: {len(companies)} companies x {args.gl_count} GLs x {args.months} months")
+    return url, schema, companies, sorted(periods)
+
+
+def start_server(port):
+    """Serve create_app() from a threaded WSGI server on a background thread"""
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    server = make_server('127.0.0.1', port, create_app(), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mix', default='reports=95,lookups=4,uploads=1')
+    parser.add_argument('--levels', default='1,2,4,8,16,32', help='Comma separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per level')
+    parser.add_argument('--companies', type=int, default=3)
+    parser.add_argument('--gl-count', type=int, default=500)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--sparsity', type=float, default=0.3)
+    parser.add_argument('--upload-gl-count', type=int, default=100)
+    parser.add_argument('--conditional', action='store_true', help='Replay ETags as If-None-Match')
+    parser.add_argument('--database-url')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--url', help='Drive an already running server instead of seeding and starting one')
+    parser.add_argument('--company', action='append', help='Company to query when using --url')
+    parser.add_argument('--output', help='Write the per-level results as JSON')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+    levels = [int(level) for level in args.levels.split(',')]
+    upload_body = build_upload_body(args.upload_gl_count, args.months)
+
+    server = None
+    schema = None
+    if args.url:
+        base_url = args.url
+        companies = args.company or []
+        if not companies:
+            raise SystemExit("--company is required with --url")
+        conn = http.client.HTTPConnection(urlparse(base_url).hostname, urlparse(base_url).port or 80)
+        conn.request('GET', f"/api/reports/available-periods?{urlencode({'company': companies[0]})}")
+        periods = json.loads(conn.getresponse().read())['periods']
+        conn.close()
+    else:
+        url, schema, companies, periods = seed_database(args)
+        server = start_server(args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    traffic = TrafficGenerator(weights, companies, periods, upload_body, args.conditional)
+    results = []
+    try:
+        print(f"\n{'conc':>5} {'type':<8} {'reqs':>7} {'errors':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for concurrency in levels:
+            with contextlib.redirect_stdout(io.StringIO()):
+                samples, elapsed = run_level(base_url, traffic, concurrency, args.duration, args.seed)
+            summary = summarize(samples, elapsed)
+            results.append({'concurrency': concurrency, 'summary': summary})
+            for name, stats in summary.items():
+                print(f"{concurrency:>5} {name:<8} {stats['requests']:>7} {stats['errors']:>7} {stats['rps']:>8} "
+                      f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+    finally:
+        if server is not None:
+            server.shutdown()
+        if schema is not None:
+            drop_schema(url, schema)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'mix': weights, 'duration': args.duration, 'levels': results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
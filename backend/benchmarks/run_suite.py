@@ -0,0 +1,259 @@
+"""End-to-end benchmark suite for the ingestion and reporting paths.
+
+Generates a synthetic trial balance, then measures process_worksheet,
+save_complete_trial_balance_multi_period, the Parquet upload archive round
+trip, get_report_data and both report generators against a throwaway schema
+in a local Postgres (created and dropped by the suite). Reports median / p95 latency, throughput and peak
+Python memory, and compares against a stored baseline.
+
+    BENCH_DATABASE_URL=postgresql://localhost/postgres python -m benchmarks.run_suite
+    python -m benchmarks.run_suite --save-baseline     # store this run as the baseline
+    python -m benchmarks.run_suite --skip-db           # parsing only, no Postgres needed
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from urllib.parse import urlencode, urlparse, parse_qsl, urlunparse
+
+import psycopg2
+
+from benchmarks.synthetic import generate_frames, generate_gl_codes, generate_mappings
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+
+def with_search_path(url, schema):
+    """Add a search_path option to a libpq URL so every connection lands in schema"""
+    parts = urlparse(url)
+    query = dict(parse_qsl(parts.query))
+    query['options'] = f"-c search_path={schema}"
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+
+def create_schema(url, schema):
+    """Create a throwaway schema with the app tables and migrations applied"""
+    conn = psycopg2.connect(url)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA "{schema}"')
+            cursor.execute(f'SET search_path TO "{schema}"')
+            scripts = [os.path.join(BENCH_DIR, 'schema.sql')]
+            scripts += sorted(glob.glob(os.path.join(BACKEND_DIR, 'migrations', '*.sql')))
+            for script in scripts:
+                with open(script) as file:
+                    cursor.execute(file.read())
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def drop_schema(url, schema):
+    conn = psycopg2.connect(url)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def seed_mappings(gl_codes):
+    """Map every synthetic GL code onto a template line"""
+    from services.database_service import get_db_connection
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO gl_report_mapping (gl_code, report_type, line_id, sign_multiplier) VALUES (%s, %s, %s, %s)",
+                generate_mappings(gl_codes)
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def measure(func, repeat, rows=None, setup=None):
+    """Time func; peak memory comes from one extra tracemalloc run so timings stay clean"""
+    args = setup() if setup else ()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(*args)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(*args)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    median_ms = statistics.median(timings)
+    result = {
+        'median_ms': round(median_ms, 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'peak_mb': round(peak_bytes / 1024 / 1024, 2)
+    }
+    if rows:
+        result['rows_per_s'] = round(rows / (median_ms / 1000), 1)
+    return result
+
+
+def run_suite(args):
+    from services.excel_processor import process_worksheet, combine_worksheet_data
+
+    frames = generate_frames(args.gl_count, args.months, args.sparsity, seed=args.seed)
+    results = {}
+
+    # 1. Parsing
+    parsed = {}
+    for data_type, frame in frames.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            parsed[data_type] = process_worksheet(frame.copy(), data_type)
+        cells = frame.shape[0] * (frame.shape[1] - 2)
+        results[f"process_worksheet[{data_type}]"] = measure(
+            process_worksheet, args.repeat, rows=cells,
+            setup=lambda frame=frame, data_type=data_type: (frame.copy(), data_type)
+        )
+    combined = combine_worksheet_data(parsed['actual'], parsed['budget'], parsed['prior_year'])
+    print(f"🔍 Synthetic data: {args.gl_count} GLs x {args.months} months -> {len(combined)} rows")
+    period = max(row['period_end_date'] for row in combined).isoformat()
+
+    # Parquet archive of the parsed rows (written after every upload)
+    from services.upload_archive import write_upload_archive
+    archive_dir = tempfile.mkdtemp(prefix='bench_archive_')
+    os.environ['UPLOAD_ARCHIVE_DIR'] = archive_dir
+    results['write_upload_archive'] = measure(
+        lambda: write_upload_archive(str(uuid.uuid4()), 'bench.xlsx', 'Archive Co', period, combined),
+        args.repeat, rows=len(combined))
+    archive_path = write_upload_archive(str(uuid.uuid4()), 'bench.xlsx', 'Archive Co', period, combined)
+
+    if args.skip_db:
+        shutil.rmtree(archive_dir, ignore_errors=True)
+        return results
+
+    url = args.database_url or os.environ.get('BENCH_DATABASE_URL')
+    if not url:
+        raise SystemExit("Set BENCH_DATABASE_URL (or --database-url), or use --skip-db")
+
+    schema = f"bench_{uuid.uuid4().hex[:8]}"
+    create_schema(url, schema)
+    os.environ['DATABASE_URL'] = with_search_path(url, schema)
+    try:
+        from services.database_service import save_complete_trial_balance_multi_period, get_report_data
+        from services.report_generator import generate_profit_loss_report, generate_balance_sheet_report
+
+        from services.upload_archive import reimport_upload_archive
+
+        seed_mappings(generate_gl_codes(args.gl_count))
+        company = 'Bench Co'
+
+        # 2. Ingestion - every run saves a fresh upload for its own company
+        save_runs = iter(range(args.repeat + 2))
+        results['save_complete_trial_balance_multi_period'] = measure(
+            save_complete_trial_balance_multi_period, args.repeat, rows=len(combined),
+            setup=lambda: (str(uuid.uuid4()), 'bench.xlsx', period, combined,
+                           company if next(save_runs) == 0 else f"{company} {uuid.uuid4().hex[:6]}")
+        )
+
+        # Re-importing the archive (replaces the same upload every run) vs parse + save above
+        results['reimport_upload_archive'] = measure(
+            lambda: reimport_upload_archive(archive_path, replace=True), args.repeat, rows=len(combined))
+        
+        # 3. Reporting against the first company
+        results['get_report_data[profit_loss]'] = measure(
+            lambda: get_report_data('profit_loss', period, company), args.repeat)
+        # Running YTD balances: full rebuild cost, and the P&L with YTD summed from monthly facts instead
+        from services.ytd_balances import rebuild_ytd_balances
+        results['rebuild_ytd_balances'] = measure(lambda: rebuild_ytd_balances([company]), args.repeat)
+        os.environ['YTD_BALANCES_ENABLED'] = 'false'
+        try:
+            results['get_report_data[profit_loss, summed ytd]'] = measure(
+                lambda: get_report_data('profit_loss', period, company), args.repeat)
+        finally:
+            os.environ.pop('YTD_BALANCES_ENABLED', None)
+        results['get_report_data[balance_sheet]'] = measure(
+            lambda: get_report_data('balance_sheet', period, company), args.repeat)
+        results['generate_profit_loss_report'] = measure(
+            lambda: generate_profit_loss_report(period, company), args.repeat)
+        results['generate_balance_sheet_report'] = measure(
+            lambda: generate_balance_sheet_report(period, company), args.repeat)
+    finally:
+        shutil.rmtree(archive_dir, ignore_errors=True)
+        if not args.keep_schema:
+            drop_schema(url, schema)
+
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Print results next to the baseline and return the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<45} {'median ms':>10} {'p95 ms':>10} {'rows/s':>12} {'peak MB':>8} {'vs base':>9}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        change = ''
+        if base:
+            ratio = result['median_ms'] / base['median_ms'] - 1 if base['median_ms'] else 0
+            change = f"{ratio:+.1%}"
+            if ratio > tolerance:
+                regressions.append(name)
+                change += ' ❌'
+        print(f"{name:<45} {result['median_ms']:>10.2f} {result['p95_ms']:>10.2f} "
+              f"{result.get('rows_per_s', ''):>12} {result['peak_mb']:>8} {change:>9}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--gl-count', type=int, default=2000)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--sparsity', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database-url')
+    parser.add_argument('--skip-db', action='store_true', help='Only run the parsing benchmarks')
+    parser.add_argument('--keep-schema', action='store_true', help='Leave the throwaway schema in place')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown vs baseline (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    results = run_suite(args)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file).get('results', {})
+
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump({
+                'params': {k: getattr(args, k) for k in ['gl_count', 'months', 'sparsity', 'seed', 'repeat']},
+                'results': results
+            }, file, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"❌ Regressions over {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
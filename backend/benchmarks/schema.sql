@@ -0,0 +1,42 @@
+-- Tables used by database_service.py, for a throwaway benchmark / load-test database.
+-- The migrations/ scripts are applied on top of this by the benchmark suite.
+
+CREATE TABLE IF NOT EXISTS trial_balance_uploads (
+    upload_id TEXT PRIMARY KEY,
+    filename TEXT,
+    upload_date TIMESTAMP,
+    period_end_date DATE,
+    uploaded_by TEXT,
+    processing_status TEXT,
+    row_count INTEGER,
+    company TEXT,
+    error_message TEXT
+);
+
+CREATE TABLE IF NOT EXISTS trial_balance_data (
+    id BIGSERIAL PRIMARY KEY,
+    upload_id TEXT REFERENCES trial_balance_uploads (upload_id),
+    gl_code TEXT NOT NULL,
+    account_name TEXT,
+    period_end_date DATE,
+    amount NUMERIC(18, 2),
+    data_type TEXT
+);
+
+CREATE TABLE IF NOT EXISTS gl_report_mapping (
+    gl_code TEXT NOT NULL,
+    report_type TEXT NOT NULL,
+    line_id TEXT NOT NULL,
+    sign_multiplier NUMERIC NOT NULL DEFAULT 1,
+    PRIMARY KEY (gl_code, report_type)
+);
+
+CREATE TABLE IF NOT EXISTS report_line_definitions (
+    report_type TEXT NOT NULL,
+    section_name TEXT,
+    line_id TEXT NOT NULL,
+    line_name TEXT,
+    sign_multiplier NUMERIC DEFAULT 1,
+    display_order INTEGER,
+    PRIMARY KEY (report_type, line_id)
+);
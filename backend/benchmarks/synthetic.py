@@ -0,0 +1,123 @@
+"""Synthetic trial balance generator for benchmarks and load tests.
+
+Produces Actual / Budget / Prior Year sheets in the wide-month layout that
+process_worksheet accepts (GL Code, Account Name, one column per month end).
+
+    python -m benchmarks.synthetic out.xlsx --gl-count 2000 --months 12 --sparsity 0.3
+"""
+import argparse
+import calendar
+import random
+from datetime import date, datetime
+
+import pandas as pd
+
+SHEETS = {
+    'actual': 'Actual',
+    'budget': 'Budget',
+    'prior_year': 'Prior Year'
+}
+
+# Header styles process_worksheet understands
+HEADER_FORMATS = {
+    'datetime': lambda d: datetime(d.year, d.month, d.day),
+    'dmy-slash': lambda d: d.strftime('%d/%m/%Y'),
+    'dmy-dash': lambda d: d.strftime('%d-%m-%Y'),
+    'dmy-dot': lambda d: d.strftime('%d.%m.%Y'),
+    'iso': lambda d: d.isoformat()
+}
+
+# Template line ids the generated GL codes are mapped onto, by GL range
+PROFIT_LOSS_LINES = ['sales', 'cost_of_sales', 'admin_expenses', 'IT_expenses',
+                     'Professional_fees', 'Sales_expenses', 'Export_expenses']
+BALANCE_SHEET_LINES = ['stock', 'debtors', 'land_buildings', 'plant_machinery',
+                       'creditors', 'equity', 'reserves']
+
+
+def month_ends(end_period, months):
+    """The `months` month-end dates ending at end_period, oldest first"""
+    periods = []
+    year, month = end_period.year, end_period.month
+    for _ in range(months):
+        periods.append(date(year, month, calendar.monthrange(year, month)[1]))
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    return list(reversed(periods))
+
+
+def generate_gl_codes(gl_count):
+    """GL codes split between P&L (4xxxxx-8xxxxx) and Balance Sheet (1xxxxx-3xxxxx) ranges"""
+    pl_count = gl_count // 2
+    codes = [str(400000 + index) for index in range(pl_count)]
+    codes += [str(100000 + index) for index in range(gl_count - pl_count)]
+    return codes
+
+
+def generate_frames(gl_count=1000, months=12, sparsity=0.3, end_period=None,
+                    header_format='datetime', seed=42):
+    """Generate {data_type: DataFrame} for the three sheets"""
+    rng = random.Random(seed)
+    end_period = end_period or date(2025, 12, 31)
+    format_header = HEADER_FORMATS[header_format]
+    gl_codes = generate_gl_codes(gl_count)
+    names = [f"Account {code}" for code in gl_codes]
+
+    frames = {}
+    for data_type in SHEETS:
+        periods = month_ends(end_period, months)
+        if data_type == 'prior_year':
+            periods = [date(p.year - 1, p.month, calendar.monthrange(p.year - 1, p.month)[1]) for p in periods]
+
+        frame = {'GL Code': gl_codes, 'Account Name': names}
+        for period in periods:
+            frame[format_header(period)] = [
+                0.0 if rng.random() < sparsity else round(rng.uniform(-50000, 50000), 2)
+                for _ in gl_codes
+            ]
+        frames[data_type] = pd.DataFrame(frame)
+    return frames
+
+
+def write_workbook(path, frames):
+    """Write generated frames to an .xlsx workbook with the expected sheet names"""
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for data_type, frame in frames.items():
+            frame.to_excel(writer, sheet_name=SHEETS[data_type], index=False)
+    return path
+
+
+def generate_mappings(gl_codes):
+    """(gl_code, report_type, line_id, sign_multiplier) rows covering every generated GL code"""
+    mappings = []
+    for index, gl_code in enumerate(gl_codes):
+        if gl_code.startswith('1'):
+            mappings.append((gl_code, 'balance_sheet', BALANCE_SHEET_LINES[index % len(BALANCE_SHEET_LINES)], 1))
+        else:
+            line_id = PROFIT_LOSS_LINES[index % len(PROFIT_LOSS_LINES)]
+            mappings.append((gl_code, 'profit_loss', line_id, 1 if line_id == 'sales' else -1))
+    return mappings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help='Output .xlsx path')
+    parser.add_argument('--gl-count', type=int, default=1000)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--sparsity', type=float, default=0.3, help='Fraction of zero cells')
+    parser.add_argument('--end-period', default='2025-12-31')
+    parser.add_argument('--header-format', choices=sorted(HEADER_FORMATS), default='datetime')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    frames = generate_frames(
+        args.gl_count, args.months, args.sparsity,
+        datetime.strptime(args.end_period, '%Y-%m-%d').date(),
+        args.header_format, args.seed
+    )
+    write_workbook(args.path, frames)
+    print(f"✅ Wrote {args.path}: {args.gl_count} GLs x {args.months} months x {len(frames)} sheets")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'text/csv',
+    'text/html',
+    'text/plain'
+}
+
+
+def choose_encoding(accept_encodings):
+    """Pick the best encoding the client accepts: br if available, then gzip"""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_body(body, encoding, level):
+    """Compress a response body with the chosen encoding"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=min(level, 11))
+    return gzip.compress(body, compresslevel=min(level, 9))
+
+
+def init_compression(app):
+    """Compress buffered responses negotiated via Accept-Encoding.
+
+    Streaming responses (exports), small bodies below COMPRESS_MIN_SIZE and
+    non-text content types are sent as-is.
+    """
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = app.config.get('COMPRESS_LEVEL', 5)
+
+    @app.after_request
+    def compress_response(response):
+        if not app.config.get('COMPRESS_ENABLED', True):
+            return response
+
+        if (response.status_code < 200 or response.status_code >= 300
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+
+        response.set_data(compress_body(body, encoding, level))
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,33 @@
+# gunicorn settings - run with: gunicorn -c gunicorn.conf.py "app:create_app()"
+#
+# For /metrics to aggregate across workers, point PROMETHEUS_MULTIPROC_DIR at
+# an empty folder that is wiped before each start-up.
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+# Threads per worker - admission control (UPLOAD_CONCURRENCY / REPORT_CONCURRENCY) caps
+# how many of them may run uploads or heavy reports at once
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Heavy upload/export dependencies are imported lazily by the app. Set
+# GUNICORN_PRELOAD_HEAVY=true to import them once in the master instead, so
+# forked workers share the pages and the first upload pays no import cost.
+PRELOAD_HEAVY_MODULES = ['pandas', 'openpyxl']
+preload_heavy = os.environ.get('GUNICORN_PRELOAD_HEAVY', 'false').lower() == 'true'
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges from the multiprocess metrics"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def on_starting(server):
+    """Import heavy dependencies in the master before workers fork"""
+    if preload_heavy:
+        import importlib
+        for name in PRELOAD_HEAVY_MODULES:
+            importlib.import_module(name)
+        server.log.info(f"Preloaded {', '.join(PRELOAD_HEAVY_MODULES)}")
@@ -0,0 +1,70 @@
+from datetime import date, datetime
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, stdlib json is the fallback
+    orjson = None
+
+
+def _orjson_default(obj):
+    """Types orjson doesn't serialize natively"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson.
+
+    Dates and datetimes come out as ISO 8601 strings, Decimals as floats and
+    RealDictRow (a dict subclass) as a plain object. Non-string dict keys such
+    as integer line_ids are converted to strings.
+    """
+    option = None
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_orjson_default, option=self._get_option()).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_orjson_default, option=self._get_option())
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+    def _get_option(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self._app.debug and self.compact is not True:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+
+class StdlibProvider(DefaultJSONProvider):
+    """Flask's default provider, with dates as ISO strings and Decimals as floats to match orjson"""
+
+    @staticmethod
+    def default(obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        if isinstance(obj, (date, datetime)):
+            return obj.isoformat()
+        return DefaultJSONProvider.default(obj)
+
+
+def init_json_provider(app):
+    """Install the JSON provider selected by JSON_SERIALIZER ('orjson' or 'stdlib')"""
+    serializer = app.config.get('JSON_SERIALIZER', 'orjson')
+    if serializer == 'orjson' and orjson is None:
+        print("⚠️ orjson not installed - falling back to stdlib json")
+        serializer = 'stdlib'
+
+    provider_class = OrjsonProvider if serializer == 'orjson' else StdlibProvider
+    app.json_provider_class = provider_class
+    app.json = provider_class(app)
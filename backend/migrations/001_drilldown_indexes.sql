@@ -0,0 +1,16 @@
+-- Indexes backing the report line drill-down (GET /api/reports/drilldown)
+-- Apply with: psql "$DATABASE_URL" -f migrations/001_drilldown_indexes.sql
+
+-- (report_type, line_id) -> gl_code lookup kept alongside gl_report_mapping
+CREATE INDEX IF NOT EXISTS idx_gl_report_mapping_type_line
+    ON gl_report_mapping (report_type, line_id, gl_code)
+    INCLUDE (sign_multiplier);
+
+-- GL balances for one code, data type and period range
+-- (superseded by idx_trial_balance_facts_account in 006, dropped by 009)
+CREATE INDEX IF NOT EXISTS idx_trial_balance_data_gl_type_period
+    ON trial_balance_data (gl_code, data_type, period_end_date)
+    INCLUDE (upload_id, amount);
+
+CREATE INDEX IF NOT EXISTS idx_trial_balance_uploads_company
+    ON trial_balance_uploads (company, upload_id);
@@ -0,0 +1,13 @@
+-- Data version counter used for ETag / Last-Modified on report and lookup endpoints.
+-- Bumped in the same transaction as uploads, deletes and mapping writes.
+-- Apply with: psql "$DATABASE_URL" -f migrations/002_data_version.sql
+
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO data_version (id, version, updated_at)
+VALUES (1, 0, NOW())
+ON CONFLICT (id) DO NOTHING;
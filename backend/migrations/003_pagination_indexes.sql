@@ -0,0 +1,18 @@
+-- Indexes backing the keyset-paginated lists
+-- (GET /api/mappings/trial-balances and GET /api/mappings/gl-codes/<upload_id>)
+-- Apply with: psql "$DATABASE_URL" -f migrations/003_pagination_indexes.sql
+
+-- Completed uploads, newest first - optionally narrowed to one company
+-- (replaced by NULL-safe expression indexes in 010)
+CREATE INDEX IF NOT EXISTS idx_trial_balance_uploads_complete_page
+    ON trial_balance_uploads (period_end_date DESC, upload_date DESC, upload_id DESC)
+    WHERE processing_status = 'complete';
+
+CREATE INDEX IF NOT EXISTS idx_trial_balance_uploads_company_page
+    ON trial_balance_uploads (company, period_end_date DESC, upload_date DESC, upload_id DESC)
+    WHERE processing_status = 'complete';
+
+-- Distinct GL codes of one upload in "C" order, so pages and GL prefixes are range scans
+-- (superseded by idx_gl_accounts_company_gl in 006, dropped by 009)
+CREATE INDEX IF NOT EXISTS idx_trial_balance_data_upload_gl_page
+    ON trial_balance_data (upload_id, data_type, gl_code COLLATE "C", (COALESCE(account_name, '')));
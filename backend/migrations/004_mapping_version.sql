@@ -0,0 +1,5 @@
+-- Mapping version counter polled by the in-process GL mapping index (services/mapping_index.py).
+-- Bumped by save_gl_mapping / delete_gl_mapping in the same transaction as the write.
+-- Apply with: psql "$DATABASE_URL" -f migrations/004_mapping_version.sql
+
+ALTER TABLE data_version ADD COLUMN IF NOT EXISTS mapping_version BIGINT NOT NULL DEFAULT 0;
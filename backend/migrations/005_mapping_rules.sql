@@ -0,0 +1,27 @@
+-- Rule-based GL mappings (GL ranges and prefixes), see services/mapping_rules.py.
+-- Rows materialized from a rule are kept in gl_report_mapping with their rule_id;
+-- explicit per-code mappings have rule_id NULL and always take priority.
+-- Apply with: psql "$DATABASE_URL" -f migrations/005_mapping_rules.sql
+
+CREATE TABLE IF NOT EXISTS gl_mapping_rules (
+    rule_id SERIAL PRIMARY KEY,
+    report_type TEXT NOT NULL,
+    rule_type TEXT NOT NULL CHECK (rule_type IN ('range', 'prefix')),
+    gl_from TEXT NOT NULL,
+    gl_to TEXT,
+    line_id TEXT NOT NULL,
+    sign_multiplier NUMERIC NOT NULL DEFAULT 1,
+    priority INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    CHECK (rule_type = 'prefix' OR gl_to IS NOT NULL)
+);
+
+CREATE INDEX IF NOT EXISTS idx_gl_mapping_rules_type
+    ON gl_mapping_rules (report_type);
+
+ALTER TABLE gl_report_mapping
+    ADD COLUMN IF NOT EXISTS rule_id INTEGER REFERENCES gl_mapping_rules (rule_id) ON DELETE CASCADE;
+
+CREATE INDEX IF NOT EXISTS idx_gl_report_mapping_rule
+    ON gl_report_mapping (report_type, rule_id)
+    WHERE rule_id IS NOT NULL;
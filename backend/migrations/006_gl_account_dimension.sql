@@ -0,0 +1,129 @@
+-- GL account dimension: trial balance amounts are stored as compact integer facts.
+--
+-- trial_balance_data repeated gl_code and account_name text on every amount
+-- row (once per month and data_type). Accounts now live once per
+-- (company, gl_code) in gl_accounts, periods in calendar_periods
+-- (period_key = YYYYMMDD), and trial_balance_facts holds only integer keys,
+-- data_type and amount. trial_balance_data becomes a view with the old
+-- columns so existing read queries keep working.
+--
+-- Existing rows are converted in place; the old table is kept as
+-- trial_balance_data_legacy so the conversion can be checked
+-- (benchmarks/bench_storage.py). Rows without any period_end_date cannot be
+-- converted - the migration raises a WARNING with their count. Then drop:
+--     DROP TABLE trial_balance_data_legacy;
+-- Apply with: psql "$DATABASE_URL" -f migrations/006_gl_account_dimension.sql
+
+ALTER TABLE trial_balance_uploads
+    ADD COLUMN IF NOT EXISTS upload_key SERIAL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_trial_balance_uploads_key
+    ON trial_balance_uploads (upload_key);
+
+CREATE TABLE IF NOT EXISTS gl_accounts (
+    account_id SERIAL PRIMARY KEY,
+    company TEXT NOT NULL,
+    gl_code TEXT NOT NULL,
+    account_name TEXT,
+    UNIQUE (company, gl_code)
+);
+
+-- GL code pages of one company in "C" order, and gl_code lookups from gl_report_mapping
+CREATE INDEX IF NOT EXISTS idx_gl_accounts_company_gl
+    ON gl_accounts (company, gl_code COLLATE "C");
+
+CREATE INDEX IF NOT EXISTS idx_gl_accounts_gl
+    ON gl_accounts (gl_code);
+
+CREATE TABLE IF NOT EXISTS calendar_periods (
+    period_key INTEGER PRIMARY KEY,
+    period_end_date DATE NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS trial_balance_facts (
+    upload_key INTEGER NOT NULL REFERENCES trial_balance_uploads (upload_key) ON DELETE CASCADE,
+    account_id INTEGER NOT NULL REFERENCES gl_accounts (account_id),
+    period_key INTEGER NOT NULL REFERENCES calendar_periods (period_key),
+    data_type TEXT NOT NULL,
+    amount NUMERIC(18, 2)
+);
+
+-- Report scans of a company's uploads, and the GL code page EXISTS probe
+CREATE INDEX IF NOT EXISTS idx_trial_balance_facts_upload
+    ON trial_balance_facts (upload_key, data_type, account_id, period_key)
+    INCLUDE (amount);
+
+-- GL balances for one account, data type and period range (drill-down, mapping deltas)
+CREATE INDEX IF NOT EXISTS idx_trial_balance_facts_account
+    ON trial_balance_facts (account_id, data_type, period_key)
+    INCLUDE (upload_key, amount);
+
+DO $$
+DECLARE
+    skipped_rows BIGINT;
+BEGIN
+    -- Only convert while trial_balance_data is still the original table
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('trial_balance_data')) = 'r' THEN
+        -- Rows with no period (on the row or its upload) or no upload cannot become facts;
+        -- say so rather than drop them silently (they stay in trial_balance_data_legacy)
+        SELECT COUNT(*) INTO skipped_rows
+        FROM trial_balance_data tbd
+        LEFT JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
+        WHERE tbu.upload_id IS NULL
+        OR COALESCE(tbd.period_end_date, tbu.period_end_date) IS NULL;
+        IF skipped_rows > 0 THEN
+            RAISE WARNING '% trial_balance_data rows have no period_end_date or upload and are not converted - '
+                'check trial_balance_data_legacy before dropping it', skipped_rows;
+        END IF;
+
+        INSERT INTO gl_accounts (company, gl_code, account_name)
+        SELECT COALESCE(tbu.company, ''), tbd.gl_code, MAX(tbd.account_name)
+        FROM trial_balance_data tbd
+        JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
+        GROUP BY COALESCE(tbu.company, ''), tbd.gl_code
+        ON CONFLICT (company, gl_code) DO NOTHING;
+
+        -- Legacy single-period rows have no period / data_type of their own
+        INSERT INTO calendar_periods (period_key, period_end_date)
+        SELECT DISTINCT to_char(COALESCE(tbd.period_end_date, tbu.period_end_date), 'YYYYMMDD')::integer,
+               COALESCE(tbd.period_end_date, tbu.period_end_date)
+        FROM trial_balance_data tbd
+        JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
+        WHERE COALESCE(tbd.period_end_date, tbu.period_end_date) IS NOT NULL
+        ON CONFLICT (period_key) DO NOTHING;
+
+        INSERT INTO trial_balance_facts (upload_key, account_id, period_key, data_type, amount)
+        SELECT tbu.upload_key,
+               ga.account_id,
+               to_char(COALESCE(tbd.period_end_date, tbu.period_end_date), 'YYYYMMDD')::integer,
+               COALESCE(tbd.data_type, 'actual'),
+               tbd.amount
+        FROM trial_balance_data tbd
+        JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
+        JOIN gl_accounts ga ON ga.company = COALESCE(tbu.company, '') AND ga.gl_code = tbd.gl_code
+        WHERE COALESCE(tbd.period_end_date, tbu.period_end_date) IS NOT NULL;
+
+        ALTER TABLE trial_balance_data RENAME TO trial_balance_data_legacy;
+    END IF;
+END $$;
+
+-- The old row shape, for queries that still read trial_balance_data
+CREATE OR REPLACE VIEW trial_balance_data AS
+SELECT
+    tbu.upload_id,
+    ga.gl_code,
+    ga.account_name,
+    cp.period_end_date,
+    tbf.amount,
+    tbf.data_type,
+    tbf.upload_key,
+    tbf.account_id,
+    tbf.period_key
+FROM trial_balance_facts tbf
+JOIN trial_balance_uploads tbu ON tbu.upload_key = tbf.upload_key
+JOIN gl_accounts ga ON ga.account_id = tbf.account_id
+JOIN calendar_periods cp ON cp.period_key = tbf.period_key;
+
+ANALYZE gl_accounts;
+ANALYZE calendar_periods;
+ANALYZE trial_balance_facts;
@@ -0,0 +1,68 @@
+-- Calendar dimension: integer month, quarter and fiscal keys per period.
+--
+-- calendar_periods (added in 006) gains YYYYMM, calendar quarter and fiscal
+-- year / period / quarter columns. Fiscal columns follow
+-- FISCAL_YEAR_START_MONTH (fiscal years are named after the year they end
+-- in); rows are filled here for a January start and recomputed by the app
+-- (services/period_utils.calendar_attributes) on the next upload whenever
+-- the configured start month differs from fiscal_year_start_month.
+--
+-- Reports select months and YTD ranges as integer ranges on
+-- trial_balance_facts.period_key (YYYYMMDD) instead of DATE_TRUNC / EXTRACT
+-- on every row.
+-- Apply with: psql "$DATABASE_URL" -f migrations/007_calendar_dimension.sql
+
+ALTER TABLE calendar_periods
+    ADD COLUMN IF NOT EXISTS month_key INTEGER,
+    ADD COLUMN IF NOT EXISTS calendar_year INTEGER,
+    ADD COLUMN IF NOT EXISTS calendar_quarter INTEGER,
+    ADD COLUMN IF NOT EXISTS fiscal_year_start_month INTEGER,
+    ADD COLUMN IF NOT EXISTS fiscal_year INTEGER,
+    ADD COLUMN IF NOT EXISTS fiscal_period INTEGER,
+    ADD COLUMN IF NOT EXISTS fiscal_quarter INTEGER;
+
+UPDATE calendar_periods
+SET month_key = period_key / 100,
+    calendar_year = EXTRACT(YEAR FROM period_end_date)::integer,
+    calendar_quarter = EXTRACT(QUARTER FROM period_end_date)::integer,
+    fiscal_year_start_month = 1,
+    fiscal_year = EXTRACT(YEAR FROM period_end_date)::integer,
+    fiscal_period = EXTRACT(MONTH FROM period_end_date)::integer,
+    fiscal_quarter = EXTRACT(QUARTER FROM period_end_date)::integer
+WHERE month_key IS NULL;
+
+ALTER TABLE calendar_periods
+    ALTER COLUMN month_key SET NOT NULL,
+    ALTER COLUMN calendar_year SET NOT NULL,
+    ALTER COLUMN calendar_quarter SET NOT NULL,
+    ALTER COLUMN fiscal_year_start_month SET NOT NULL,
+    ALTER COLUMN fiscal_year SET NOT NULL,
+    ALTER COLUMN fiscal_period SET NOT NULL,
+    ALTER COLUMN fiscal_quarter SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_calendar_periods_month
+    ON calendar_periods (month_key);
+
+CREATE INDEX IF NOT EXISTS idx_calendar_periods_fiscal
+    ON calendar_periods (fiscal_year, fiscal_period);
+
+-- Expose the calendar keys on the trial_balance_data compatibility view
+CREATE OR REPLACE VIEW trial_balance_data AS
+SELECT
+    tbu.upload_id,
+    ga.gl_code,
+    ga.account_name,
+    cp.period_end_date,
+    tbf.amount,
+    tbf.data_type,
+    tbf.upload_key,
+    tbf.account_id,
+    tbf.period_key,
+    cp.month_key,
+    cp.fiscal_year,
+    cp.fiscal_period,
+    cp.fiscal_quarter
+FROM trial_balance_facts tbf
+JOIN trial_balance_uploads tbu ON tbu.upload_key = tbf.upload_key
+JOIN gl_accounts ga ON ga.account_id = tbf.account_id
+JOIN calendar_periods cp ON cp.period_key = tbf.period_key;
@@ -0,0 +1,27 @@
+-- Running year-to-date balances per GL account, maintained at ingest.
+--
+-- One row per (account, data_type, month) for every month of each fiscal year
+-- an account has data in, holding the cumulative total from the start of the
+-- fiscal year. P&L YTD columns read one row per account instead of summing
+-- up to twelve months. services/ytd_balances.py recomputes the affected
+-- fiscal years of a company on every upload, delete and archive re-import;
+-- ytd_balance_state records which fiscal year start month a company's rows
+-- were built for; until it matches FISCAL_YEAR_START_MONTH (new deployment,
+-- changed setting) reports sum the months instead of reading these rows.
+-- Apply with: psql "$DATABASE_URL" -f migrations/008_ytd_balances.sql
+-- then fill it for existing data with: python -m services.ytd_balances rebuild
+
+CREATE TABLE IF NOT EXISTS trial_balance_ytd (
+    account_id INTEGER NOT NULL REFERENCES gl_accounts (account_id),
+    data_type TEXT NOT NULL,
+    month_key INTEGER NOT NULL,
+    fiscal_year INTEGER NOT NULL,
+    ytd_amount NUMERIC(18, 2) NOT NULL,
+    PRIMARY KEY (account_id, data_type, month_key)
+);
+
+CREATE TABLE IF NOT EXISTS ytd_balance_state (
+    company TEXT PRIMARY KEY,
+    fiscal_year_start_month INTEGER NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,15 @@
+-- Drop the trial_balance_data indexes made obsolete by 006.
+--
+-- 001 and 003 indexed trial_balance_data, which 006 renames to
+-- trial_balance_data_legacy (the indexes follow the table) and replaces
+-- with a view over trial_balance_facts. Reads no longer touch the legacy
+-- table, so these only slow down the conversion check. Their replacements
+-- are created by 006:
+--   idx_trial_balance_data_gl_type_period -> idx_trial_balance_facts_account
+--                                            + gl_accounts (company, gl_code)
+--   idx_trial_balance_data_upload_gl_page -> idx_trial_balance_facts_upload
+--                                            + idx_gl_accounts_company_gl
+-- Apply with: psql "$DATABASE_URL" -f migrations/009_drop_legacy_indexes.sql
+
+DROP INDEX IF EXISTS idx_trial_balance_data_gl_type_period;
+DROP INDEX IF EXISTS idx_trial_balance_data_upload_gl_page;
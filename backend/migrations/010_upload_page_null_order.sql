@@ -0,0 +1,27 @@
+-- Upload list pages with NULL dates.
+--
+-- GET /api/mappings/trial-balances orders and continues pages on
+-- (COALESCE(period_end_date, '-infinity'), COALESCE(upload_date, '-infinity'),
+-- upload_id) so uploads without a date come last and are never skipped by
+-- the keyset comparison. These replace the plain-column indexes from 003.
+-- Apply with: psql "$DATABASE_URL" -f migrations/010_upload_page_null_order.sql
+
+CREATE INDEX IF NOT EXISTS idx_trial_balance_uploads_complete_page_nulls
+    ON trial_balance_uploads (
+        (COALESCE(period_end_date, '-infinity'::date)) DESC,
+        (COALESCE(upload_date, '-infinity'::timestamp)) DESC,
+        upload_id DESC
+    )
+    WHERE processing_status = 'complete';
+
+CREATE INDEX IF NOT EXISTS idx_trial_balance_uploads_company_page_nulls
+    ON trial_balance_uploads (
+        company,
+        (COALESCE(period_end_date, '-infinity'::date)) DESC,
+        (COALESCE(upload_date, '-infinity'::timestamp)) DESC,
+        upload_id DESC
+    )
+    WHERE processing_status = 'complete';
+
+DROP INDEX IF EXISTS idx_trial_balance_uploads_complete_page;
+DROP INDEX IF EXISTS idx_trial_balance_uploads_company_page;
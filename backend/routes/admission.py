@@ -0,0 +1,138 @@
+import threading
+import time
+from functools import wraps
+from flask import jsonify, make_response, current_app
+from services.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_WAIT, ADMISSION_REJECTED
+
+# Admission control for expensive endpoints.
+#
+# Uploads and heavy report generation each get a fixed number of slots per
+# worker process. Extra requests wait in a bounded queue for up to
+# ADMISSION_QUEUE_TIMEOUT seconds; a full queue answers 429 and a timed-out
+# wait answers 503, both with Retry-After. Endpoints without a pool (lookups,
+# mappings) never wait here, so they stay fast while uploads pile up.
+
+POOL_SETTINGS = {
+    'upload': 'UPLOAD_CONCURRENCY',
+    'report': 'REPORT_CONCURRENCY'
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class AdmissionPool:
+    """Bounded slots plus a bounded, time-limited wait queue"""
+
+    def __init__(self, name, slots, max_queue, timeout):
+        self.name = name
+        self.slots = slots
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Take a slot. Returns None on success, else 'queue_full' or 'timeout'"""
+        with self._condition:
+            if self.in_flight < self.slots and self.waiting == 0:
+                self._take()
+                return None
+
+            if self.waiting >= self.max_queue:
+                return 'queue_full'
+
+            self.waiting += 1
+            ADMISSION_QUEUE_DEPTH.labels(pool=self.name).inc()
+            start = time.perf_counter()
+            try:
+                admitted = self._condition.wait_for(lambda: self.in_flight < self.slots, self.timeout)
+            finally:
+                self.waiting -= 1
+                ADMISSION_QUEUE_DEPTH.labels(pool=self.name).dec()
+                ADMISSION_WAIT.labels(pool=self.name).observe(time.perf_counter() - start)
+
+            if not admitted:
+                return 'timeout'
+            self._take()
+            return None
+
+    def _take(self):
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.labels(pool=self.name).inc()
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            ADMISSION_IN_FLIGHT.labels(pool=self.name).dec()
+            self._condition.notify()
+
+
+def get_pool(name):
+    """Per-process pool for name, sized from the app config on first use"""
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                config = current_app.config
+                pool = AdmissionPool(
+                    name,
+                    slots=config.get(POOL_SETTINGS[name], 4),
+                    max_queue=config.get('ADMISSION_QUEUE_SIZE', 20),
+                    timeout=config.get('ADMISSION_QUEUE_TIMEOUT', 10)
+                )
+                _pools[name] = pool
+    return pool
+
+
+def get_admission_status():
+    """Slots, in-flight and queued requests for every pool created so far"""
+    return {
+        name: {
+            'slots': pool.slots,
+            'in_flight': pool.in_flight,
+            'queued': pool.waiting,
+            'max_queue': pool.max_queue
+        }
+        for name, pool in _pools.items()
+    }
+
+
+def admission_limited(pool_name):
+    """Run the view only once a slot in pool_name is free.
+
+    Streamed responses keep their slot until the body has been sent, so a
+    large export counts against the limit for as long as it is generating.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get('ADMISSION_ENABLED', True):
+                return view(*args, **kwargs)
+
+            pool = get_pool(pool_name)
+            rejected = pool.acquire()
+            if rejected:
+                ADMISSION_REJECTED.labels(pool=pool_name, reason=rejected).inc()
+                print(f"⚠️ Admission {pool_name} rejected request: {rejected}")
+                status = 429 if rejected == 'queue_full' else 503
+                response = make_response(jsonify({'error': 'Server busy, please retry shortly'}), status)
+                response.headers['Retry-After'] = str(current_app.config.get('ADMISSION_RETRY_AFTER', 5))
+                return response
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                pool.release()
+                raise
+
+            if response.is_streamed:
+                response.call_on_close(pool.release)
+            else:
+                pool.release()
+            return response
+
+        return wrapper
+    return decorator
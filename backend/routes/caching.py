@@ -0,0 +1,93 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+from flask import request, make_response, current_app
+from services.database_service import get_data_version
+from services.metrics import REPORT_CACHE_REQUESTS
+
+# The data version is cached per worker for HTTP_CACHE_VERSION_TTL seconds,
+# so a burst of conditional GETs costs one query instead of one each. Any
+# write request (POST / PUT / PATCH / DELETE) served by this worker drops the
+# cached value once it has finished; writes through other workers are picked
+# up when the TTL runs out.
+
+_cached_version = None
+_cached_at = 0.0
+_cached_version_lock = threading.Lock()
+
+
+def get_cached_data_version():
+    """Get (version, updated_at), re-read from the database at most every HTTP_CACHE_VERSION_TTL seconds"""
+    global _cached_version, _cached_at
+    ttl = current_app.config.get('HTTP_CACHE_VERSION_TTL', 1.0)
+    with _cached_version_lock:
+        if _cached_version is not None and time.monotonic() - _cached_at < ttl:
+            return _cached_version
+
+    version = get_data_version()
+    with _cached_version_lock:
+        _cached_version = version
+        _cached_at = time.monotonic()
+    return version
+
+
+def invalidate_cached_data_version():
+    """Forget the cached data version so the next conditional GET reads it again"""
+    global _cached_version
+    with _cached_version_lock:
+        _cached_version = None
+
+
+def init_caching(app):
+    """Drop the cached data version after every write request"""
+    @app.after_request
+    def forget_version_after_write(response):
+        if request.method in ('POST', 'PUT', 'PATCH', 'DELETE'):
+            invalidate_cached_data_version()
+        return response
+
+
+def versioned_response(view):
+    """Add ETag / Last-Modified from the data version and answer 304 when unchanged.
+
+    The ETag covers the data version plus the request path and query string, so
+    a conditional request is answered without running the view at all. Weak
+    ETags are used because the body may be compressed differently per client.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            version, updated_at = get_cached_data_version()
+        except Exception as e:
+            # No version table yet - serve uncached rather than fail
+            print(f"⚠️ HTTP caching disabled: {str(e)}")
+            return view(*args, **kwargs)
+
+        etag = hashlib.sha1(f"{version}:{request.full_path}".encode()).hexdigest()
+        last_modified = updated_at.replace(microsecond=0)
+
+        not_modified = False
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(etag)
+        elif request.if_modified_since:
+            not_modified = last_modified <= request.if_modified_since
+
+        REPORT_CACHE_REQUESTS.labels(result='hit' if not_modified else 'miss').inc()
+        if not_modified:
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        response.last_modified = last_modified
+        max_age = current_app.config.get('HTTP_CACHE_MAX_AGE', 0)
+        if max_age:
+            response.headers['Cache-Control'] = f'private, max-age={max_age}, must-revalidate'
+        else:
+            response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    return wrapper
@@ -1,30 +1,61 @@
 from flask import Blueprint, jsonify, request
 from services.database_service import (
-    get_uploaded_trial_balances, 
-    get_trial_balance_gl_codes,
+    get_uploaded_trial_balances_page,
+    get_trial_balance_gl_codes_page,
    get_available_report_lines,
    get_existing_gl_mappings,
     save_gl_mapping,
-    delete_gl_mapping
+    delete_gl_mapping,
+    get_mapping_rules,
+    save_mapping_rule,
+    delete_mapping_rule
 )
+from services.mapping_rules import RULE_TYPES, rule_interval, materialize_rule_mappings
+from services.mapping_validation import validate_upload_mappings
+from services.mapping_delta import preview_mapping_changes
+from routes.caching import versioned_response
+from services.pagination import page_size
 
 mappings_bp = Blueprint('mappings', __name__)
 
 @mappings_bp.route('/mappings/trial-balances', methods=['GET'])
+@versioned_response
 def get_trial_balances():
-    """Get list of available trial balances"""
+    """Get one page of available trial balances (filters: company, period_from, period_to)"""
     try:
-        trial_balances = get_uploaded_trial_balances()
-        return jsonify({'trial_balances': trial_balances})
+        try:
+            page = get_uploaded_trial_balances_page(
+                company=request.args.get('company'),
+                period_from=request.args.get('period_from'),
+                period_to=request.args.get('period_to'),
+                cursor=request.args.get('cursor'),
+                limit=page_size(request.args.get('limit', type=int))
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify(page)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @mappings_bp.route('/mappings/gl-codes/<upload_id>', methods=['GET'])
+@versioned_response
 def get_gl_codes(upload_id):
-    """Get GL codes for a specific trial balance"""
+    """Get one page of GL codes for a specific trial balance (filters: prefix, search)"""
     try:
-        gl_codes = get_trial_balance_gl_codes(upload_id)
-        return jsonify({'gl_codes': gl_codes})
+        try:
+            page = get_trial_balance_gl_codes_page(
+                upload_id,
+                data_type=request.args.get('data_type', 'actual'),
+                prefix=request.args.get('prefix'),
+                search=request.args.get('search'),
+                cursor=request.args.get('cursor'),
+                limit=page_size(request.args.get('limit', type=int))
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify(page)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -44,6 +75,36 @@ def save_mapping():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@mappings_bp.route('/mappings/preview', methods=['POST'])
+def preview_mapping_route():
+    """Show the impact of mapping changes without saving them.
+    
+    Body: {"report_type", "changes": [{"gl_code", "line_id" (null = unmap), "sign_multiplier"}],
+           "company", "period_end_date", "preview_report" (optional)}
+    """
+    try:
+        data = request.json or {}
+        report_type = (data.get('report_type') or '').replace('-', '_')
+        changes = data.get('changes')
+        preview_report = (data.get('preview_report') or report_type).replace('-', '_')
+        
+        if report_type not in ['profit_loss', 'balance_sheet'] or preview_report not in ['profit_loss', 'balance_sheet']:
+            return jsonify({'error': 'report_type must be profit_loss or balance_sheet'}), 400
+        
+        if not changes or not isinstance(changes, list) or not all(change.get('gl_code') for change in changes):
+            return jsonify({'error': 'changes list with a gl_code per change is required'}), 400
+        
+        preview = preview_mapping_changes(
+            report_type,
+            changes,
+            company=data.get('company'),
+            period_end_date=data.get('period_end_date'),
+            preview_report=preview_report
+        )
+        return jsonify(preview)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @mappings_bp.route('/mappings/<gl_code>/<report_type>', methods=['DELETE'])
 def delete_mapping(gl_code, report_type):
     """Delete a GL mapping"""
@@ -54,6 +115,7 @@ def delete_mapping(gl_code, report_type):
         return jsonify({'error': str(e)}), 500
 
 @mappings_bp.route('/mappings/mappings/<report_type>', methods=['GET'])
+@versioned_response
 def get_existing_mappings_route(report_type):
     """Get existing GL code mappings"""
     try:
@@ -62,7 +124,88 @@ def get_existing_mappings_route(report_type):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@mappings_bp.route('/mappings/rules/<report_type>', methods=['GET'])
+@versioned_response
+def get_mapping_rules_route(report_type):
+    """Get the range / prefix mapping rules for a report type"""
+    try:
+        return jsonify({'rules': get_mapping_rules(report_type)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@mappings_bp.route('/mappings/rules', methods=['POST'])
+def save_mapping_rule_route():
+    """Save a range or prefix rule and map every uploaded GL code it covers.
+    
+    Body: {"report_type", "rule_type": "range"|"prefix", "gl_from", "gl_to" (ranges),
+           "line_id", "sign_multiplier", "priority" (optional, higher wins)}
+    """
+    try:
+        data = request.json or {}
+        if not all(data.get(key) for key in ['report_type', 'rule_type', 'gl_from', 'line_id']):
+            return jsonify({'error': 'report_type, rule_type, gl_from and line_id are required'}), 400
+        
+        if data['rule_type'] not in RULE_TYPES:
+            return jsonify({'error': f"rule_type must be one of {', '.join(RULE_TYPES)}"}), 400
+        
+        gl_to = data.get('gl_to') if data['rule_type'] == 'range' else None
+        try:
+            rule_interval(data['rule_type'], data['gl_from'], gl_to)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        rule_id = save_mapping_rule(
+            data['report_type'],
+            data['rule_type'],
+            data['gl_from'],
+            gl_to,
+            data['line_id'],
+            data.get('sign_multiplier', 1),
+            int(data.get('priority', 0))
+        )
+        mapped = materialize_rule_mappings([data['report_type']])
+        return jsonify({
+            'success': True,
+            'rule_id': rule_id,
+            'gl_codes_mapped': mapped.get(data['report_type'], 0)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@mappings_bp.route('/mappings/rules/<int:rule_id>', methods=['DELETE'])
+def delete_mapping_rule_route(rule_id):
+    """Delete a mapping rule; codes it covered fall back to any remaining rules"""
+    try:
+        report_type = delete_mapping_rule(rule_id)
+        mapped = materialize_rule_mappings([report_type])
+        return jsonify({
+            'success': True,
+            'message': 'Mapping rule deleted successfully',
+            'gl_codes_mapped': mapped.get(report_type, 0)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@mappings_bp.route('/mappings/validation/<upload_id>', methods=['GET'])
+@versioned_response
+def validate_upload_mappings_route(upload_id):
+    """Get the GL codes of an upload that are unmapped, and mappings pointing at unknown lines.
+    
+    Without report_type, unmapped means no mapping in any report type.
+    """
+    try:
+        report_type = request.args.get('report_type')
+        if report_type:
+            report_type = report_type.replace('-', '_')
+            if report_type not in ['profit_loss', 'balance_sheet']:
+                return jsonify({'error': f'Unknown report type: {report_type}'}), 400
+        
+        return jsonify(validate_upload_mappings(upload_id, report_type))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @mappings_bp.route('/mappings/report-lines/<report_type>', methods=['GET'])
+@versioned_response
 def get_report_lines_route(report_type):
     """Get available report line options for dropdown"""
     try:
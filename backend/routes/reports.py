@@ -1,9 +1,18 @@
-from flask import Blueprint, jsonify, request
+import itertools
+from flask import Blueprint, jsonify, request, Response, stream_with_context
+from werkzeug.utils import secure_filename
 from services.report_generator import generate_profit_loss_report
 from services.report_generator import generate_balance_sheet_report
 from services.database_service import get_available_periods
 from services.database_service import get_available_companies
 from services.database_service import get_available_periods_delete
+from services.database_service import get_line_drilldown
+from services.report_exporter import iter_report_rows, stream_csv, stream_xlsx
+from services.batch_service import generate_report_batch
+from services.period_utils import parse_period
+from routes.caching import versioned_response
+from routes.admission import admission_limited
+from services.tracing import span
 
 
 reports_bp = Blueprint('reports', __name__)
@@ -11,6 +20,8 @@ reports_bp = Blueprint('reports', __name__)
 
 
 @reports_bp.route('/reports/profit-loss', methods=['GET'])
+@versioned_response
+@admission_limited('report')
 def get_profit_loss():
     try:
         period_end_date = request.args.get('period_end_date')
@@ -25,28 +36,37 @@ def get_profit_loss():
         from services.report_generator import generate_profit_loss_report
         report = generate_profit_loss_report(period_end_date, company)  # Pass company
         
-        return jsonify(report)
+        with span('serialize'):
+            return jsonify(report)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @reports_bp.route('/reports/balance-sheet', methods=['GET'])
+@versioned_response
+@admission_limited('report')
 def generate_balance_sheet():
     try:
         period_end_date = request.args.get('period_end_date')
+        company = request.args.get('company')
         
         if not period_end_date:
             return jsonify({'error': 'period_end_date parameter is required'}), 400
         
+        if not company:
+            return jsonify({'error': 'company is required'}), 400
+        
         # Call your actual balance sheet generation function
-        report_data = generate_balance_sheet_report(period_end_date)
+        report_data = generate_balance_sheet_report(period_end_date, company)
         
-        return jsonify(report_data)
+        with span('serialize'):
+            return jsonify(report_data)
         
     except Exception as e:
         print(f"❌ Balance Sheet API Error: {str(e)}")
         return jsonify({'error': f'Failed to generate balance sheet: {str(e)}'}), 500
 
 @reports_bp.route('/reports/available-periods', methods=['GET'])
+@versioned_response
 def get_available_periods_route():
     """Get list of available reporting periods"""
     try:
@@ -61,6 +81,7 @@ def get_available_periods_route():
         return jsonify({'error': str(e)}), 500
 
 @reports_bp.route('/reports/available-periods-delete', methods=['GET'])
+@versioned_response
 def get_available_periods_delete_route():
     """Get list of available reporting periods"""
     try:
@@ -77,6 +98,7 @@ def get_available_periods_delete_route():
 
 
 @reports_bp.route('/reports/available-companies', methods=['GET'])
+@versioned_response
 def get_available_companies_route():
     """Get list of available companies"""
     try:
@@ -84,4 +106,169 @@ def get_available_companies_route():
         companies = get_available_companies()
         return jsonify({'companies': companies})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+@reports_bp.route('/reports/batch', methods=['POST'])
+@admission_limited('report')
+def generate_batch_reports():
+    """Generate several reports in one request, sharing fetched data per company.
+    
+    Body: {"reports": [{"report_type": "profit_loss", "company": "...", "period_end_date": "YYYY-MM-DD"}, ...]}
+    """
+    try:
+        data = request.json or {}
+        specs = data.get('reports')
+        
+        if not specs or not isinstance(specs, list):
+            return jsonify({'error': 'reports list is required'}), 400
+        
+        for spec in specs:
+            if not isinstance(spec, dict) or not all(
+                spec.get(key) and isinstance(spec[key], str) for key in ['report_type', 'company', 'period_end_date']
+            ):
+                return jsonify({'error': 'Each report needs report_type, company and period_end_date strings'}), 400
+            try:
+                parse_period(spec['period_end_date'])
+            except ValueError:
+                return jsonify({'error': f"Invalid period_end_date: {spec['period_end_date']}"}), 400
+            spec['report_type'] = spec['report_type'].replace('-', '_')
+            if spec['report_type'] not in ['profit_loss', 'balance_sheet']:
+                return jsonify({'error': f"Unknown report type: {spec['report_type']}"}), 400
+        
+        return jsonify(generate_report_batch(specs))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/reports/drilldown', methods=['GET'])
+@versioned_response
+def get_drilldown_route():
+    """Get the GL codes behind one report line and column"""
+    try:
+        company = request.args.get('company')
+        period_end_date = request.args.get('period_end_date')
+        report_type = (request.args.get('report_type') or '').replace('-', '_')
+        line_id = request.args.get('line_id')
+        column = request.args.get('column', 'actual')
+        cursor = request.args.get('cursor')
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        
+        if not all([company, period_end_date, report_type, line_id]):
+            return jsonify({'error': 'company, period_end_date, report_type and line_id are required'}), 400
+        
+        if limit < 1:
+            return jsonify({'error': 'limit must be positive'}), 400
+        
+        try:
+            drilldown = get_line_drilldown(company, period_end_date, report_type, line_id, column, cursor, limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'company': company,
+            'period_end_date': period_end_date,
+            'report_type': report_type,
+            'line_id': line_id,
+            'column': column,
+            **drilldown
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+def export_report_response(report_type, periods, company, export_format):
+    """Build a streaming download response for one or more report periods.
+    
+    Periods are validated and the first report is generated before the
+    response starts, so bad input or a database error is still a JSON error
+    rather than a 200 download holding only the header row.
+    """
+    for period in periods:
+        try:
+            parse_period(period)
+        except ValueError:
+            raise ValueError(f"Invalid period_end_date: {period} (expected YYYY-MM-DD)")
+    
+    rows = iter_report_rows(report_type, periods, company)
+    # Header row, then the first report line - which generates the first report
+    first_rows = [next(rows)]
+    first_line = next(rows, None)
+    if first_line is not None:
+        first_rows.append(first_line)
+    rows = itertools.chain(first_rows, rows)
+    
+    if export_format == 'xlsx':
+        body = stream_xlsx(rows, sheet_title=report_type)
+    else:
+        body = stream_csv(rows)
+    
+    suffix = periods[0] if len(periods) == 1 else f"{periods[-1]}_to_{periods[0]}"
+    filename = secure_filename(f"{report_type}_{company}_{suffix}.{export_format}")
+    
+    return Response(
+        stream_with_context(body),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@reports_bp.route('/reports/<report_type>/export', methods=['GET'])
+@admission_limited('report')
+def export_report(report_type):
+    """Export a P&L or Balance Sheet as CSV or XLSX"""
+    try:
+        report_type = report_type.replace('-', '_')
+        period_end_date = request.args.get('period_end_date')
+        company = request.args.get('company')
+        export_format = request.args.get('format', 'csv').lower()
+        
+        if report_type not in ['profit_loss', 'balance_sheet']:
+            return jsonify({'error': f'Unknown report type: {report_type}'}), 404
+        
+        if not period_end_date or not company:
+            return jsonify({'error': 'period_end_date and company are required'}), 400
+        
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': 'format must be csv or xlsx'}), 400
+        
+        return export_report_response(report_type, [period_end_date], company, export_format)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/reports/multi-period/export', methods=['GET'])
+@admission_limited('report')
+def export_multi_period_report():
+    """Export a report for several periods (defaults to every available period)"""
+    try:
+        report_type = request.args.get('report_type', 'profit_loss').replace('-', '_')
+        company = request.args.get('company')
+        periods = request.args.get('periods')
+        export_format = request.args.get('format', 'csv').lower()
+        
+        if report_type not in ['profit_loss', 'balance_sheet']:
+            return jsonify({'error': f'Unknown report type: {report_type}'}), 400
+        
+        if not company:
+            return jsonify({'error': 'company is required'}), 400
+        
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': 'format must be csv or xlsx'}), 400
+        
+        if periods:
+            periods = sorted([p.strip() for p in periods.split(',') if p.strip()], reverse=True)
+        else:
+            periods = get_available_periods(company)
+        
+        if not periods:
+            return jsonify({'error': f'No periods available for {company}'}), 404
+        
+        return export_report_response(report_type, periods, company, export_format)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -3,14 +3,33 @@ import os
 from werkzeug.utils import secure_filename
 from services.excel_processor import process_trial_balance_file
 import uuid
+from services.tracing import span
+from routes.admission import admission_limited
 
 upload_bp = Blueprint('upload', __name__)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'xlsx', 'xls'}
 
+def allowed_tabular_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'csv', 'parquet', 'zip'}
+
+def tabular_uploads():
+    """(field, file) pairs for CSV / Parquet / zip files - under 'file' or named actual / budget / prior_year"""
+    uploads = [('file', file) for file in request.files.getlist('file')
+               if file.filename and allowed_tabular_file(file.filename)]
+    uploads += [(field, request.files[field]) for field in ('actual', 'budget', 'prior_year')
+                if field in request.files and request.files[field].filename]
+    return uploads
+
 @upload_bp.route('/upload', methods=['POST'])
+@admission_limited('upload')
 def upload_trial_balance():
+    # CSV / Parquet exports (zipped or one file per data type) take their own parse path
+    uploads = tabular_uploads()
+    if uploads:
+        return upload_tabular_trial_balance(uploads)
+    
     # Validate file exists
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
@@ -21,7 +40,7 @@ def upload_trial_balance():
         return jsonify({'error': 'No file selected'}), 400
     
     if not allowed_file(file.filename):
-        return jsonify({'error': 'Invalid file type. Please upload .xlsx or .xls files'}), 400
+        return jsonify({'error': 'Invalid file type. Please upload .xlsx, .xls, .csv, .parquet or .zip files'}), 400
     
     # Validate company
     company = request.form.get('company')
@@ -36,7 +55,25 @@ def upload_trial_balance():
         # Save file temporarily
         filename = secure_filename(file.filename)
         filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{upload_id}_{filename}")
-        file.save(filepath)
+        with span('save'):
+            file.save(filepath)
+        
+        # Header-only pre-check: reject a bad workbook before the full parse
+        validation = None
+        try:
+            from services.upload_validation import precheck_enabled, validate_trial_balance_file
+            if precheck_enabled():
+                with span('precheck'):
+                    validation = validate_trial_balance_file(filepath)
+        except Exception as e:
+            print(f"⚠️ Upload pre-check skipped: {str(e)}")
+        
+        if validation and not validation['valid']:
+            os.remove(filepath)
+            return jsonify({
+                'error': f"Validation failed: {'; '.join(validation['errors'])}",
+                'validation': validation
+            }), 400
         
         # Process the Excel file with company parameter
         result = process_trial_balance_file(filepath, upload_id, filename, company)
@@ -50,7 +87,8 @@ def upload_trial_balance():
             'upload_id': upload_id,
             'filename': filename,
             'company': company,
-            'rows_processed': result['rows_processed']
+            'rows_processed': result['rows_processed'],
+            'mapping_check': result.get('mapping_check')
         })
         
     except Exception as e:
@@ -67,6 +105,102 @@ def upload_trial_balance():
         
         return jsonify({'error': f'Processing failed: {str(e)}'}), 500
     
+def upload_tabular_trial_balance(uploads):
+    """Save and process a zip or a set of CSV / Parquet files (one per data type)"""
+    from services.tabular_ingest import detect_data_type, read_zip_sources, process_tabular_trial_balance
+    
+    for _, file in uploads:
+        if not allowed_tabular_file(file.filename):
+            return jsonify({'error': f'Invalid file type: {file.filename}. Please upload .csv, .parquet or .zip files'}), 400
+    
+    company = request.form.get('company')
+    if not company:
+        return jsonify({'error': 'Company name required'}), 400
+    
+    upload_id = str(uuid.uuid4())
+    filenames = [secure_filename(file.filename) for _, file in uploads]
+    filepaths = []
+    
+    try:
+        sources = {}
+        with span('save'):
+            for (field, file), filename in zip(uploads, filenames):
+                filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{upload_id}_{filename}")
+                file.save(filepath)
+                filepaths.append(filepath)
+                
+                if filename.lower().endswith('.zip'):
+                    found = read_zip_sources(filepath)
+                else:
+                    data_type = field if field != 'file' else detect_data_type(filename)
+                    if not data_type:
+                        raise Exception(f"Cannot tell whether {filename} is actual, budget or prior year data")
+                    found = {data_type: (filename, filepath)}
+                
+                for data_type, source in found.items():
+                    if data_type in sources:
+                        raise Exception(f"More than one {data_type} file: {sources[data_type][0]}, {source[0]}")
+                    sources[data_type] = source
+        
+        original_filename = ', '.join(filenames)
+        result = process_tabular_trial_balance(sources, upload_id, original_filename, company)
+        
+        return jsonify({
+            'message': 'Trial balance processed successfully',
+            'upload_id': upload_id,
+            'filename': original_filename,
+            'company': company,
+            'rows_processed': result['rows_processed'],
+            'mapping_check': result.get('mapping_check')
+        })
+        
+    except Exception as e:
+        try:
+            from services.database_service import update_upload_status
+            update_upload_status(upload_id, 'failed', str(e))
+        except Exception:
+            pass  # Don't fail if status update fails
+        
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+    finally:
+        for filepath in filepaths:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+    
+@upload_bp.route('/upload/validate', methods=['POST'])
+def validate_trial_balance():
+    """Dry run: check a workbook's sheets, header row and date columns without loading it"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file provided'}), 400
+    
+    file = request.files['file']
+    
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Invalid file type. Please upload .xlsx or .xls files'}), 400
+    
+    try:
+        sample_rows = int(request.form.get('sample_rows', request.args.get('sample_rows', 0)))
+    except ValueError:
+        return jsonify({'error': 'sample_rows must be a whole number'}), 400
+    
+    filename = secure_filename(file.filename)
+    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], f"validate_{uuid.uuid4()}_{filename}")
+    try:
+        file.save(filepath)
+        
+        from services.upload_validation import validate_trial_balance_file
+        validation = validate_trial_balance_file(filepath, sample_rows=sample_rows)
+        validation['filename'] = filename
+        return jsonify(validation)
+    except Exception as e:
+        return jsonify({'error': f'Validation failed: {str(e)}'}), 400
+    finally:
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
 @upload_bp.route('/tb/delete', methods=['DELETE'])
 def delete_trial_balance():
     try:
@@ -77,7 +211,13 @@ def delete_trial_balance():
             return jsonify({'error': 'Company and period required'}), 400
         
         from services.database_service import delete_tb_by_company_period
-        delete_tb_by_company_period(company, period)
+        upload_id = delete_tb_by_company_period(company, period)
+        
+        try:
+            from services.upload_archive import retire_upload_archive
+            retire_upload_archive(company, upload_id)
+        except Exception as e:
+            print(f"⚠️ Upload archive not retired: {str(e)}")
         
         return jsonify({
             'message': 'Trial balance deleted'
@@ -0,0 +1,360 @@
+import os
+import re
+import threading
+from services.database_service import get_db_connection, get_data_versions
+from services.period_utils import parse_period, shift_years, month_start, fiscal_year_start
+from services.settings import get_setting
+
+# Optional DuckDB analytics backend.
+#
+# Each company gets a Parquet snapshot of trial_balance_data joined to
+# gl_report_mapping, pre-aggregated to (report_type, line_id, data_type,
+# period_end_date). Reports then run in-process against the snapshot instead
+# of going back to Postgres. Snapshots are deleted when uploads or mapping
+# rules change and rebuilt lazily on the next report; saving or deleting a
+# single GL mapping instead adds its line deltas to the existing snapshots
+# (apply_mapping_deltas). Each file is named after the
+# (data_version, mapping_version) it was read at, and only a snapshot
+# matching the current versions is served - so a refresh that races an
+# invalidation can never put a stale file back in use.
+#
+# Enable with ANALYTICS_BACKEND=duckdb (requires `pip install duckdb`).
+
+SNAPSHOT_COLUMNS = ['report_type', 'line_id', 'data_type', 'period_end_date', 'amount']
+
+_snapshot_cache = {}
+_snapshot_locks = {}
+_snapshot_locks_lock = threading.Lock()
+
+
+def analytics_enabled():
+    """Check whether reports should be served from the DuckDB snapshots"""
+    return get_setting('ANALYTICS_BACKEND', 'postgres').lower() == 'duckdb'
+
+
+def get_snapshot_dir():
+    """Get (and create) the folder holding the company snapshots"""
+    snapshot_dir = get_setting('ANALYTICS_SNAPSHOT_DIR', '') or 'analytics_snapshots'
+    os.makedirs(snapshot_dir, exist_ok=True)
+    return snapshot_dir
+
+
+def get_snapshot_name(company):
+    """File-system safe snapshot name for a company"""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', company)
+
+
+def get_snapshot_path(company, versions):
+    """Get the Parquet snapshot path for a company at (data_version, mapping_version)"""
+    data_version, mapping_version = versions
+    return os.path.join(get_snapshot_dir(), f"{get_snapshot_name(company)}.v{data_version}-{mapping_version}.parquet")
+
+
+def list_snapshot_paths(company=None):
+    """Snapshot files for one company (any version), or for all companies"""
+    snapshot_dir = get_snapshot_dir()
+    prefix = re.escape(get_snapshot_name(company)) if company is not None else r'.+'
+    pattern = re.compile(rf'^{prefix}\.v\d+-\d+\.parquet$')
+    return [os.path.join(snapshot_dir, name) for name in os.listdir(snapshot_dir) if pattern.match(name)]
+
+
+def get_company_lock(company):
+    """Per-company lock so one company's refresh does not hold up the others"""
+    with _snapshot_locks_lock:
+        if company not in _snapshot_locks:
+            _snapshot_locks[company] = threading.Lock()
+        return _snapshot_locks[company]
+
+
+def refresh_snapshot(company):
+    """Rebuild the Parquet snapshot for a company from Postgres, returning its path"""
+    import duckdb
+    import pandas as pd
+
+    conn = get_db_connection()
+    try:
+        # Versions and rows from one consistent database snapshot
+        conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT version, mapping_version FROM data_version WHERE id = 1")
+            versions = cursor.fetchone()
+            if not versions:
+                raise Exception("data_version row missing - run migrations/002_data_version.sql")
+            query = """
+            SELECT
+                grm.report_type,
+                grm.line_id::text,
+                tbd.data_type,
+                tbd.period_end_date,
+                SUM(tbd.amount * grm.sign_multiplier)::float8 as amount
+            FROM trial_balance_data tbd
+            JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
+            JOIN gl_report_mapping grm ON tbd.gl_code = grm.gl_code
+            WHERE tbu.company = %s
+            GROUP BY grm.report_type, grm.line_id, tbd.data_type, tbd.period_end_date
+            """
+            cursor.execute(query, (company,))
+            rows = cursor.fetchall()
+    except Exception as e:
+        raise Exception(f"Failed to refresh analytics snapshot: {str(e)}")
+    finally:
+        conn.close()
+
+    snapshot_df = pd.DataFrame(rows, columns=SNAPSHOT_COLUMNS)
+    path = get_snapshot_path(company, versions)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+
+    duck = duckdb.connect()
+    try:
+        duck.register('snapshot_rows', snapshot_df)
+        duck.execute(f"""
+            COPY (
+                SELECT
+                    CAST(report_type AS VARCHAR) AS report_type,
+                    CAST(line_id AS VARCHAR) AS line_id,
+                    CAST(data_type AS VARCHAR) AS data_type,
+                    CAST(period_end_date AS DATE) AS period_end_date,
+                    CAST(amount AS DOUBLE) AS amount
+                FROM snapshot_rows
+                ORDER BY report_type, period_end_date
+            ) TO '{temp_path}' (FORMAT PARQUET, COMPRESSION ZSTD)
+        """)
+    finally:
+        duck.close()
+
+    # Swap in atomically so other workers never read a half-written file
+    os.replace(temp_path, path)
+    for old_path in list_snapshot_paths(company):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+    print(f"✅ Analytics snapshot refreshed for {company}: {len(rows)} rows (versions {versions[0]}/{versions[1]})")
+    return path
+
+
+def invalidate_snapshots(company=None):
+    """Drop the snapshot for one company, or all companies when company is None"""
+    if not analytics_enabled():
+        return
+
+    for path in list_snapshot_paths(company):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    print(f"🔄 Analytics snapshots invalidated: {company or 'all companies'}")
+
+
+def carry_snapshots_forward(previous_versions, versions, deltas):
+    """Move the snapshots built at previous_versions to versions, adding per-company line deltas.
+
+    deltas is {company: [(report_type, line_id, data_type, period_end_date, delta)]}.
+    Only valid when the write that moved previous_versions to versions
+    changed nothing but those lines. Older snapshots at any other version
+    are dropped, as they could not be served anymore.
+    """
+    import duckdb
+    import pandas as pd
+
+    delta_rows = {get_snapshot_name(company): rows for company, rows in deltas.items()}
+    pattern = re.compile(r'^(.+)\.v(\d+)-(\d+)\.parquet$')
+    carried = 0
+    for old_path in list_snapshot_paths():
+        snapshot_name, data_version, mapping_version = pattern.match(os.path.basename(old_path)).groups()
+        file_versions = (int(data_version), int(mapping_version))
+        if file_versions != tuple(previous_versions):
+            if file_versions[0] < versions[0] or file_versions[1] < versions[1]:
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+            continue
+
+        path = get_snapshot_path(snapshot_name, versions)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        rows = delta_rows.get(snapshot_name)
+        try:
+            if rows:
+                duck = duckdb.connect()
+                try:
+                    duck.register('delta_rows', pd.DataFrame(rows, columns=SNAPSHOT_COLUMNS))
+                    duck.execute(f"""
+                        COPY (
+                            SELECT report_type, line_id, data_type, period_end_date, SUM(amount) AS amount
+                            FROM (
+                                SELECT * FROM read_parquet('{old_path}')
+                                UNION ALL
+                                SELECT
+                                    CAST(report_type AS VARCHAR),
+                                    CAST(line_id AS VARCHAR),
+                                    CAST(data_type AS VARCHAR),
+                                    CAST(period_end_date AS DATE),
+                                    CAST(amount AS DOUBLE)
+                                FROM delta_rows
+                            )
+                            GROUP BY report_type, line_id, data_type, period_end_date
+                            ORDER BY report_type, period_end_date
+                        ) TO '{temp_path}' (FORMAT PARQUET, COMPRESSION ZSTD)
+                    """)
+                finally:
+                    duck.close()
+            else:
+                # Untouched company - same rows under the new version
+                os.link(old_path, temp_path)
+            os.replace(temp_path, path)
+            carried += 1
+        except FileNotFoundError:
+            # Replaced or invalidated by another worker meanwhile
+            continue
+        try:
+            os.remove(old_path)
+        except FileNotFoundError:
+            pass
+    print(f"🔄 Analytics snapshots carried to versions {versions[0]}/{versions[1]}: "
+          f"{carried} companies, {len(deltas)} with line deltas")
+    return carried
+
+
+def apply_mapping_deltas(report_type, changes, previous_versions, versions):
+    """Update the snapshots for a saved mapping change instead of rebuilding them.
+
+    changes are mapping_delta (gl_code, old, new) tuples. Falls back to
+    dropping every snapshot if the deltas cannot be applied.
+    """
+    if not analytics_enabled():
+        return
+
+    try:
+        from services.mapping_delta import compute_line_deltas
+        # Exact deltas - the carried snapshot must match a rebuild
+        deltas = compute_line_deltas(report_type, changes, tolerance=0)
+        carry_snapshots_forward(previous_versions, versions, deltas)
+    except Exception as e:
+        print(f"⚠️ Snapshot deltas not applied, rebuilding instead: {str(e)}")
+        invalidate_snapshots()
+
+
+def get_snapshot_connection(company):
+    """Get an in-memory DuckDB connection holding the company snapshot.
+
+    Only a snapshot built at the current (data_version, mapping_version) is
+    used; anything older is rebuilt. Connections are cached per process and
+    per snapshot file, so a new version from another worker is picked up.
+    """
+    import duckdb
+
+    path = get_snapshot_path(company, get_data_versions())
+    with get_company_lock(company):
+        if not os.path.exists(path):
+            # May be newer than the versions read above if a write landed since
+            path = refresh_snapshot(company)
+
+        cached = _snapshot_cache.get(company)
+        if cached and cached[0] == path:
+            return cached[1].cursor()
+
+        duck = duckdb.connect()
+        duck.execute(f"CREATE TABLE snapshot AS SELECT * FROM read_parquet('{path}')")
+        if cached:
+            cached[1].close()
+        _snapshot_cache[company] = (path, duck)
+        return duck.cursor()
+
+
+def get_report_data(report_type, period_end_date, company):
+    """Get report data from the DuckDB snapshot, same shape as the Postgres version"""
+    try:
+        period_date = parse_period(period_end_date)
+        cursor = get_snapshot_connection(company)
+
+        if report_type == 'profit_loss':
+            prior_year_date = shift_years(period_date, -1)
+            params = {
+                'report_type': report_type,
+                'month_start': month_start(period_date),
+                'next_month_start': month_start(period_date, -1),
+                'prior_month_start': month_start(prior_year_date),
+                'prior_next_month_start': month_start(prior_year_date, -1),
+                'year_start': fiscal_year_start(period_date),
+                'prior_year_start': fiscal_year_start(prior_year_date),
+            }
+            cursor.execute("""
+                SELECT
+                    line_id,
+                    SUM(CASE WHEN data_type = 'actual'
+                        AND period_end_date >= $month_start AND period_end_date < $next_month_start
+                        THEN amount ELSE 0 END) as actual,
+                    SUM(CASE WHEN data_type = 'budget'
+                        AND period_end_date >= $month_start AND period_end_date < $next_month_start
+                        THEN amount ELSE 0 END) as budget,
+                    SUM(CASE WHEN data_type = 'prior_year'
+                        AND period_end_date >= $prior_month_start AND period_end_date < $prior_next_month_start
+                        THEN amount ELSE 0 END) as prior_year,
+                    SUM(CASE WHEN data_type = 'actual'
+                        AND period_end_date >= $year_start AND period_end_date < $next_month_start
+                        THEN amount ELSE 0 END) as ytd_actual,
+                    SUM(CASE WHEN data_type = 'budget'
+                        AND period_end_date >= $year_start AND period_end_date < $next_month_start
+                        THEN amount ELSE 0 END) as ytd_budget,
+                    SUM(CASE WHEN data_type = 'prior_year'
+                        AND period_end_date >= $prior_year_start AND period_end_date < $prior_next_month_start
+                        THEN amount ELSE 0 END) as prior_ytd
+                FROM snapshot
+                WHERE report_type = $report_type
+                GROUP BY line_id
+            """, params)
+            columns = ['actual', 'budget', 'prior_year', 'ytd_actual', 'ytd_budget', 'prior_ytd']
+            data = {column: {} for column in columns}
+            for row in cursor.fetchall():
+                for column, value in zip(columns, row[1:]):
+                    data[column][row[0]] = float(value or 0)
+            return data
+
+        elif report_type == 'balance_sheet':
+            from services.database_service import BALANCE_SHEET_COLUMNS, RESERVES_LINE_ID
+            params = {
+                'month_start': month_start(period_date),
+                'prior_year_month_start': month_start(shift_years(period_date, -1)),
+                'prior_month_start': month_start(period_date, 1),
+                'period': period_date,
+            }
+            cursor.execute("""
+                SELECT
+                    report_type,
+                    CASE WHEN report_type = 'balance_sheet' THEN line_id END as line_id,
+                    SUM(CASE WHEN data_type = 'actual' AND DATE_TRUNC('month', period_end_date) = $month_start
+                        THEN amount ELSE 0 END) as actual,
+                    SUM(CASE WHEN data_type = 'budget' AND DATE_TRUNC('month', period_end_date) = $month_start
+                        THEN amount ELSE 0 END) as budget,
+                    SUM(CASE WHEN data_type = 'actual' AND DATE_TRUNC('month', period_end_date) = $prior_year_month_start
+                        THEN amount ELSE 0 END) as prior_year,
+                    SUM(CASE WHEN data_type = 'actual' AND DATE_TRUNC('month', period_end_date) = $prior_month_start
+                        THEN amount ELSE 0 END) as prior_month
+                FROM snapshot
+                WHERE report_type IN ('balance_sheet', 'profit_loss')
+                AND period_end_date >= $prior_year_month_start
+                AND period_end_date <= $period
+                GROUP BY 1, 2
+            """, params)
+            data = {column: {} for column in BALANCE_SHEET_COLUMNS}
+            profit = None
+            for row in cursor.fetchall():
+                if row[0] == 'profit_loss':
+                    profit = row
+                    continue
+                for column, value in zip(BALANCE_SHEET_COLUMNS, row[2:]):
+                    data[column][row[1]] = float(value or 0)
+
+            # Add P&L profit to reserves for Balance Sheet
+            if profit:
+                for column, value in zip(BALANCE_SHEET_COLUMNS, profit[2:]):
+                    data[column][RESERVES_LINE_ID] = data[column].get(RESERVES_LINE_ID, 0) + float(value or 0)
+            return data
+
+        else:
+            raise ValueError(f"Unknown report type: {report_type}")
+
+    except Exception as e:
+        raise Exception(f"Failed to get analytics report data: {str(e)}")
@@ -0,0 +1,194 @@
+import time
+from datetime import timedelta
+from services.database_service import get_report_line_amounts
+from services.mapping_index import mapping_index_enabled, get_mapped_line_amounts
+from services.database_service import BALANCE_SHEET_COLUMNS, RESERVES_LINE_ID
+from services.period_utils import parse_period, shift_years, month_start, fiscal_year_start
+from services.report_generator import generate_profit_loss_report
+from services.report_generator import generate_balance_sheet_report
+
+PROFIT_LOSS_COLUMNS = ['actual', 'budget', 'prior_year', 'ytd_actual', 'ytd_budget', 'prior_ytd']
+
+REPORT_GENERATORS = {
+    'profit_loss': generate_profit_loss_report,
+    'balance_sheet': generate_balance_sheet_report
+}
+
+
+def get_fetch_window(report_type, period_date):
+    """Earliest period date a report needs (the latest is the end of the period month)"""
+    if report_type == 'profit_loss':
+        # Prior year YTD starts at the start of the previous fiscal year
+        return fiscal_year_start(shift_years(period_date, -1))
+    # Balance Sheet reaches back to the same month last year
+    return month_start(shift_years(period_date, -1))
+
+
+def plan_batch(specs):
+    """Group report specs into one DB aggregation per company.
+
+    Returns {company: {'report_types': set, 'start_date': date, 'end_date': date}}.
+    A Balance Sheet also needs the profit_loss lines for reserves, so those are
+    shared with any P&L reports for the same company.
+    """
+    plan = {}
+    for spec in specs:
+        period_date = parse_period(spec['period_end_date'])
+        company_plan = plan.setdefault(spec['company'], {
+            'report_types': set(),
+            'start_date': None,
+            'end_date': None
+        })
+        company_plan['report_types'].add('profit_loss')
+        if spec['report_type'] == 'balance_sheet':
+            company_plan['report_types'].add('balance_sheet')
+
+        start_date = get_fetch_window(spec['report_type'], period_date)
+        if company_plan['start_date'] is None or start_date < company_plan['start_date']:
+            company_plan['start_date'] = start_date
+        # Fetch to month end - P&L month columns match on the whole month
+        end_date = month_start(period_date, -1) - timedelta(days=1)
+        if company_plan['end_date'] is None or end_date > company_plan['end_date']:
+            company_plan['end_date'] = end_date
+    return plan
+
+
+def compute_report_data(rows, report_type, period_end_date):
+    """Compute get_report_data columns in Python from fetched line amounts.
+
+    rows are (report_type, line_id, data_type, period_end_date, amount) tuples
+    and the column rules match the SQL in get_report_data.
+    """
+    period_date = parse_period(period_end_date)
+    current_month = month_start(period_date)
+    prior_year_date = shift_years(period_date, -1)
+
+    if report_type == 'profit_loss':
+        prior_year_month = month_start(prior_year_date)
+        ytd_start = fiscal_year_start(period_date)
+        prior_ytd_start = fiscal_year_start(prior_year_date)
+        data = {column: {} for column in PROFIT_LOSS_COLUMNS}
+
+        for row_report_type, line_id, data_type, row_date, amount in rows:
+            if row_report_type != 'profit_loss':
+                continue
+            row_month = month_start(row_date)
+            columns = []
+            if data_type in ('actual', 'budget'):
+                if row_month == current_month:
+                    columns.append(data_type)
+                if ytd_start <= row_date and row_month <= current_month:
+                    columns.append(f"ytd_{data_type}")
+            elif data_type == 'prior_year':
+                if row_month == prior_year_month:
+                    columns.append('prior_year')
+                if prior_ytd_start <= row_date and row_month <= prior_year_month:
+                    columns.append('prior_ytd')
+            for column in columns:
+                data[column][line_id] = data[column].get(line_id, 0) + amount
+        return data
+
+    elif report_type == 'balance_sheet':
+        month_columns = {
+            ('actual', current_month): 'actual',
+            ('budget', current_month): 'budget',
+            ('actual', month_start(prior_year_date)): 'prior_year',
+            ('actual', month_start(period_date, 1)): 'prior_month'
+        }
+        data = {column: {} for column in BALANCE_SHEET_COLUMNS}
+
+        for row_report_type, line_id, data_type, row_date, amount in rows:
+            if row_date > period_date:
+                continue
+            column = month_columns.get((data_type, month_start(row_date)))
+            if column is None:
+                continue
+            # P&L profit rolls into reserves
+            if row_report_type == 'profit_loss':
+                line_id = RESERVES_LINE_ID
+            data[column][line_id] = data[column].get(line_id, 0) + amount
+        return data
+
+    raise ValueError(f"Unknown report type: {report_type}")
+
+
+def generate_report_batch(specs):
+    """Generate several reports sharing one DB aggregation per company.
+
+    Failures stay with the reports they affect: a spec with an unreadable
+    period, or whose company's fetch failed, gets an 'error' entry while the
+    other reports in the batch are still returned.
+    """
+    batch_start = time.perf_counter()
+
+    spec_errors = {}
+    for index, spec in enumerate(specs):
+        try:
+            parse_period(spec['period_end_date'])
+        except Exception as e:
+            spec_errors[index] = str(e)
+    plan = plan_batch([spec for index, spec in enumerate(specs) if index not in spec_errors])
+
+    # 1. Fetch once per company
+    fetched = {}
+    fetch_ms = {}
+    fetch_errors = {}
+    for company, company_plan in plan.items():
+        fetch_start = time.perf_counter()
+        fetch_args = (
+            company,
+            sorted(company_plan['report_types']),
+            company_plan['start_date'],
+            company_plan['end_date']
+        )
+        fetched[company] = None
+        if mapping_index_enabled():
+            try:
+                fetched[company] = get_mapped_line_amounts(*fetch_args)
+            except Exception as e:
+                # No mapping version yet - fall back to the SQL mapping join
+                print(f"⚠️ Mapping index unavailable: {str(e)}")
+        if fetched[company] is None:
+            try:
+                fetched[company] = get_report_line_amounts(*fetch_args)
+            except Exception as e:
+                fetch_errors[company] = str(e)
+                print(f"❌ Batch fetch failed for {company}: {str(e)}")
+        fetch_ms[company] = (time.perf_counter() - fetch_start) * 1000
+        if company not in fetch_errors:
+            print(f"🔍 Batch fetch for {company}: {len(fetched[company])} rows in {fetch_ms[company]:.1f} ms")
+
+    # 2. Build every report from the shared rows
+    results = []
+    for index, spec in enumerate(specs):
+        report_start = time.perf_counter()
+        result = {
+            'report_type': spec['report_type'],
+            'company': spec['company'],
+            'period_end_date': spec['period_end_date']
+        }
+        try:
+            if index in spec_errors:
+                raise ValueError(spec_errors[index])
+            if spec['company'] in fetch_errors:
+                raise Exception(f"Failed to fetch data for {spec['company']}: {fetch_errors[spec['company']]}")
+            report_data = compute_report_data(
+                fetched[spec['company']], spec['report_type'], spec['period_end_date']
+            )
+            result['report'] = REPORT_GENERATORS[spec['report_type']](
+                spec['period_end_date'], spec['company'], report_data=report_data
+            )
+        except Exception as e:
+            result['error'] = str(e)
+        result['timing_ms'] = {
+            'shared_fetch': round(fetch_ms.get(spec['company'], 0), 2),
+            'generate': round((time.perf_counter() - report_start) * 1000, 2)
+        }
+        results.append(result)
+
+    return {
+        'reports': results,
+        'failed': sum(1 for result in results if 'error' in result),
+        'db_aggregations': len(plan),
+        'total_ms': round((time.perf_counter() - batch_start) * 1000, 2)
+    }
@@ -1,19 +1,190 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import psycopg2.pool
+from psycopg2.extras import RealDictCursor, execute_values
 import os
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from services.tracing import span
+from services.metrics import timed_query, DB_CONNECTIONS_OPENED, DB_CONNECTIONS_OPEN, INSERT_DURATION
+from services.pagination import encode_cursor, decode_cursor, cursor_value
+from services.period_utils import parse_period, period_key, report_period_keys
+from services.period_utils import fiscal_year_start, fiscal_year_start_month, calendar_attributes
+from services.settings import get_setting
 
 # try this 
 
+class TrackedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that keeps the open connection metrics up to date"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        DB_CONNECTIONS_OPENED.inc()
+        DB_CONNECTIONS_OPEN.inc()
+    
+    def close(self):
+        if not self.closed:
+            DB_CONNECTIONS_OPEN.dec()
+        super().close()
+
 def get_db_connection():
     """Get database connection"""
     try:
-        conn = psycopg2.connect(os.environ.get('DATABASE_URL'))
+        conn = psycopg2.connect(os.environ.get('DATABASE_URL'), connection_factory=TrackedConnection)
         return conn
     except Exception as e:
         raise Exception(f"Database connection failed: {str(e)}")
 
 
+_connection_pool = None
+_connection_pool_lock = threading.Lock()
+
+def get_connection_pool():
+    """Get the process-wide threaded connection pool (created on first use)"""
+    global _connection_pool
+    if _connection_pool is None:
+        with _connection_pool_lock:
+            if _connection_pool is None:
+                try:
+                    _connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                        1,
+                        int(get_setting('DB_POOL_MAX_CONNECTIONS', 10)),
+                        os.environ.get('DATABASE_URL'),
+                        connection_factory=TrackedConnection
+                    )
+                except Exception as e:
+                    raise Exception(f"Database connection pool failed: {str(e)}")
+    return _connection_pool
+
+_pool_slots = None
+
+@contextmanager
+def pooled_connection():
+    """Borrow a pooled connection, waiting for a free one instead of failing.
+    
+    ThreadedConnectionPool.getconn raises PoolError once maxconn connections
+    are out, so callers queue on a semaphore sized to the pool first. The
+    connection is rolled back and returned afterwards - closed instead if the
+    rollback fails or the caller raised.
+    """
+    global _pool_slots
+    pool = get_connection_pool()
+    if _pool_slots is None:
+        with _connection_pool_lock:
+            if _pool_slots is None:
+                _pool_slots = threading.BoundedSemaphore(pool.maxconn)
+    
+    with _pool_slots:
+        conn = pool.getconn()
+        failed = False
+        try:
+            yield conn
+        except Exception:
+            failed = True
+            raise
+        finally:
+            try:
+                conn.rollback()
+            except Exception:
+                failed = True
+            finally:
+                pool.putconn(conn, close=failed)
+
+
+def bump_data_version(cursor):
+    """Bump the data version inside the caller's transaction (invalidates HTTP caches)"""
+    cursor.execute("""
+        UPDATE data_version 
+        SET version = version + 1, updated_at = NOW()
+        WHERE id = 1
+    """)
+
+@timed_query
+def get_data_version():
+    """Get the current (version, updated_at) used for ETag / Last-Modified.
+    
+    Read on a pooled connection - conditional GETs check it on every request.
+    """
+    try:
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT version, updated_at FROM data_version WHERE id = 1")
+                result = cursor.fetchone()
+                if not result:
+                    raise Exception("data_version row missing - run migrations/002_data_version.sql")
+                return result[0], result[1]
+    except Exception as e:
+        raise Exception(f"Failed to get data version: {str(e)}")
+
+def lock_data_versions(cursor):
+    """Lock the data_version row for the caller's transaction and return (version, mapping_version)"""
+    cursor.execute("SELECT version, mapping_version FROM data_version WHERE id = 1 FOR UPDATE")
+    result = cursor.fetchone()
+    if not result:
+        raise Exception("data_version row missing - run migrations/002_data_version.sql")
+    return result[0], result[1]
+
+def bump_mapping_version(cursor):
+    """Bump the mapping version inside the caller's transaction (reloads mapping indexes)"""
+    cursor.execute("""
+        UPDATE data_version 
+        SET mapping_version = mapping_version + 1
+        WHERE id = 1
+    """)
+
+@timed_query
+def get_mapping_version():
+    """Get the current mapping version polled by the in-process mapping index"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT mapping_version FROM data_version WHERE id = 1")
+            result = cursor.fetchone()
+            if not result:
+                raise Exception("data_version row missing - run migrations/002_data_version.sql")
+            return result[0]
+    except Exception as e:
+        raise Exception(f"Failed to get mapping version: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def get_data_versions():
+    """Get the current (data_version, mapping_version) pair"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT version, mapping_version FROM data_version WHERE id = 1")
+            result = cursor.fetchone()
+            if not result:
+                raise Exception("data_version row missing - run migrations/002_data_version.sql")
+            return result[0], result[1]
+    except Exception as e:
+        raise Exception(f"Failed to get data versions: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def get_gl_mapping_snapshot():
+    """Get (mapping_version, [(report_type, gl_code, line_id, sign_multiplier)], rules) for every mapping"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            # Version first: a write landing in between only causes one extra reload
+            cursor.execute("SELECT mapping_version FROM data_version WHERE id = 1")
+            result = cursor.fetchone()
+            cursor.execute("""
+                SELECT report_type, gl_code, line_id, sign_multiplier
+                FROM gl_report_mapping
+            """)
+            mappings = cursor.fetchall()
+            return (result[0] if result else 0), mappings, get_mapping_rules()
+    except Exception as e:
+        raise Exception(f"Failed to get GL mappings: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
 def update_upload_status(upload_id, status, error_message=None):
     """Update upload status and optional error message"""
     conn = get_db_connection()
@@ -42,6 +213,87 @@ def update_upload_status(upload_id, status, error_message=None):
     finally:
         conn.close()
 
+def upsert_gl_accounts(cursor, company, accounts):
+    """Get {gl_code: account_id} for a company's GL codes, adding new accounts.
+    
+    accounts maps gl_code -> account_name; the latest upload's name wins,
+    except that a blank name never replaces a stored one.
+    """
+    if not accounts:
+        return {}
+    rows = execute_values(cursor, """
+        INSERT INTO gl_accounts (company, gl_code, account_name)
+        VALUES %s
+        ON CONFLICT (company, gl_code) DO UPDATE
+        SET account_name = COALESCE(NULLIF(EXCLUDED.account_name, ''), gl_accounts.account_name)
+        RETURNING gl_code, account_id
+    """, [(company or '', gl_code, account_name) for gl_code, account_name in accounts.items()],
+        page_size=1000, fetch=True)
+    return dict(rows)
+
+CALENDAR_COLUMNS = [
+    'period_key', 'period_end_date', 'month_key', 'calendar_year', 'calendar_quarter',
+    'fiscal_year_start_month', 'fiscal_year', 'fiscal_period', 'fiscal_quarter'
+]
+
+def ensure_calendar_periods(cursor, period_dates):
+    """Make sure every period end date has an up to date calendar_periods row.
+
+    Rows computed for a different FISCAL_YEAR_START_MONTH are recomputed too,
+    so changing the fiscal year start takes effect on the next upload.
+    """
+    start_month = fiscal_year_start_month()
+    cursor.execute(
+        "SELECT period_end_date FROM calendar_periods WHERE fiscal_year_start_month <> %s",
+        (start_month,)
+    )
+    period_dates = {parse_period(period_date) for period_date in period_dates} | {row[0] for row in cursor.fetchall()}
+    if period_dates:
+        execute_values(cursor, f"""
+            INSERT INTO calendar_periods ({', '.join(CALENDAR_COLUMNS)})
+            VALUES %s
+            ON CONFLICT (period_key) DO UPDATE SET
+            {', '.join(f"{column} = EXCLUDED.{column}" for column in CALENDAR_COLUMNS[2:])}
+            WHERE calendar_periods.fiscal_year_start_month <> EXCLUDED.fiscal_year_start_month
+        """, [
+            tuple(calendar_attributes(period_date, start_month)[column] for column in CALENDAR_COLUMNS)
+            for period_date in sorted(period_dates)
+        ])
+
+def insert_trial_balance_facts(cursor, upload_key, company, rows):
+    """Insert (gl_code, account_name, period_end_date, data_type, amount) rows as facts.
+    
+    Account names are stored once per (company, gl_code) in gl_accounts; the
+    fact rows only carry integer keys, data_type and amount.
+    """
+    accounts = {}
+    for gl_code, account_name, _, _, _ in rows:
+        if account_name or gl_code not in accounts:
+            accounts[gl_code] = account_name
+    account_ids = upsert_gl_accounts(cursor, company, accounts)
+    ensure_calendar_periods(cursor, [row[2] for row in rows])
+    
+    data_tuples = [
+        (upload_key, account_ids[gl_code], period_key(period_end_date), data_type, amount)
+        for gl_code, _, period_end_date, data_type, amount in rows
+    ]
+    if data_tuples:
+        import csv
+        import io
+        
+        # One COPY instead of a round trip per row; None amounts become NULL
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(data_tuples)
+        buffer.seek(0)
+        with span('db_copy'), INSERT_DURATION.time():
+            cursor.copy_expert(
+                "COPY trial_balance_facts (upload_key, account_id, period_key, data_type, amount) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+    return data_tuples
+
+@timed_query
 def save_complete_trial_balance_multi_period(upload_id, filename, period_end_date, combined_data, company):
     """Save trial balance with multiple periods and data types"""
     print(f"🔍 Saving {len(combined_data)} rows to database")
@@ -59,6 +311,7 @@ def save_complete_trial_balance_multi_period(upload_id, filename, period_end_dat
                 INSERT INTO trial_balance_uploads 
                 (upload_id, filename, upload_date, period_end_date, uploaded_by, processing_status, row_count, company)
                 VALUES (%s, %s, NOW(), %s, %s, %s, %s, %s)
+                RETURNING upload_key
             """
             cursor.execute(upload_query, (
                 upload_id, 
@@ -69,38 +322,39 @@ def save_complete_trial_balance_multi_period(upload_id, filename, period_end_dat
                 row_count, 
                 company
             ))
-            
+            upload_key = cursor.fetchone()[0]
+
             print(f"✅ Upload record saved")
-            
-            # 2. Save all trial balance data
-            data_query = """
-                INSERT INTO trial_balance_data 
-                (upload_id, gl_code, account_name, period_end_date, amount, data_type)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            
-            data_tuples = [
-                (upload_id, row['gl_code'], row['account_name'], 
-                 row['period_end_date'], row['amount'], row['data_type'])
+
+            # 2. Save all trial balance data as account / period keyed facts
+            rows = [
+                (row['gl_code'], row['account_name'], row['period_end_date'], row['data_type'], row['amount'])
                 for row in combined_data
             ]
-            
-            print(f"🔍 Created {len(data_tuples)} tuples to insert")
-            if data_tuples:
-                print(f"🔍 First tuple sample: {data_tuples[0]}")
-                print(f"🔍 Last tuple sample: {data_tuples[-1]}")
-            else:
-                print(f"⚠️ WARNING: No data tuples created!")
-            
-            if data_tuples:
-                cursor.executemany(data_query, data_tuples)
+
+            print(f"🔍 Created {len(rows)} rows to insert")
+            if rows:
+                print(f"🔍 First row sample: {rows[0]}")
+                print(f"🔍 Last row sample: {rows[-1]}")
+                data_tuples = insert_trial_balance_facts(cursor, upload_key, company, rows)
                 print(f"✅ Executed INSERT for {len(data_tuples)} rows")
             else:
+                data_tuples = []
                 print(f"⚠️ Skipping INSERT - no data to insert")
             
-            conn.commit()
+            # 3. Recompute running YTD balances for the fiscal years touched
+            from services.ytd_balances import maintain_ytd_balances
+            with span('ytd_balances'):
+                maintain_ytd_balances(cursor, company, sorted(set(row[2] for row in rows)))
+            
+            bump_data_version(cursor)
+            with span('commit'):
+                conn.commit()
             print(f"✅ Transaction committed")
             
+        from services.analytics_service import invalidate_snapshots
+        invalidate_snapshots(company)
+            
         # Count unique periods
         periods_loaded = len(set(row['period_end_date'] for row in combined_data)) if combined_data else 0
         
@@ -119,6 +373,7 @@ def save_complete_trial_balance_multi_period(upload_id, filename, period_end_dat
     finally:
         conn.close()
 
+@timed_query
 def save_complete_trial_balance(upload_id, filename, period_end_date, df, company):
     """Save both upload record and data in a single transaction"""
     conn = get_db_connection()
@@ -132,6 +387,7 @@ def save_complete_trial_balance(upload_id, filename, period_end_date, df, compan
                 INSERT INTO trial_balance_uploads 
                 (upload_id, filename, upload_date, period_end_date, uploaded_by, processing_status, row_count, company)
                 VALUES (%s, %s, NOW(), %s, %s, %s, %s, %s)
+                RETURNING upload_key
             """
             cursor.execute(upload_query, (
                 upload_id, 
@@ -142,24 +398,23 @@ def save_complete_trial_balance(upload_id, filename, period_end_date, df, compan
                 row_count, 
                 company
             ))
-            
+            upload_key = cursor.fetchone()[0]
+
             # 2. Aggregate duplicate GL codes
             aggregated_df = df.groupby('gl_code').agg({
                 'account_name': 'first',
                 'amount': 'sum'
             }).reset_index()
             
-            # 3. Save trial balance data
-            data_tuples = [
-                (upload_id, row['gl_code'], row['account_name'], row['amount'])
+            # 3. Save trial balance data as single-period actuals
+            data_tuples = insert_trial_balance_facts(cursor, upload_key, company, [
+                (row['gl_code'], row['account_name'], period_end_date, 'actual', row['amount'])
                 for _, row in aggregated_df.iterrows()
-            ]
+            ])
             
-            data_query = """
-                INSERT INTO trial_balance_data (upload_id, gl_code, account_name, amount)
-                VALUES (%s, %s, %s, %s)
-            """
-            cursor.executemany(data_query, data_tuples)
+            from services.ytd_balances import maintain_ytd_balances
+            maintain_ytd_balances(cursor, company, [period_end_date])
+            bump_data_version(cursor)
             
             # Commit everything together
             conn.commit()
@@ -175,43 +430,208 @@ def save_complete_trial_balance(upload_id, filename, period_end_date, df, compan
     finally:
         conn.close()
 
-def get_uploaded_trial_balances():
-    """Get list of uploaded trial balances for user to select from"""
+@timed_query
+def bulk_load_trial_balance(upload_id, filename, period_end_date, company, frame, replace=False):
+    """Bulk-load a parsed long-format trial balance with COPY (archive re-import).
+
+    frame is a pandas DataFrame with gl_code, account_name, period_end_date,
+    data_type and amount columns. An upload that already exists is skipped
+    unless replace=True, which deletes it first.
+    """
+    import io
+    import pandas as pd
+
     conn = get_db_connection()
     try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            query = """
-            SELECT upload_id, filename, period_end_date, upload_date, row_count
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT upload_key FROM trial_balance_uploads WHERE upload_id = %s", (upload_id,))
+            existing = cursor.fetchone()
+            if existing and not replace:
+                return {'skipped': True, 'rows_processed': 0, 'period_end_date': period_end_date, 'periods_loaded': 0}
+            replaced_periods = []
+            if existing:
+                cursor.execute("""
+                    SELECT DISTINCT cp.period_end_date
+                    FROM trial_balance_facts tbf
+                    JOIN calendar_periods cp ON tbf.period_key = cp.period_key
+                    WHERE tbf.upload_key = %s
+                """, (existing[0],))
+                replaced_periods = [row[0] for row in cursor.fetchall()]
+                cursor.execute("DELETE FROM trial_balance_facts WHERE upload_key = %s", (existing[0],))
+                cursor.execute("DELETE FROM trial_balance_uploads WHERE upload_id = %s", (upload_id,))
+
+            cursor.execute("""
+                INSERT INTO trial_balance_uploads
+                (upload_id, filename, upload_date, period_end_date, uploaded_by, processing_status, row_count, company)
+                VALUES (%s, %s, NOW(), %s, %s, %s, %s, %s)
+                RETURNING upload_key
+            """, (upload_id, filename, period_end_date, 'archive', 'complete', len(frame), company))
+            upload_key = cursor.fetchone()[0]
+
+            # Latest non-empty account name per code, as insert_trial_balance_facts does
+            accounts = dict.fromkeys(frame['gl_code'].unique(), '')
+            named = frame[frame['account_name'].fillna('') != '']
+            accounts.update(zip(named['gl_code'], named['account_name']))
+            account_ids = upsert_gl_accounts(cursor, company, accounts)
+
+            dates = pd.to_datetime(frame['period_end_date'])
+            period_dates = sorted(set(dates.dt.date))
+            ensure_calendar_periods(cursor, period_dates)
+
+            facts = pd.DataFrame({
+                'upload_key': upload_key,
+                'account_id': frame['gl_code'].map(account_ids),
+                'period_key': dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day,
+                'data_type': frame['data_type'],
+                'amount': frame['amount']
+            })
+            buffer = io.StringIO()
+            facts.to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            with span('db_copy'), INSERT_DURATION.time():
+                cursor.copy_expert(
+                    "COPY trial_balance_facts (upload_key, account_id, period_key, data_type, amount) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+
+            from services.ytd_balances import maintain_ytd_balances
+            with span('ytd_balances'):
+                maintain_ytd_balances(cursor, company, sorted(set(period_dates) | set(replaced_periods)))
+
+            bump_data_version(cursor)
+            conn.commit()
+
+        from services.analytics_service import invalidate_snapshots
+        invalidate_snapshots(company)
+        return {
+            'skipped': False,
+            'rows_processed': len(facts),
+            'period_end_date': period_end_date,
+            'periods_loaded': len(period_dates)
+        }
+    except Exception as e:
+        conn.rollback()
+        raise Exception(f"Failed to bulk load trial balance: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def get_uploaded_trial_balances_page(company=None, period_from=None, period_to=None, cursor=None, limit=100):
+    """Get one page of completed uploads, newest period first.
+    
+    Keyset paginated on (period_end_date, upload_date, upload_id): pass the
+    returned next_cursor back as `cursor` for the following page. Uploads
+    without a period or upload date come last.
+    """
+    conditions = ["processing_status = 'complete'"]
+    params = []
+    if company:
+        conditions.append("company = %s")
+        params.append(company)
+    if period_from:
+        conditions.append("period_end_date >= %s")
+        params.append(period_from)
+    if period_to:
+        conditions.append("period_end_date <= %s")
+        params.append(period_to)
+    if cursor:
+        # NULL dates sort as -infinity (last, newest first) on both sides of the comparison
+        conditions.append("""
+            (COALESCE(period_end_date, '-infinity'::date), COALESCE(upload_date, '-infinity'::timestamp), upload_id)
+            < (COALESCE(%s::date, '-infinity'::date), COALESCE(%s::timestamp, '-infinity'::timestamp), %s)
+        """)
+        period_value, upload_value, upload_id = decode_cursor(cursor, 3)
+        if upload_id is None:
+            raise ValueError('Invalid cursor')
+        params.extend([
+            cursor_value(period_value, date.fromisoformat),
+            cursor_value(upload_value, datetime.fromisoformat),
+            cursor_value(upload_id)
+        ])
+    
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as db_cursor:
+            query = f"""
+            SELECT upload_id, filename, company, period_end_date, upload_date, row_count
             FROM trial_balance_uploads 
-            WHERE processing_status = 'complete'
-            ORDER BY period_end_date DESC, upload_date DESC
+            WHERE {' AND '.join(conditions)}
+            ORDER BY COALESCE(period_end_date, '-infinity'::date) DESC,
+                COALESCE(upload_date, '-infinity'::timestamp) DESC,
+                upload_id DESC
+            LIMIT %s
             """
-            cursor.execute(query)
-            return cursor.fetchall()
+            db_cursor.execute(query, params + [limit + 1])
+            results = db_cursor.fetchall()
+            
+            has_more = len(results) > limit
+            results = results[:limit]
+            last = results[-1] if results else None
+            return {
+                'trial_balances': results,
+                'next_cursor': encode_cursor([last['period_end_date'], last['upload_date'], last['upload_id']]) if has_more else None
+            }
     except Exception as e:
         raise Exception(f"Failed to get trial balances: {str(e)}")
     finally:
         conn.close()
 
-def get_trial_balance_gl_codes(upload_id, data_type='actual'):
-    """Get all GL codes from a specific trial balance"""
+@timed_query
+def get_trial_balance_gl_codes_page(upload_id, data_type='actual', prefix=None, search=None, cursor=None, limit=100):
+    """Get one page of the GL codes in an upload, in GL code order.
+    
+    Keyset paginated on (gl_code, account_name). GL codes are compared with
+    the "C" collation so a prefix becomes an index range scan.
+    """
+    conditions = ["tbu.upload_id = %s"]
+    params = [data_type, upload_id]
+    if prefix:
+        conditions.append('ga.gl_code COLLATE "C" >= %s AND ga.gl_code COLLATE "C" < %s')
+        params.extend([prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)])
+    if search:
+        pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        conditions.append("(ga.gl_code ILIKE %s OR ga.account_name ILIKE %s)")
+        params.extend([pattern, pattern])
+    if cursor:
+        conditions.append('(ga.gl_code COLLATE "C", COALESCE(ga.account_name, \'\')) > (%s, %s)')
+        gl_code, account_name = decode_cursor(cursor, 2)
+        params.extend([cursor_value(gl_code) or '', cursor_value(account_name) or ''])
+
     conn = get_db_connection()
     try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            query = """
-            SELECT DISTINCT gl_code, account_name
-            FROM trial_balance_data 
-            WHERE upload_id = %s
-            AND data_type = %s
-            ORDER BY gl_code
+        with conn.cursor(cursor_factory=RealDictCursor) as db_cursor:
+            # One gl_accounts row per code, so no DISTINCT over the amount rows
+            query = f"""
+            SELECT ga.gl_code COLLATE "C" as gl_code, COALESCE(ga.account_name, '') as account_name
+            FROM trial_balance_uploads tbu
+            JOIN gl_accounts ga ON ga.company = COALESCE(tbu.company, '')
+            AND EXISTS (
+                SELECT 1 FROM trial_balance_facts tbf
+                WHERE tbf.upload_key = tbu.upload_key
+                AND tbf.data_type = %s
+                AND tbf.account_id = ga.account_id
+            )
+            WHERE {' AND '.join(conditions)}
+            ORDER BY 1, 2
+            LIMIT %s
             """
-            cursor.execute(query, (upload_id, data_type))
-            return cursor.fetchall()
+            db_cursor.execute(query, params + [limit + 1])
+            results = db_cursor.fetchall()
+            
+            has_more = len(results) > limit
+            results = results[:limit]
+            last = results[-1] if results else None
+            return {
+                'gl_codes': results,
+                'next_cursor': encode_cursor([last['gl_code'], last['account_name']]) if has_more else None
+            }
     except Exception as e:
         raise Exception(f"Failed to get GL codes: {str(e)}")
     finally:
         conn.close()
 
+@timed_query
 def get_existing_gl_mappings(report_type):
     """Get existing GL code mappings (what's already mapped)"""
     conn = get_db_connection()
@@ -229,6 +649,297 @@ def get_existing_gl_mappings(report_type):
     finally:
         conn.close()
         
+@timed_query
+def get_gl_mappings_for_codes(report_type, gl_codes):
+    """Get {gl_code: (line_id, sign_multiplier)} for the given codes of a report type"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            query = """
+            SELECT gl_code, line_id, sign_multiplier
+            FROM gl_report_mapping
+            WHERE report_type = %s
+            AND gl_code = ANY(%s::text[])
+            """
+            cursor.execute(query, (report_type, list(gl_codes)))
+            return {gl_code: (line_id, float(sign)) for gl_code, line_id, sign in cursor.fetchall()}
+    except Exception as e:
+        raise Exception(f"Failed to get GL mappings: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def get_gl_amounts_for_codes(gl_codes, company=None, start_date=None, end_date=None):
+    """Get (company, gl_code, data_type, period_end_date, amount) totals for a set of GL codes"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            query = """
+            SELECT 
+                tbu.company,
+                tbd.gl_code,
+                tbd.data_type,
+                tbd.period_end_date,
+                SUM(tbd.amount) as amount
+            FROM trial_balance_data tbd
+            JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
+            WHERE tbd.gl_code = ANY(%s::text[])
+            AND (%s::text IS NULL OR tbu.company = %s::text)
+            AND (%s::date IS NULL OR tbd.period_end_date >= %s::date)
+            AND (%s::date IS NULL OR tbd.period_end_date <= %s::date)
+            GROUP BY tbu.company, tbd.gl_code, tbd.data_type, tbd.period_end_date
+            """
+            cursor.execute(query, (
+                list(gl_codes), company, company,
+                start_date, start_date, end_date, end_date
+            ))
+            return [
+                (row_company, gl_code, data_type, period_end_date, float(amount or 0))
+                for row_company, gl_code, data_type, period_end_date, amount in cursor.fetchall()
+            ]
+    except Exception as e:
+        raise Exception(f"Failed to get GL amounts: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def get_mapping_rules(report_type=None):
+    """Get range / prefix mapping rules, optionally for one report type"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            query = """
+            SELECT rule_id, report_type, rule_type, gl_from, gl_to, line_id, sign_multiplier, priority, created_at
+            FROM gl_mapping_rules
+            WHERE %s IS NULL OR report_type = %s
+            ORDER BY report_type, gl_from, rule_id
+            """
+            cursor.execute(query, (report_type, report_type))
+            results = cursor.fetchall()
+            for row in results:
+                row['sign_multiplier'] = float(row['sign_multiplier'])
+            return results
+    except Exception as e:
+        raise Exception(f"Failed to get mapping rules: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def save_mapping_rule(report_type, rule_type, gl_from, gl_to, line_id, sign_multiplier, priority=0):
+    """Save a range / prefix mapping rule and return its rule_id"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            query = """
+            INSERT INTO gl_mapping_rules (report_type, rule_type, gl_from, gl_to, line_id, sign_multiplier, priority)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            RETURNING rule_id
+            """
+            cursor.execute(query, (report_type, rule_type, gl_from, gl_to, line_id, sign_multiplier, priority))
+            rule_id = cursor.fetchone()[0]
+            bump_mapping_version(cursor)
+            conn.commit()
+        return rule_id
+    except Exception as e:
+        conn.rollback()
+        raise Exception(f"Failed to save mapping rule: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def delete_mapping_rule(rule_id):
+    """Delete a mapping rule (its materialized rows go with it) and return its report type"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM gl_mapping_rules WHERE rule_id = %s RETURNING report_type", (rule_id,))
+            result = cursor.fetchone()
+            if not result:
+                raise Exception(f"Mapping rule {rule_id} not found")
+            bump_data_version(cursor)
+            bump_mapping_version(cursor)
+            conn.commit()
+        return result[0]
+    except Exception as e:
+        conn.rollback()
+        raise Exception(f"Failed to delete mapping rule: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def get_rule_candidate_gl_codes(report_type, gl_codes=None):
+    """Get uploaded GL codes with no explicit mapping for a report type (rules may map them)"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            query = """
+            SELECT DISTINCT tbd.gl_code
+            FROM trial_balance_data tbd
+            WHERE (%s::text[] IS NULL OR tbd.gl_code = ANY(%s::text[]))
+            AND NOT EXISTS (
+                SELECT 1 FROM gl_report_mapping grm
+                WHERE grm.gl_code = tbd.gl_code
+                AND grm.report_type = %s
+                AND grm.rule_id IS NULL
+            )
+            ORDER BY tbd.gl_code
+            """
+            codes = list(gl_codes) if gl_codes is not None else None
+            cursor.execute(query, (codes, codes, report_type))
+            return [row[0] for row in cursor.fetchall()]
+    except Exception as e:
+        raise Exception(f"Failed to get rule candidate GL codes: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def replace_rule_mappings(report_type, rows, gl_codes=None):
+    """Replace the rule-materialized rows of a report type (only for gl_codes when given).
+    
+    rows are (gl_code, report_type, line_id, sign_multiplier, rule_id) tuples;
+    explicit mappings are never overwritten. Only rows that differ from the
+    stored ones are written, and versions / caches are only bumped when
+    something changed - uploads call this for every code they contain.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            codes = list(gl_codes) if gl_codes is not None else None
+            cursor.execute("""
+                SELECT gl_code, line_id, sign_multiplier, rule_id
+                FROM gl_report_mapping
+                WHERE report_type = %s
+                AND rule_id IS NOT NULL
+                AND (%s::text[] IS NULL OR gl_code = ANY(%s::text[]))
+            """, (report_type, codes, codes))
+            existing = {
+                gl_code: (line_id, float(sign), rule_id)
+                for gl_code, line_id, sign, rule_id in cursor.fetchall()
+            }
+            wanted = {
+                gl_code: (line_id, float(sign), rule_id)
+                for gl_code, _, line_id, sign, rule_id in rows
+            }
+            stale = [gl_code for gl_code, mapping in existing.items() if wanted.get(gl_code) != mapping]
+            new_rows = [
+                (gl_code, report_type, line_id, sign, rule_id)
+                for gl_code, (line_id, sign, rule_id) in wanted.items()
+                if existing.get(gl_code) != (line_id, sign, rule_id)
+            ]
+            
+            changed = 0
+            if stale:
+                cursor.execute("""
+                    DELETE FROM gl_report_mapping
+                    WHERE report_type = %s
+                    AND rule_id IS NOT NULL
+                    AND gl_code = ANY(%s::text[])
+                """, (report_type, stale))
+                changed += cursor.rowcount
+            if new_rows:
+                inserted = execute_values(cursor, """
+                    INSERT INTO gl_report_mapping (gl_code, report_type, line_id, sign_multiplier, rule_id)
+                    VALUES %s
+                    ON CONFLICT (gl_code, report_type) DO NOTHING
+                    RETURNING gl_code
+                """, new_rows, page_size=1000, fetch=True)
+                changed += len(inserted)
+            
+            if not changed:
+                conn.rollback()
+                return len(rows)
+            bump_data_version(cursor)
+            bump_mapping_version(cursor)
+            conn.commit()
+        
+        from services.analytics_service import invalidate_snapshots
+        from services.mapping_index import invalidate_mapping_index
+        invalidate_snapshots()
+        invalidate_mapping_index()
+        return len(rows)
+    except Exception as e:
+        conn.rollback()
+        raise Exception(f"Failed to save rule mappings: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def get_unmapped_gl_codes(upload_id, report_type=None):
+    """Get GL codes in an upload with no mapping, with their totals per data type.
+    
+    With a report_type, codes unmapped for that report; without one, codes
+    unmapped in every report type (they vanish from all reports).
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            query = """
+            SELECT 
+                tbd.gl_code,
+                MAX(tbd.account_name) as account_name,
+                COALESCE(SUM(tbd.amount) FILTER (WHERE tbd.data_type = 'actual'), 0) as actual,
+                COALESCE(SUM(tbd.amount) FILTER (WHERE tbd.data_type = 'budget'), 0) as budget,
+                COALESCE(SUM(tbd.amount) FILTER (WHERE tbd.data_type = 'prior_year'), 0) as prior_year
+            FROM trial_balance_data tbd
+            WHERE tbd.upload_id = %s
+            AND NOT EXISTS (
+                SELECT 1 FROM gl_report_mapping grm
+                WHERE grm.gl_code = tbd.gl_code
+                AND (%s::text IS NULL OR grm.report_type = %s::text)
+            )
+            GROUP BY tbd.gl_code
+            ORDER BY tbd.gl_code
+            """
+            cursor.execute(query, (upload_id, report_type, report_type))
+            results = cursor.fetchall()
+            for row in results:
+                for column in ['actual', 'budget', 'prior_year']:
+                    row[column] = float(row[column])
+            return results
+    except Exception as e:
+        raise Exception(f"Failed to get unmapped GL codes: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def get_orphaned_gl_mappings(upload_id, report_type=None):
+    """Get mappings used by an upload whose line_id is missing from report_line_definitions"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            query = """
+            SELECT 
+                grm.report_type,
+                grm.line_id,
+                tbd.gl_code,
+                MAX(tbd.account_name) as account_name,
+                COALESCE(SUM(tbd.amount) FILTER (WHERE tbd.data_type = 'actual'), 0) as actual,
+                COALESCE(SUM(tbd.amount) FILTER (WHERE tbd.data_type = 'budget'), 0) as budget,
+                COALESCE(SUM(tbd.amount) FILTER (WHERE tbd.data_type = 'prior_year'), 0) as prior_year
+            FROM trial_balance_data tbd
+            JOIN gl_report_mapping grm ON grm.gl_code = tbd.gl_code
+            WHERE tbd.upload_id = %s
+            AND (%s::text IS NULL OR grm.report_type = %s::text)
+            AND NOT EXISTS (
+                SELECT 1 FROM report_line_definitions rld
+                WHERE rld.report_type = grm.report_type
+                AND rld.line_id = grm.line_id
+            )
+            GROUP BY grm.report_type, grm.line_id, tbd.gl_code
+            ORDER BY grm.report_type, grm.line_id, tbd.gl_code
+            """
+            cursor.execute(query, (upload_id, report_type, report_type))
+            results = cursor.fetchall()
+            for row in results:
+                for column in ['actual', 'budget', 'prior_year']:
+                    row[column] = float(row[column])
+            return results
+    except Exception as e:
+        raise Exception(f"Failed to get orphaned mappings: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
 def get_available_report_lines(report_type):
     """Get available report lines for dropdown options"""
     conn = get_db_connection()
@@ -247,78 +958,145 @@ def get_available_report_lines(report_type):
     finally:
         conn.close()
 
+def get_locked_mapping(cursor, gl_code, report_type):
+    """(line_id, sign_multiplier) stored for a code, or None, locked for the caller's transaction"""
+    cursor.execute("""
+        SELECT line_id, sign_multiplier FROM gl_report_mapping
+        WHERE gl_code = %s AND report_type = %s
+        FOR UPDATE
+    """, (gl_code, report_type))
+    row = cursor.fetchone()
+    return (row[0], float(row[1])) if row else None
+
+@timed_query
 def save_gl_mapping(gl_code, report_type, line_id, sign_multiplier):
     """Save or update a GL mapping"""
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
+            # Holding the version row makes this the only write between the two versions
+            previous_versions = lock_data_versions(cursor)
+            old = get_locked_mapping(cursor, gl_code, report_type)
             query = """
-            INSERT INTO gl_report_mapping (gl_code, report_type, line_id, sign_multiplier)
-            VALUES (%s, %s, %s, %s)
+            INSERT INTO gl_report_mapping (gl_code, report_type, line_id, sign_multiplier, rule_id)
+            VALUES (%s, %s, %s, %s, NULL)
             ON CONFLICT (gl_code, report_type) 
             DO UPDATE SET 
                 line_id = EXCLUDED.line_id,
-                sign_multiplier = EXCLUDED.sign_multiplier
+                sign_multiplier = EXCLUDED.sign_multiplier,
+                rule_id = NULL
             """
             cursor.execute(query, (gl_code, report_type, line_id, sign_multiplier))
+            bump_data_version(cursor)
+            bump_mapping_version(cursor)
             conn.commit()
-            return True
+        
+        from services.analytics_service import apply_mapping_deltas
+        from services.mapping_index import invalidate_mapping_index
+        apply_mapping_deltas(
+            report_type, [(gl_code, old, (line_id, float(sign_multiplier)))],
+            previous_versions, (previous_versions[0] + 1, previous_versions[1] + 1)
+        )
+        invalidate_mapping_index()
+        return True
     except Exception as e:
         conn.rollback()
         raise Exception(f"Failed to save mapping: {str(e)}")
     finally:
         conn.close()
 
+@timed_query
 def delete_gl_mapping(gl_code, report_type):
-    """Delete a GL mapping"""
+    """Delete a GL mapping, falling back to the range / prefix rule covering the code"""
+    from services.mapping_rules import load_rule_index
+    fallback = load_rule_index(report_type).resolve(gl_code)
+
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
+            previous_versions = lock_data_versions(cursor)
+            old = get_locked_mapping(cursor, gl_code, report_type)
             query = "DELETE FROM gl_report_mapping WHERE gl_code = %s AND report_type = %s"
             cursor.execute(query, (gl_code, report_type))
+            if fallback:
+                # Materialize the rule row in the same transaction (uploaded codes only, as
+                # materialize_rule_mappings does)
+                cursor.execute("""
+                    INSERT INTO gl_report_mapping (gl_code, report_type, line_id, sign_multiplier, rule_id)
+                    SELECT %s, %s, %s, %s, %s
+                    WHERE EXISTS (SELECT 1 FROM trial_balance_data WHERE gl_code = %s)
+                    ON CONFLICT (gl_code, report_type) DO NOTHING
+                """, (gl_code, report_type, fallback[0], fallback[1], fallback[2], gl_code))
+            bump_data_version(cursor)
+            bump_mapping_version(cursor)
             conn.commit()
-            return True
+        
+        from services.analytics_service import apply_mapping_deltas
+        from services.mapping_index import invalidate_mapping_index
+        apply_mapping_deltas(
+            report_type, [(gl_code, old, fallback[:2] if fallback else None)],
+            previous_versions, (previous_versions[0] + 1, previous_versions[1] + 1)
+        )
+        invalidate_mapping_index()
+        return True
     except Exception as e:
         conn.rollback()
         raise Exception(f"Failed to delete mapping: {str(e)}")
     finally:
         conn.close()
 
+@timed_query
 def delete_tb_by_company_period(company, period):
-    """Delete a trial balance by company and period"""
+    """Delete a trial balance by company and period, returning its upload_id"""
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
             # First, find the upload_id
             query_find = """
-                SELECT upload_id 
-                FROM trial_balance_uploads 
+                SELECT upload_id, upload_key
+                FROM trial_balance_uploads
                 WHERE company = %s AND period_end_date = %s
             """
             cursor.execute(query_find, (company, period))
             result = cursor.fetchone()
-            
+
             if not result:
                 raise Exception(f"No trial balance found for {company} on {period}")
-            
-            upload_id = result[0]
-            
-            # Then delete from trial_balance_data using the upload_id
-            query_delete = "DELETE FROM trial_balance_data WHERE upload_id = %s"
-            cursor.execute(query_delete, (upload_id,))
+
+            upload_id, upload_key = result
+
+            # Periods the upload covered - their fiscal years' YTD balances change
+            cursor.execute("""
+                SELECT DISTINCT cp.period_end_date
+                FROM trial_balance_facts tbf
+                JOIN calendar_periods cp ON tbf.period_key = cp.period_key
+                WHERE tbf.upload_key = %s
+            """, (upload_key,))
+            period_dates = [row[0] for row in cursor.fetchall()]
+
+            # Then delete the upload's facts (GL accounts are kept so their keys stay stable)
+            query_delete = "DELETE FROM trial_balance_facts WHERE upload_key = %s"
+            cursor.execute(query_delete, (upload_key,))
             
             # Optionally, also delete from trial_balance_uploads
             query_delete_upload = "DELETE FROM trial_balance_uploads WHERE upload_id = %s"
             cursor.execute(query_delete_upload, (upload_id,))
             
+            from services.ytd_balances import maintain_ytd_balances
+            maintain_ytd_balances(cursor, company, period_dates)
+            bump_data_version(cursor)
             conn.commit()
-            return True
+        
+        from services.analytics_service import invalidate_snapshots
+        invalidate_snapshots(company)
+        return upload_id
     except Exception as e:
         conn.rollback()
         raise Exception(f"Failed to delete trial balance: {str(e)}")
     finally:
         conn.close()
 
+@timed_query
 def get_available_periods(company):
     """Get list of available reporting periods for a specific company - ACTUAL data only"""
     conn = get_db_connection()
@@ -344,6 +1122,7 @@ def get_available_periods(company):
     finally:
         conn.close()
 
+@timed_query
 def get_available_periods_delete(company):
     """Get list of available reporting periods for a specific company - ACTUAL data only"""
     conn = get_db_connection()
@@ -364,6 +1143,7 @@ def get_available_periods_delete(company):
     finally:
         conn.close()
 
+@timed_query
 def get_available_companies():
     """Get list of available companies"""
     conn = get_db_connection()
@@ -439,150 +1219,151 @@ def get_available_companies():
 #         raise Exception(f"Failed to get report data: {str(e)}")
 #     finally:
 #         conn.close()
+@timed_query
 def get_report_data(report_type, period_end_date, company):
     """Get complete report data with all columns for either P&L or Balance Sheet"""
-    conn = get_db_connection()
+    from services.analytics_service import analytics_enabled
+    if analytics_enabled():
+        from services.analytics_service import get_report_data as get_analytics_report_data
+        return get_analytics_report_data(report_type, period_end_date, company)
+    
+    from services.parallel_report_service import parallel_reports_enabled
+    if parallel_reports_enabled():
+        from services.parallel_report_service import get_report_data_parallel
+        return get_report_data_parallel(report_type, period_end_date, company)
+    
+    if report_type == 'balance_sheet':
+        return get_balance_sheet_data(period_end_date, company)
+    
+    from services.ytd_balances import ytd_balances_enabled, ytd_balances_ready
+    
+    with span('connection'):
+        conn = get_db_connection()
     try:
+        use_ytd_balances = False
+        if report_type == 'profit_loss' and ytd_balances_enabled():
+            with span('ytd_balances'):
+                use_ytd_balances = ytd_balances_ready(conn, company)
+        
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            if report_type == 'profit_loss':
-                # P&L specific query - using data_type fields directly
+            if use_ytd_balances:
+                # Month columns scan two months of facts; YTD columns read one
+                # running balance row per account (trial_balance_ytd)
                 query = """
+                WITH month_amounts AS (
+                    SELECT 
+                        grm.line_id,
+                        SUM(CASE WHEN tbf.data_type = 'actual' 
+                            AND tbf.period_key BETWEEN %(month_from)s AND %(month_to)s
+                            THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as actual,
+                        SUM(CASE WHEN tbf.data_type = 'budget' 
+                            AND tbf.period_key BETWEEN %(month_from)s AND %(month_to)s
+                            THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as budget,
+                        SUM(CASE WHEN tbf.data_type = 'prior_year' 
+                            AND tbf.period_key BETWEEN %(prior_year_from)s AND %(prior_year_to)s
+                            THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as prior_year,
+                        0 as ytd_actual,
+                        0 as ytd_budget,
+                        0 as prior_ytd
+                    FROM trial_balance_facts tbf
+                    JOIN trial_balance_uploads tbu ON tbf.upload_key = tbu.upload_key
+                    JOIN gl_accounts ga ON tbf.account_id = ga.account_id
+                    JOIN gl_report_mapping grm ON ga.gl_code = grm.gl_code
+                    WHERE tbu.company = %(company)s
+                    AND grm.report_type = %(report_type)s
+                    AND (tbf.period_key BETWEEN %(month_from)s AND %(month_to)s
+                         OR tbf.period_key BETWEEN %(prior_year_from)s AND %(prior_year_to)s)
+                    GROUP BY grm.line_id
+                ),
+                ytd_amounts AS (
+                    SELECT 
+                        grm.line_id,
+                        0 as actual,
+                        0 as budget,
+                        0 as prior_year,
+                        SUM(CASE WHEN ty.data_type = 'actual' AND ty.month_key = %(month)s
+                            THEN ty.ytd_amount * grm.sign_multiplier ELSE 0 END) as ytd_actual,
+                        SUM(CASE WHEN ty.data_type = 'budget' AND ty.month_key = %(month)s
+                            THEN ty.ytd_amount * grm.sign_multiplier ELSE 0 END) as ytd_budget,
+                        SUM(CASE WHEN ty.data_type = 'prior_year' AND ty.month_key = %(prior_year_month)s
+                            THEN ty.ytd_amount * grm.sign_multiplier ELSE 0 END) as prior_ytd
+                    FROM trial_balance_ytd ty
+                    JOIN gl_accounts ga ON ty.account_id = ga.account_id
+                    JOIN gl_report_mapping grm ON ga.gl_code = grm.gl_code
+                    WHERE ga.company = %(company)s
+                    AND grm.report_type = %(report_type)s
+                    AND ((ty.data_type IN ('actual', 'budget') AND ty.month_key = %(month)s)
+                         OR (ty.data_type = 'prior_year' AND ty.month_key = %(prior_year_month)s))
+                    GROUP BY grm.line_id
+                )
                 SELECT 
-                    grm.line_id,
-                    -- Current period actual
-                    SUM(CASE WHEN tbd.data_type = 'actual' 
-                        AND DATE_TRUNC('month', tbd.period_end_date) = DATE_TRUNC('month', %s::date)
-                        AND EXTRACT(YEAR FROM tbd.period_end_date) = EXTRACT(YEAR FROM %s::date)
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as actual,
-                    -- Current period budget
-                    SUM(CASE WHEN tbd.data_type = 'budget' 
-                        AND DATE_TRUNC('month', tbd.period_end_date) = DATE_TRUNC('month', %s::date)
-                        AND EXTRACT(YEAR FROM tbd.period_end_date) = EXTRACT(YEAR FROM %s::date)
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as budget,
-                    -- Prior year from database (looking for 2024 dates)
-                    SUM(CASE WHEN tbd.data_type = 'prior_year' 
-                        AND DATE_TRUNC('month', tbd.period_end_date) = DATE_TRUNC('month', %s::date - INTERVAL '1 year')
-                        AND EXTRACT(YEAR FROM tbd.period_end_date) = EXTRACT(YEAR FROM %s::date) - 1
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as prior_year,
-                    -- YTD Actual
-                    SUM(CASE WHEN tbd.data_type = 'actual' 
-                        AND EXTRACT(YEAR FROM tbd.period_end_date) = EXTRACT(YEAR FROM %s::date)
-                        AND tbd.period_end_date <= %s::date
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as ytd_actual,
-                    -- YTD Budget
-                    SUM(CASE WHEN tbd.data_type = 'budget' 
-                        AND EXTRACT(YEAR FROM tbd.period_end_date) = EXTRACT(YEAR FROM %s::date)
-                        AND tbd.period_end_date <= %s::date
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as ytd_budget,
-                    -- Prior Year YTD from database (looking for 2024 dates)
-                    SUM(CASE WHEN tbd.data_type = 'prior_year' 
-                        AND EXTRACT(YEAR FROM tbd.period_end_date) = EXTRACT(YEAR FROM %s::date) - 1
-                        AND tbd.period_end_date <= %s::date - INTERVAL '1 year'
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as prior_ytd
-                FROM trial_balance_data tbd
-                JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
-                JOIN gl_report_mapping grm ON tbd.gl_code = grm.gl_code
-                WHERE tbu.company = %s
-                AND grm.report_type = %s
-                GROUP BY grm.line_id
+                    line_id,
+                    SUM(actual) as actual,
+                    SUM(budget) as budget,
+                    SUM(prior_year) as prior_year,
+                    SUM(ytd_actual) as ytd_actual,
+                    SUM(ytd_budget) as ytd_budget,
+                    SUM(prior_ytd) as prior_ytd
+                FROM (
+                    SELECT * FROM month_amounts
+                    UNION ALL
+                    SELECT * FROM ytd_amounts
+                ) amounts
+                GROUP BY line_id
                 """
-                cursor.execute(query, (
-                    period_end_date, period_end_date,  # actual
-                    period_end_date, period_end_date,  # budget
-                    period_end_date, period_end_date,  # prior_year (from data_type='prior_year')
-                    period_end_date, period_end_date,  # ytd_actual
-                    period_end_date, period_end_date,  # ytd_budget
-                    period_end_date, period_end_date,  # prior_ytd (from data_type='prior_year')
-                    company, report_type
-                ))
-                
-            elif report_type == 'balance_sheet':
-                # Balance Sheet query - no YTD needed, just point-in-time balances
+                query_params = dict(report_period_keys(period_end_date), company=company, report_type=report_type)
+                with span('query'):
+                    cursor.execute(query, query_params)
+            
+            elif report_type == 'profit_loss':
+                # P&L specific query - months and fiscal YTD are integer period_key ranges
                 query = """
                 SELECT 
                     grm.line_id,
                     -- Current period actual
-                    SUM(CASE WHEN tbd.data_type = 'actual' 
-                        AND tbd.period_end_date = %s::date 
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as actual,
+                    SUM(CASE WHEN tbf.data_type = 'actual' 
+                        AND tbf.period_key BETWEEN %(month_from)s AND %(month_to)s
+                        THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as actual,
                     -- Current period budget
-                    SUM(CASE WHEN tbd.data_type = 'budget' 
-                        AND tbd.period_end_date = %s::date 
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as budget,
-                    -- Prior year same period
-                    SUM(CASE WHEN tbd.data_type = 'actual' 
-                        AND tbd.period_end_date = %s::date - INTERVAL '1 year'
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as prior_year,
-                    -- Prior month actual (useful for balance sheet movements)
-                    SUM(CASE WHEN tbd.data_type = 'actual' 
-                        AND tbd.period_end_date = %s::date - INTERVAL '1 month'
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as prior_month
-                FROM trial_balance_data tbd
-                JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
-                JOIN gl_report_mapping grm ON tbd.gl_code = grm.gl_code
-                WHERE tbu.company = %s
-                AND grm.report_type = %s
+                    SUM(CASE WHEN tbf.data_type = 'budget' 
+                        AND tbf.period_key BETWEEN %(month_from)s AND %(month_to)s
+                        THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as budget,
+                    -- Same month last year, from the prior_year data_type
+                    SUM(CASE WHEN tbf.data_type = 'prior_year' 
+                        AND tbf.period_key BETWEEN %(prior_year_from)s AND %(prior_year_to)s
+                        THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as prior_year,
+                    -- YTD Actual (fiscal year start to the end of the period month)
+                    SUM(CASE WHEN tbf.data_type = 'actual' 
+                        AND tbf.period_key BETWEEN %(ytd_from)s AND %(ytd_to)s
+                        THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as ytd_actual,
+                    -- YTD Budget
+                    SUM(CASE WHEN tbf.data_type = 'budget' 
+                        AND tbf.period_key BETWEEN %(ytd_from)s AND %(ytd_to)s
+                        THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as ytd_budget,
+                    -- Prior Year YTD, from the prior_year data_type
+                    SUM(CASE WHEN tbf.data_type = 'prior_year' 
+                        AND tbf.period_key BETWEEN %(prior_ytd_from)s AND %(prior_ytd_to)s
+                        THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as prior_ytd
+                FROM trial_balance_facts tbf
+                JOIN trial_balance_uploads tbu ON tbf.upload_key = tbu.upload_key
+                JOIN gl_accounts ga ON tbf.account_id = ga.account_id
+                JOIN gl_report_mapping grm ON ga.gl_code = grm.gl_code
+                WHERE tbu.company = %(company)s
+                AND grm.report_type = %(report_type)s
+                AND tbf.period_key BETWEEN %(prior_ytd_from)s AND %(month_to)s
                 GROUP BY grm.line_id
                 """
-                cursor.execute(query, (
-                    period_end_date, period_end_date, period_end_date, period_end_date,
-                    company, report_type
-                ))
-                
-                results = cursor.fetchall()
-                
-                # Add P&L profit to reserves for Balance Sheet
-                pl_query = """
-                SELECT 
-                    -- Current period actual profit
-                    SUM(CASE WHEN tbd.data_type = 'actual' 
-                        AND tbd.period_end_date = %s::date 
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as actual_profit,
-                    -- Current period budget profit
-                    SUM(CASE WHEN tbd.data_type = 'budget' 
-                        AND tbd.period_end_date = %s::date 
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as budget_profit,
-                    -- Prior year profit
-                    SUM(CASE WHEN tbd.data_type = 'actual' 
-                        AND tbd.period_end_date = %s::date - INTERVAL '1 year'
-                        THEN tbd.amount * grm.sign_multiplier ELSE 0 END) as prior_year_profit
-                FROM trial_balance_data tbd
-                JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
-                JOIN gl_report_mapping grm ON tbd.gl_code = grm.gl_code
-                WHERE tbu.company = %s
-                AND grm.report_type = 'profit_loss'
-                """
-                cursor.execute(pl_query, (period_end_date, period_end_date, period_end_date, company))
-                profit_result = cursor.fetchone()
-                
-                # Convert results to a dictionary for easier manipulation
-                data_dict = {row['line_id']: row for row in results}
-                
-                # Add profit to reserves (assuming reserves is line_id 2600)
-                reserves_line_id = 2600
-                if reserves_line_id not in data_dict:
-                    data_dict[reserves_line_id] = {
-                        'line_id': reserves_line_id,
-                        'actual': 0,
-                        'budget': 0,
-                        'prior_year': 0,
-                        'prior_month': 0
-                    }
-                
-                # Add profits to reserves
-                if profit_result:
-                    data_dict[reserves_line_id]['actual'] += float(profit_result['actual_profit'] or 0)
-                    data_dict[reserves_line_id]['budget'] += float(profit_result['budget_profit'] or 0)
-                    data_dict[reserves_line_id]['prior_year'] += float(profit_result['prior_year_profit'] or 0)
+                query_params = dict(report_period_keys(period_end_date), company=company, report_type=report_type)
+                with span('query'):
+                    cursor.execute(query, query_params)
                 
-                return list(data_dict.values())
-            
             else:
                 raise ValueError(f"Unknown report type: {report_type}")
             
             # Convert the list of rows to a dictionary format
             # This creates separate dictionaries for each data type
-            results = cursor.fetchall()
+            with span('fetch'):
+                results = cursor.fetchall()
             
             # Return format that matches the original expectation
             data = {
@@ -599,13 +1380,9 @@ def get_report_data(report_type, period_end_date, company):
                 data['actual'][line_id] = float(row['actual'] or 0)
                 data['budget'][line_id] = float(row['budget'] or 0)
                 data['prior_year'][line_id] = float(row['prior_year'] or 0)
-                if report_type == 'profit_loss':
-                    data['ytd_actual'][line_id] = float(row['ytd_actual'] or 0)
-                    data['ytd_budget'][line_id] = float(row['ytd_budget'] or 0)
-                    data['prior_ytd'][line_id] = float(row['prior_ytd'] or 0)
-                elif report_type == 'balance_sheet':
-                    data['prior_month'] = data.get('prior_month', {})
-                    data['prior_month'][line_id] = float(row.get('prior_month', 0) or 0)
+                data['ytd_actual'][line_id] = float(row['ytd_actual'] or 0)
+                data['ytd_budget'][line_id] = float(row['ytd_budget'] or 0)
+                data['prior_ytd'][line_id] = float(row['prior_ytd'] or 0)
             
             return data
                   
@@ -614,36 +1391,308 @@ def get_report_data(report_type, period_end_date, company):
     finally:
         conn.close()
 
+# Reserves line on the balance sheet template that current period profit rolls into
+RESERVES_LINE_ID = 'reserves'
+
+BALANCE_SHEET_COLUMNS = ['actual', 'budget', 'prior_year', 'prior_month']
+
+@timed_query
+def get_balance_sheet_data(period_end_date, company):
+    """Get Balance Sheet data for a company in a single round trip.
+    
+    BS lines and the P&L profit that rolls into reserves are aggregated in one
+    scan using GROUPING SETS: the (report_type, line_id) set gives the BS lines
+    and the (report_type) set gives the P&L total. Returns a dictionary per
+    column, each keyed by line_id.
+    """
+    with span('connection'):
+        conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            query = """
+            WITH line_totals AS (
+                SELECT 
+                    grm.report_type,
+                    grm.line_id,
+                    GROUPING(grm.line_id) AS is_report_total,
+                    -- Current period actual
+                    SUM(CASE WHEN tbf.data_type = 'actual' 
+                        AND tbf.period_key BETWEEN %(month_from)s AND %(month_to)s
+                        THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as actual,
+                    -- Current period budget
+                    SUM(CASE WHEN tbf.data_type = 'budget' 
+                        AND tbf.period_key BETWEEN %(month_from)s AND %(month_to)s
+                        THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as budget,
+                    -- Prior year same period
+                    SUM(CASE WHEN tbf.data_type = 'actual' 
+                        AND tbf.period_key BETWEEN %(prior_year_from)s AND %(prior_year_to)s
+                        THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as prior_year,
+                    -- Prior month actual (useful for balance sheet movements)
+                    SUM(CASE WHEN tbf.data_type = 'actual' 
+                        AND tbf.period_key BETWEEN %(prior_month_from)s AND %(prior_month_to)s
+                        THEN tbf.amount * grm.sign_multiplier ELSE 0 END) as prior_month
+                FROM trial_balance_facts tbf
+                JOIN trial_balance_uploads tbu ON tbf.upload_key = tbu.upload_key
+                JOIN gl_accounts ga ON tbf.account_id = ga.account_id
+                JOIN gl_report_mapping grm ON ga.gl_code = grm.gl_code
+                WHERE tbu.company = %(company)s
+                AND grm.report_type IN ('balance_sheet', 'profit_loss')
+                AND tbf.period_key BETWEEN %(prior_year_from)s AND %(period)s
+                GROUP BY GROUPING SETS ((grm.report_type, grm.line_id), (grm.report_type))
+            )
+            SELECT report_type, line_id, actual, budget, prior_year, prior_month
+            FROM line_totals
+            WHERE (report_type = 'balance_sheet' AND is_report_total = 0)
+            OR (report_type = 'profit_loss' AND is_report_total = 1)
+            """
+            with span('query'):
+                cursor.execute(query, dict(report_period_keys(period_end_date), company=company))
+            with span('fetch'):
+                results = cursor.fetchall()
+            
+            data = {column: {} for column in BALANCE_SHEET_COLUMNS}
+            profit = None
+            
+            for row in results:
+                if row['report_type'] == 'profit_loss':
+                    profit = row
+                    continue
+                for column in BALANCE_SHEET_COLUMNS:
+                    data[column][row['line_id']] = float(row[column] or 0)
+            
+            # Add P&L profit to reserves for Balance Sheet
+            if profit:
+                for column in BALANCE_SHEET_COLUMNS:
+                    data[column][RESERVES_LINE_ID] = (
+                        data[column].get(RESERVES_LINE_ID, 0) + float(profit[column] or 0)
+                    )
+            
+            return data
+                  
+    except Exception as e:
+        raise Exception(f"Failed to get balance sheet data: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def get_report_line_amounts(company, report_types, start_date, end_date):
+    """Get mapped amounts per (report_type, line_id, data_type, period) for a date range.
+    
+    Used by batch generation to fetch everything a set of reports needs for a
+    company in one aggregation and compute the report columns in Python.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            query = """
+            SELECT 
+                grm.report_type,
+                grm.line_id,
+                tbf.data_type,
+                cp.period_end_date,
+                SUM(tbf.amount * grm.sign_multiplier) as amount
+            FROM trial_balance_facts tbf
+            JOIN trial_balance_uploads tbu ON tbf.upload_key = tbu.upload_key
+            JOIN gl_accounts ga ON tbf.account_id = ga.account_id
+            JOIN calendar_periods cp ON tbf.period_key = cp.period_key
+            JOIN gl_report_mapping grm ON ga.gl_code = grm.gl_code
+            WHERE tbu.company = %s
+            AND grm.report_type = ANY(%s)
+            AND tbf.period_key BETWEEN %s AND %s
+            GROUP BY grm.report_type, grm.line_id, tbf.data_type, cp.period_end_date
+            """
+            cursor.execute(query, (company, list(report_types), period_key(start_date), period_key(end_date)))
+            return [
+                (report_type, line_id, data_type, period_end_date, float(amount or 0))
+                for report_type, line_id, data_type, period_end_date, amount in cursor.fetchall()
+            ]
+    except Exception as e:
+        raise Exception(f"Failed to get report line amounts: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
+def get_gl_period_amounts(company, start_date, end_date):
+    """Get unmapped amounts per (gl_code, data_type, period) for a date range.
+    
+    The GL to report line mapping is applied in Python by the in-process
+    mapping index, so this query skips the join to gl_report_mapping.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            query = """
+            SELECT
+                ga.gl_code,
+                tbf.data_type,
+                cp.period_end_date,
+                SUM(tbf.amount) as amount
+            FROM trial_balance_facts tbf
+            JOIN trial_balance_uploads tbu ON tbf.upload_key = tbu.upload_key
+            JOIN gl_accounts ga ON tbf.account_id = ga.account_id
+            JOIN calendar_periods cp ON tbf.period_key = cp.period_key
+            WHERE tbu.company = %s
+            AND tbf.period_key BETWEEN %s AND %s
+            GROUP BY ga.gl_code, tbf.data_type, cp.period_end_date
+            """
+            cursor.execute(query, (company, period_key(start_date), period_key(end_date)))
+            return cursor.fetchall()
+    except Exception as e:
+        raise Exception(f"Failed to get GL period amounts: {str(e)}")
+    finally:
+        conn.close()
+
+# Report output column names that differ from the get_report_data keys
+DRILLDOWN_COLUMN_ALIASES = {
+    'actual_ytd': 'ytd_actual',
+    'budget_ytd': 'ytd_budget',
+    'prior_year_ytd': 'prior_ytd'
+}
+
+def get_column_window(report_type, column, period_end_date):
+    """Get (data_type, start_date, end_date) that make up a report column.
+    
+    Used by the drill-down and by the parallel per-column report queries.
+    """
+    from services.period_utils import parse_period, shift_years, month_start, month_end
+    
+    period_date = parse_period(period_end_date)
+    prior_year_date = shift_years(period_date, -1)
+    column = DRILLDOWN_COLUMN_ALIASES.get(column, column)
+    
+    if report_type == 'profit_loss':
+        windows = {
+            'actual': ('actual', month_start(period_date), month_end(period_date)),
+            'budget': ('budget', month_start(period_date), month_end(period_date)),
+            'prior_year': ('prior_year', month_start(prior_year_date), month_end(prior_year_date)),
+            'ytd_actual': ('actual', fiscal_year_start(period_date), month_end(period_date)),
+            'ytd_budget': ('budget', fiscal_year_start(period_date), month_end(period_date)),
+            'prior_ytd': ('prior_year', fiscal_year_start(prior_year_date), month_end(prior_year_date))
+        }
+    elif report_type == 'balance_sheet':
+        windows = {
+            'actual': ('actual', month_start(period_date), period_date),
+            'budget': ('budget', month_start(period_date), period_date),
+            'prior_year': ('actual', month_start(prior_year_date), month_end(prior_year_date)),
+            'prior_month': ('actual', month_start(period_date, 1), month_end(month_start(period_date, 1)))
+        }
+    else:
+        raise ValueError(f"Unknown report type: {report_type}")
+    
+    if column not in windows:
+        raise ValueError(f"Unknown column for {report_type}: {column}")
+    return windows[column]
+
+@timed_query
+def get_line_drilldown(company, period_end_date, report_type, line_id, column, cursor=None, limit=100):
+    """Get the GL codes (with signed amounts) that make up one report line and column.
+    
+    Keyset paginated on (gl_code, report_type): pass a page's next_cursor to
+    get the next one. For the Balance Sheet reserves line the P&L GL codes that
+    roll into reserves are included too, so one GL code can appear twice
+    (its balance sheet and its P&L mapping).
+    """
+    data_type, start_date, end_date = get_column_window(report_type, column, period_end_date)
+    include_profit = report_type == 'balance_sheet' and line_id == RESERVES_LINE_ID
+    
+    conditions = [
+        "((grm.report_type = %s AND grm.line_id = %s) OR (%s AND grm.report_type = 'profit_loss'))",
+        "ga.company = %s"
+    ]
+    params = [report_type, line_id, include_profit, company]
+    if cursor:
+        conditions.append('(ga.gl_code COLLATE "C", grm.report_type) > (%s, %s)')
+        gl_code, cursor_report_type = decode_cursor(cursor, 2)
+        params.extend([cursor_value(gl_code) or '', cursor_value(cursor_report_type) or ''])
+    
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as db_cursor:
+            query = f"""
+            SELECT 
+                ga.gl_code COLLATE "C" as gl_code,
+                MAX(ga.account_name) as account_name,
+                grm.report_type,
+                grm.line_id,
+                grm.sign_multiplier,
+                SUM(tbf.amount * grm.sign_multiplier) as amount
+            FROM gl_report_mapping grm
+            JOIN gl_accounts ga ON ga.gl_code = grm.gl_code
+            JOIN trial_balance_facts tbf ON tbf.account_id = ga.account_id
+            WHERE {' AND '.join(conditions)}
+            AND tbf.data_type = %s
+            AND tbf.period_key BETWEEN %s AND %s
+            GROUP BY 1, grm.report_type, grm.line_id, grm.sign_multiplier
+            ORDER BY 1, grm.report_type
+            LIMIT %s
+            """
+            db_cursor.execute(query, params + [data_type, period_key(start_date), period_key(end_date), limit + 1])
+            results = db_cursor.fetchall()
+            
+            has_more = len(results) > limit
+            results = results[:limit]
+            for row in results:
+                row['amount'] = float(row['amount'] or 0)
+                row['sign_multiplier'] = float(row['sign_multiplier'])
+            last = results[-1] if results else None
+            
+            return {
+                'gl_codes': results,
+                'data_type': data_type,
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'next_cursor': encode_cursor([last['gl_code'], last['report_type']]) if has_more else None
+            }
+    except Exception as e:
+        raise Exception(f"Failed to get drill-down: {str(e)}")
+    finally:
+        conn.close()
+
+@timed_query
 def get_report_data_ytd(report_type, period_end_date, company, data_type='actual'):
     """Get year-to-date aggregated data for report generation"""
+    from services.ytd_balances import ytd_balances_enabled, ytd_balances_ready
+    
     conn = get_db_connection()
     try:
+        keys = report_period_keys(period_end_date)
+        if ytd_balances_enabled() and ytd_balances_ready(conn, company):
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                # One running balance row per account for the period's month
+                query = """
+                SELECT 
+                    grm.line_id,
+                    SUM(ty.ytd_amount * grm.sign_multiplier) as total_amount
+                FROM trial_balance_ytd ty
+                JOIN gl_accounts ga ON ty.account_id = ga.account_id
+                JOIN gl_report_mapping grm ON ga.gl_code = grm.gl_code
+                WHERE ty.month_key = %s
+                AND ga.company = %s
+                AND ty.data_type = %s
+                AND grm.report_type = %s
+                GROUP BY grm.line_id
+                """
+                cursor.execute(query, (keys['month'], company, data_type, report_type))
+                return {row['line_id']: float(row['total_amount']) for row in cursor.fetchall()}
+        
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            # Calculate start of year from period_end_date
-            from datetime import datetime
-            if isinstance(period_end_date, str):
-                period_date = datetime.strptime(period_end_date, '%Y-%m-%d').date()
-            else:
-                period_date = period_end_date
-            
-            year_start = datetime(period_date.year, 1, 1).date()
-            
-            # Get YTD data (sum from start of year to period_end_date)
+            # YTD runs from the start of the fiscal year (FISCAL_YEAR_START_MONTH) to the end of
+            # the period month, matching the running balances above
             query = """
             SELECT 
                 grm.line_id,
-                SUM(tbd.amount * grm.sign_multiplier) as total_amount
-            FROM trial_balance_data tbd
-            JOIN trial_balance_uploads tbu ON tbd.upload_id = tbu.upload_id
-            JOIN gl_report_mapping grm ON tbd.gl_code = grm.gl_code
-            WHERE tbd.period_end_date >= %s
-            AND tbd.period_end_date <= %s
+                SUM(tbf.amount * grm.sign_multiplier) as total_amount
+            FROM trial_balance_facts tbf
+            JOIN trial_balance_uploads tbu ON tbf.upload_key = tbu.upload_key
+            JOIN gl_accounts ga ON tbf.account_id = ga.account_id
+            JOIN gl_report_mapping grm ON ga.gl_code = grm.gl_code
+            WHERE tbf.period_key BETWEEN %s AND %s
             AND tbu.company = %s
-            AND tbd.data_type = %s
+            AND tbf.data_type = %s
             AND grm.report_type = %s
             GROUP BY grm.line_id
             """
-            cursor.execute(query, (year_start, period_end_date, company, data_type, report_type))
+            cursor.execute(query, (keys['ytd_from'], keys['ytd_to'], company, data_type, report_type))
             results = cursor.fetchall()
             data = {row['line_id']: float(row['total_amount']) for row in results}
             
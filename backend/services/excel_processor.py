@@ -1,36 +1,58 @@
-import pandas as pd
+import re
+import time
 from datetime import datetime
 from services.database_service import save_complete_trial_balance
 from services.database_service import save_complete_trial_balance_multi_period
+from services.tracing import span
+from services.metrics import PARSE_DURATION, observe_upload
+
+# Accepted worksheet / column names (matched case-insensitively for sheets)
+ACTUAL_SHEET_NAMES = ['Actual', 'Actuals', 'actual']
+BUDGET_SHEET_NAMES = ['Budget', 'budget']
+PRIOR_YEAR_SHEET_NAMES = ['Prior Year', 'Prior_Year', 'PriorYear', 'prior year']
+GL_CODE_COLUMNS = ['GL Code', 'GL_Code', 'Account Code', 'Code', 'gl_code']
+ACCOUNT_NAME_COLUMNS = ['Account Name', 'Account_Name', 'Description', 'account_name']
+# ISO date headers, optionally with a midnight time (pandas writes datetime headers that way)
+ISO_HEADER = re.compile(r'^\d{4}-\d{1,2}-\d{1,2}( 00:00:00)?$')
 
 
 def process_trial_balance_file(filepath, upload_id, original_filename, company):
     """Process uploaded Excel trial balance file with multiple worksheets and monthly columns"""
+    # pandas is imported on first use so workers that only serve reports never load it
+    import pandas as pd
+    
     excel_file = None
+    upload_start = time.perf_counter()
     try:
         # Read all three worksheets - DON'T let pandas auto-parse dates
         excel_file = pd.ExcelFile(filepath)
         
-        actual_sheet = find_sheet_name(excel_file.sheet_names, ['Actual', 'Actuals', 'actual'])
-        budget_sheet = find_sheet_name(excel_file.sheet_names, ['Budget', 'budget'])
-        prior_year_sheet = find_sheet_name(excel_file.sheet_names, ['Prior Year', 'Prior_Year', 'PriorYear', 'prior year'])
+        actual_sheet = find_sheet_name(excel_file.sheet_names, ACTUAL_SHEET_NAMES)
+        budget_sheet = find_sheet_name(excel_file.sheet_names, BUDGET_SHEET_NAMES)
+        prior_year_sheet = find_sheet_name(excel_file.sheet_names, PRIOR_YEAR_SHEET_NAMES)
         
         if not all([actual_sheet, budget_sheet, prior_year_sheet]):
             raise Exception(f"Missing required worksheets. Found: {excel_file.sheet_names}")
         
         # Read sheets WITHOUT parsing dates automatically
         # Read sheets normally
-        df_actual = pd.read_excel(excel_file, sheet_name=actual_sheet)
-        df_budget = pd.read_excel(excel_file, sheet_name=budget_sheet)
-        df_prior_year = pd.read_excel(excel_file, sheet_name=prior_year_sheet)
+        with span('parse_actual'), PARSE_DURATION.labels(sheet='actual').time():
+            df_actual = pd.read_excel(excel_file, sheet_name=actual_sheet)
+        with span('parse_budget'), PARSE_DURATION.labels(sheet='budget').time():
+            df_budget = pd.read_excel(excel_file, sheet_name=budget_sheet)
+        with span('parse_prior_year'), PARSE_DURATION.labels(sheet='prior_year').time():
+            df_prior_year = pd.read_excel(excel_file, sheet_name=prior_year_sheet)
         
         excel_file.close()
         
         print(f"🔍 Actual columns (raw strings): {df_actual.columns.tolist()}")
         
-        actual_data = process_worksheet(df_actual, 'actual')
-        budget_data = process_worksheet(df_budget, 'budget')
-        prior_year_data = process_worksheet(df_prior_year, 'prior_year')
+        with span('process_actual'):
+            actual_data = process_worksheet(df_actual, 'actual')
+        with span('process_budget'):
+            budget_data = process_worksheet(df_budget, 'budget')
+        with span('process_prior_year'):
+            prior_year_data = process_worksheet(df_prior_year, 'prior_year')
         
         # ... rest of your code
         
@@ -38,25 +60,13 @@ def process_trial_balance_file(filepath, upload_id, original_filename, company):
         period_end_date = extract_latest_period_date(df_actual)
         
         # Combine all data
-        combined_data = combine_worksheet_data(actual_data, budget_data, prior_year_data)
+        with span('combine'):
+            combined_data = combine_worksheet_data(actual_data, budget_data, prior_year_data)
         
-        # Save everything in one transaction
-        result = save_complete_trial_balance_multi_period(
-            upload_id, 
-            original_filename, 
-            period_end_date, 
-            combined_data, 
-            company
+        return save_parsed_trial_balance(
+            upload_id, original_filename, period_end_date, combined_data, company, upload_start
         )
         
-        return {
-            'success': True,
-            'rows_processed': result['rows_processed'],
-            'period_end_date': result['period_end_date'],
-            'company': company,
-            'periods_loaded': result['periods_loaded']
-        }
-        
     except Exception as e:
         raise Exception(f"Excel processing error: {str(e)}")
     finally:
@@ -68,11 +78,58 @@ def process_trial_balance_file(filepath, upload_id, original_filename, company):
                 pass
 
 
-from datetime import datetime
-import pandas as pd
+def save_parsed_trial_balance(upload_id, original_filename, period_end_date, combined_data, company, upload_start):
+    """Save parsed long-format rows and run the post-upload steps (archive, rule mappings, mapping check)"""
+    # Save everything in one transaction
+    result = save_complete_trial_balance_multi_period(
+        upload_id, 
+        original_filename, 
+        period_end_date, 
+        combined_data, 
+        company
+    )
+    
+    observe_upload(result['rows_processed'], time.perf_counter() - upload_start)
+    
+    # Keep the parsed rows so the upload can be re-imported without the workbook
+    try:
+        from services.upload_archive import archive_enabled, write_upload_archive
+        if archive_enabled():
+            with span('archive'):
+                write_upload_archive(upload_id, original_filename, company, period_end_date, combined_data)
+    except Exception as e:
+        print(f"⚠️ Upload not archived: {str(e)}")
+    
+    # Map any new GL codes covered by range / prefix rules
+    try:
+        from services.mapping_rules import materialize_rule_mappings
+        materialize_rule_mappings(gl_codes=sorted({row['gl_code'] for row in combined_data}))
+    except Exception as e:
+        print(f"⚠️ Rule mappings not refreshed after upload: {str(e)}")
+    
+    # Flag GL codes that no report will pick up
+    mapping_check = None
+    try:
+        from services.mapping_validation import mapping_check_enabled, summarize_upload_mappings
+        if mapping_check_enabled():
+            with span('mapping_check'):
+                mapping_check = summarize_upload_mappings(upload_id)
+    except Exception as e:
+        print(f"⚠️ Mapping check failed after upload: {str(e)}")
+    
+    return {
+        'success': True,
+        'rows_processed': result['rows_processed'],
+        'period_end_date': result['period_end_date'],
+        'company': company,
+        'periods_loaded': result['periods_loaded'],
+        'mapping_check': mapping_check
+    }
+
 
 def process_worksheet(df, data_type):
     """Process a single worksheet with monthly columns"""
+    import pandas as pd
     
     print(f"🔍 Processing {data_type} worksheet")
     
@@ -87,9 +144,9 @@ def process_worksheet(df, data_type):
     
     for col in raw_columns:
         col_str = str(col).strip()
-        if col_str in ['GL Code', 'GL_Code', 'Account Code', 'Code', 'gl_code']:
+        if col_str in GL_CODE_COLUMNS:
             gl_code_col = col
-        if col_str in ['Account Name', 'Account_Name', 'Description', 'account_name']:
+        if col_str in ACCOUNT_NAME_COLUMNS:
             account_name_col = col
     
     if not gl_code_col or not account_name_col:
@@ -112,40 +169,13 @@ def process_worksheet(df, data_type):
         
         print(f"🔍 Checking column: '{col_str}' (type: {type(col)})")
         
-        date_obj = None
-        
-        # Method 1: If it's a datetime.datetime object (from Excel)
-        if isinstance(col, datetime):
-            date_obj = col.date()
+        date_obj, date_format = parse_header_date(col)
+        if date_format == 'datetime':
             print(f"  ✅ datetime.datetime -> {date_obj}")
-        
-        # Method 2: If pandas parsed it as Timestamp
-        elif isinstance(col, pd.Timestamp):
-            date_obj = col.date()
-            print(f"  ✅ Pandas Timestamp -> {date_obj}")
-        
-        # Method 3: Try parsing the string representation  
-        else:
-            # Split by common separators
-            for separator in ['/', '-', '.']:
-                if separator in col_str:
-                    parts = col_str.split(separator)
-                    if len(parts) == 3:
-                        try:
-                            # Try DD/MM/YYYY
-                            day, month, year = int(parts[0]), int(parts[1]), int(parts[2])
-                            date_obj = datetime(year, month, day).date()
-                            print(f"  ✅ Parsed as DD{separator}MM{separator}YYYY -> {date_obj}")
-                            break
-                        except (ValueError, IndexError):
-                            try:
-                                # Try MM/DD/YYYY
-                                month, day, year = int(parts[0]), int(parts[1]), int(parts[2])
-                                date_obj = datetime(year, month, day).date()
-                                print(f"  ⚠️ Parsed as MM{separator}DD{separator}YYYY -> {date_obj}")
-                                break
-                            except (ValueError, IndexError):
-                                pass
+        elif date_format and date_format.startswith('MM'):
+            print(f"  ⚠️ Parsed as {date_format} -> {date_obj}")
+        elif date_format:
+            print(f"  ✅ Parsed as {date_format} -> {date_obj}")
         
         if date_obj:
             date_columns[col] = date_obj
@@ -189,6 +219,46 @@ def process_worksheet(df, data_type):
     
     return processed_data
 
+def parse_header_date(col):
+    """Parse a worksheet column header as a period date.
+    
+    Returns (date, format): format is 'datetime' for real date cells (also
+    pandas Timestamps), 'YYYY-MM-DD' for ISO text, or the text pattern used
+    ('DD/MM/YYYY' first, 'MM/DD/YYYY' only when the day-first reading is
+    impossible).
+    (None, None) if the header is not a date.
+    """
+    # Method 1: If it's a datetime.datetime object (from Excel)
+    if isinstance(col, datetime):
+        return col.date(), 'datetime'
+    
+    # Method 2: ISO YYYY-MM-DD text, as CSV / Parquet exports write dates
+    col_str = str(col).strip()
+    if ISO_HEADER.match(col_str):
+        try:
+            return datetime.strptime(col_str.split(' ')[0], '%Y-%m-%d').date(), 'YYYY-MM-DD'
+        except ValueError:
+            return None, None
+    
+    # Method 3: Try parsing the string representation, split by common separators
+    for separator in ['/', '-', '.']:
+        if separator in col_str:
+            parts = col_str.split(separator)
+            if len(parts) == 3:
+                try:
+                    # Try DD/MM/YYYY
+                    day, month, year = int(parts[0]), int(parts[1]), int(parts[2])
+                    return datetime(year, month, day).date(), f"DD{separator}MM{separator}YYYY"
+                except (ValueError, IndexError):
+                    try:
+                        # Try MM/DD/YYYY
+                        month, day, year = int(parts[0]), int(parts[1]), int(parts[2])
+                        return datetime(year, month, day).date(), f"MM{separator}DD{separator}YYYY"
+                    except (ValueError, IndexError):
+                        pass
+    return None, None
+
+
 def find_sheet_name(sheet_names, possible_names):
     """Find worksheet name from possible variations (case-insensitive)"""
     for sheet in sheet_names:
@@ -203,6 +273,7 @@ def find_sheet_name(sheet_names, possible_names):
 
 def extract_latest_period_date(df):
     """Extract the latest period date from column headers"""
+    import pandas as pd
     df.columns = df.columns.str.strip()
     
     date_columns = []
@@ -267,6 +338,7 @@ def validate_trial_balance_format(df):
 
 def clean_trial_balance_data(df, column_mapping):
     """Clean and standardize the trial balance data (legacy function)"""
+    import pandas as pd
     cleaned_df = df[[
         column_mapping['gl_code'],
         column_mapping['account_name'], 
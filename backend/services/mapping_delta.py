@@ -0,0 +1,161 @@
+from datetime import timedelta
+from services.database_service import get_gl_mappings_for_codes, get_gl_amounts_for_codes, get_report_data
+from services.period_utils import parse_period, month_start
+from services.batch_service import compute_report_data, get_fetch_window
+from services.mapping_rules import load_rule_index
+
+# Mapping change deltas.
+#
+# Remapping a GL code moves its amounts from the old (line_id, sign) to the
+# new one, so the effect on any report is -amount * old_sign on the old line
+# plus amount * new_sign on the new line - only the changed codes need to be
+# read. Report columns are sums of line amounts, so the same column rules
+# (batch_service.compute_report_data) turn these line deltas into column
+# adjustments that can be added to already computed report data.
+#
+# The preview endpoint applies them to a freshly read report. Saving or
+# deleting a single mapping adds the line deltas to the DuckDB snapshots
+# (analytics_service.apply_mapping_deltas) instead of rebuilding every
+# company's snapshot.
+
+DELTA_TOLERANCE = 0.005
+
+
+def build_mapping_changes(report_type, proposed):
+    """[(gl_code, old, new)] for proposed mappings that differ from the stored ones.
+
+    proposed is a list of {'gl_code', 'line_id', 'sign_multiplier'}; a missing
+    or empty line_id removes the explicit mapping, so the code falls back to
+    the range / prefix rule covering it, if any. old / new are
+    (line_id, sign_multiplier) tuples or None.
+    """
+    current = get_gl_mappings_for_codes(report_type, [item['gl_code'] for item in proposed])
+    rule_index = None
+    changes = []
+    for item in proposed:
+        if item.get('line_id'):
+            new = (item['line_id'], float(item.get('sign_multiplier', 1)))
+        else:
+            rule_index = rule_index or load_rule_index(report_type)
+            fallback = rule_index.resolve(item['gl_code'])
+            new = fallback[:2] if fallback else None
+        old = current.get(item['gl_code'])
+        if old != new:
+            changes.append((item['gl_code'], old, new))
+    return changes
+
+
+def compute_line_deltas(report_type, changes, company=None, start_date=None, end_date=None,
+                        tolerance=DELTA_TOLERANCE):
+    """Per-line adjustments caused by mapping changes, grouped by company.
+
+    Returns {company: [(report_type, line_id, data_type, period_end_date, delta)]},
+    the row shape compute_report_data and get_report_line_amounts use.
+    Deltas smaller than tolerance are dropped (pass 0 to keep them all).
+    """
+    if not changes:
+        return {}
+
+    by_code = {gl_code: (old, new) for gl_code, old, new in changes}
+    rows = get_gl_amounts_for_codes(list(by_code), company, start_date, end_date)
+
+    totals = {}
+    for row_company, gl_code, data_type, period_end_date, amount in rows:
+        old, new = by_code[gl_code]
+        if old:
+            key = (row_company, old[0], data_type, period_end_date)
+            totals[key] = totals.get(key, 0) - amount * old[1]
+        if new:
+            key = (row_company, new[0], data_type, period_end_date)
+            totals[key] = totals.get(key, 0) + amount * new[1]
+
+    deltas = {}
+    for (row_company, line_id, data_type, period_end_date), delta in sorted(totals.items()):
+        if abs(delta) >= tolerance:
+            deltas.setdefault(row_company, []).append((report_type, line_id, data_type, period_end_date, delta))
+    return deltas
+
+
+def apply_line_deltas(report_data, delta_rows, report_type, period_end_date):
+    """Return get_report_data-shaped report_data with the mapping deltas added"""
+    adjustments = compute_report_data(delta_rows, report_type, period_end_date)
+    adjusted = {column: dict(lines) for column, lines in report_data.items()}
+    for column, lines in adjustments.items():
+        target = adjusted.setdefault(column, {})
+        for line_id, delta in lines.items():
+            target[line_id] = target.get(line_id, 0) + delta
+    return adjusted
+
+
+def diff_report_data(before, after):
+    """Changed (column, line_id) cells between two get_report_data results"""
+    differences = []
+    for column in sorted(set(before) | set(after)):
+        before_lines = before.get(column, {})
+        after_lines = after.get(column, {})
+        for line_id in sorted(set(before_lines) | set(after_lines)):
+            old_amount = before_lines.get(line_id, 0)
+            new_amount = after_lines.get(line_id, 0)
+            if abs(new_amount - old_amount) >= DELTA_TOLERANCE:
+                differences.append({
+                    'column': column,
+                    'line_id': line_id,
+                    'before': round(old_amount, 2),
+                    'after': round(new_amount, 2),
+                    'change': round(new_amount - old_amount, 2)
+                })
+    return differences
+
+
+def preview_mapping_changes(report_type, proposed, company=None, period_end_date=None, preview_report=None):
+    """Before / after impact of proposed mapping changes, without saving them.
+
+    Always summarizes the affected companies and periods. With a company and
+    period it also returns the report data before and after the change for
+    preview_report (defaults to report_type; a P&L change can be previewed
+    on the balance sheet, where it only moves reserves).
+    """
+    changes = build_mapping_changes(report_type, proposed)
+    preview = {
+        'report_type': report_type,
+        'changes': [
+            {
+                'gl_code': gl_code,
+                'old': {'line_id': old[0], 'sign_multiplier': old[1]} if old else None,
+                'new': {'line_id': new[0], 'sign_multiplier': new[1]} if new else None
+            }
+            for gl_code, old, new in changes
+        ]
+    }
+
+    start_date = end_date = None
+    if company and period_end_date:
+        preview_report = preview_report or report_type
+        period_date = parse_period(period_end_date)
+        start_date = get_fetch_window(preview_report, period_date)
+        end_date = month_start(period_date, -1) - timedelta(days=1)
+
+    deltas = compute_line_deltas(report_type, changes, company, start_date, end_date)
+    preview['affected'] = [
+        {
+            'company': row_company,
+            'first_period': min(row[3] for row in rows).isoformat(),
+            'last_period': max(row[3] for row in rows).isoformat(),
+            'line_ids': sorted({row[1] for row in rows}),
+            'adjustments': len(rows)
+        }
+        for row_company, rows in sorted(deltas.items())
+    ]
+
+    if company and period_end_date:
+        before = get_report_data(preview_report, period_end_date, company)
+        after = apply_line_deltas(before, deltas.get(company, []), preview_report, period_end_date)
+        preview['report'] = {
+            'report_type': preview_report,
+            'company': company,
+            'period_end_date': period_end_date,
+            'before': before,
+            'after': after,
+            'differences': diff_report_data(before, after)
+        }
+    return preview
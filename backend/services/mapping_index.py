@@ -0,0 +1,178 @@
+import threading
+import time
+from services.database_service import get_mapping_version, get_gl_mapping_snapshot, get_gl_period_amounts
+from services.settings import get_setting
+
+# In-process GL mapping index.
+#
+# gl_report_mapping is small and rarely changes, so each worker keeps it in
+# memory per report_type as sorted numpy arrays (gl_code, line, sign), with
+# the range / prefix rules compiled alongside as a fallback. GL balances can
+# then be fetched without the mapping join and mapped in one vectorized
+# searchsorted + bincount pass.
+#
+# save_gl_mapping / delete_gl_mapping bump data_version.mapping_version. The
+# worker that made the change reloads at once; other workers poll the
+# version at most every MAPPING_INDEX_POLL_SECONDS and reload when it moved.
+
+_indexes = {}
+_loaded_version = None
+_last_checked = 0.0
+_lock = threading.Lock()
+
+
+def mapping_index_enabled():
+    """Check whether GL mappings should be applied from the in-process index"""
+    return get_setting('MAPPING_INDEX_ENABLED', True)
+
+
+class MappingIndex:
+    """gl_code -> (line_id, sign_multiplier) for one report_type.
+    
+    Explicit per-code mappings are looked up first; codes they miss fall back
+    to the compiled range / prefix rules.
+    """
+
+    def __init__(self, report_type, mappings, rules=()):
+        import numpy as np
+        from services.mapping_rules import RuleIndex
+
+        mappings = sorted(mappings)
+        self.report_type = report_type
+        self.rules = RuleIndex(rules)
+        self.line_ids = sorted({line_id for _, line_id, _ in mappings} | set(self.rules.line_ids))
+        line_positions = {line_id: position for position, line_id in enumerate(self.line_ids)}
+
+        self.gl_codes = np.array([gl_code for gl_code, _, _ in mappings], dtype=str)
+        self.line_codes = np.array([line_positions[line_id] for _, line_id, _ in mappings], dtype=np.int64)
+        self.signs = np.array([float(sign) for _, _, sign in mappings], dtype=np.float64)
+        self.rule_line_codes = np.array([line_positions[line_id] for line_id in self.rules.line_ids], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.gl_codes)
+
+    def lookup(self, gl_codes):
+        """(line_codes, signs, mapped mask) arrays for an array of GL codes"""
+        import numpy as np
+
+        codes = np.asarray(gl_codes, dtype=str)
+        line_codes = np.zeros(len(codes), dtype=np.int64)
+        signs = np.zeros(len(codes), dtype=np.float64)
+        found = np.zeros(len(codes), dtype=bool)
+
+        if len(self.gl_codes):
+            positions = np.minimum(np.searchsorted(self.gl_codes, codes), len(self.gl_codes) - 1)
+            found = self.gl_codes[positions] == codes
+            line_codes[found] = self.line_codes[positions[found]]
+            signs[found] = self.signs[positions[found]]
+
+        if len(self.rules) and not found.all():
+            missing = ~found
+            positions, covered = self.rules.lookup(codes[missing])
+            targets = np.flatnonzero(missing)[covered]
+            line_codes[targets] = self.rule_line_codes[positions[covered]]
+            signs[targets] = self.rules.signs[positions[covered]]
+            found[targets] = True
+
+        return line_codes, signs, found
+
+    def resolve(self, gl_code):
+        """(line_id, sign_multiplier) for one GL code, or None when unmapped"""
+        line_codes, signs, found = self.lookup([gl_code])
+        if not found[0]:
+            return None
+        return self.line_ids[line_codes[0]], float(signs[0])
+
+
+def _refresh_if_stale():
+    """Reload every report_type's index when the mapping version has moved"""
+    global _indexes, _loaded_version, _last_checked
+
+    poll_seconds = float(get_setting('MAPPING_INDEX_POLL_SECONDS', 2.0))
+    if _loaded_version is not None and time.monotonic() - _last_checked < poll_seconds:
+        return
+
+    with _lock:
+        if _loaded_version is not None and time.monotonic() - _last_checked < poll_seconds:
+            return
+
+        if _loaded_version is None or get_mapping_version() != _loaded_version:
+            version, rows, rules = get_gl_mapping_snapshot()
+            grouped = {}
+            for report_type, gl_code, line_id, sign_multiplier in rows:
+                grouped.setdefault(report_type, []).append((gl_code, line_id, sign_multiplier))
+            grouped_rules = {}
+            for rule in rules:
+                grouped_rules.setdefault(rule['report_type'], []).append(rule)
+            _indexes = {
+                report_type: MappingIndex(report_type, grouped.get(report_type, []), grouped_rules.get(report_type, []))
+                for report_type in set(grouped) | set(grouped_rules)
+            }
+            _loaded_version = version
+            print(f"🔍 Mapping index v{version} loaded: " +
+                  ', '.join(f"{name}={len(index)} codes/{index.rules.rule_count} rules"
+                            for name, index in sorted(_indexes.items())))
+        _last_checked = time.monotonic()
+
+
+def get_mapping_index(report_type):
+    """Get the current mapping index for a report_type (refreshed if another worker changed it)"""
+    _refresh_if_stale()
+    index = _indexes.get(report_type)
+    return index if index is not None else MappingIndex(report_type, [])
+
+
+def invalidate_mapping_index():
+    """Force a reload on next use - called after this worker writes a mapping"""
+    global _loaded_version
+    with _lock:
+        _loaded_version = None
+
+
+def map_line_amounts(rows, report_types):
+    """Map (gl_code, data_type, period_end_date, amount) rows onto report lines.
+
+    Returns (report_type, line_id, data_type, period_end_date, amount) tuples,
+    the same shape as get_report_line_amounts. Unmapped GL codes are dropped,
+    as the SQL join does.
+    """
+    import numpy as np
+
+    if not rows:
+        return []
+
+    group_keys = {}
+    gl_codes = []
+    group_codes = []
+    amounts = []
+    for gl_code, data_type, period_end_date, amount in rows:
+        gl_codes.append(gl_code)
+        group_codes.append(group_keys.setdefault((data_type, period_end_date), len(group_keys)))
+        amounts.append(float(amount or 0))
+    groups = list(group_keys)
+    group_codes = np.array(group_codes, dtype=np.int64)
+    amounts = np.array(amounts, dtype=np.float64)
+
+    results = []
+    for report_type in report_types:
+        index = get_mapping_index(report_type)
+        line_codes, signs, found = index.lookup(gl_codes)
+        if not found.any():
+            continue
+
+        line_count = len(index.line_ids)
+        keys = group_codes[found] * line_count + line_codes[found]
+        size = len(groups) * line_count
+        totals = np.bincount(keys, weights=amounts[found] * signs[found], minlength=size)
+        present = np.bincount(keys, minlength=size) > 0
+
+        for key in np.flatnonzero(present):
+            data_type, period_end_date = groups[key // line_count]
+            results.append((report_type, index.line_ids[key % line_count], data_type, period_end_date, float(totals[key])))
+    return results
+
+
+def get_mapped_line_amounts(company, report_types, start_date, end_date):
+    """Drop-in for get_report_line_amounts that maps GL balances with the in-process index"""
+    rows = get_gl_period_amounts(company, start_date, end_date)
+    return map_line_amounts(rows, report_types)
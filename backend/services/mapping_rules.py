@@ -0,0 +1,198 @@
+import heapq
+
+# Rule-based GL mappings.
+#
+# A rule maps every GL code in a range (4000-4999) or with a prefix (40) onto
+# one report line. Prefix rules compare codes as strings, so 40 covers 400,
+# 4000 and 40-10. Range rules compare a normalized key instead: the numeric
+# part before any separator is zero-padded, so 2 < 15 < 100 < 1000 whatever
+# the code lengths in the chart, and only sub-accounts after a separator
+# (4999-01, 4999.01) extend the end of a range. Every rule becomes a
+# half-open interval [start, end) of its key.
+#
+# The rules for a report_type are compiled into non-overlapping sorted
+# segments per rule type, each already resolved to its winning rule
+# (highest priority, then the newest rule), so a GL code resolves with one
+# binary search per rule type. Explicit per-code rows in gl_report_mapping
+# always win over rules.
+
+RULE_TYPES = ('range', 'prefix')
+
+# Appended to an inclusive bound so every key starting with it falls inside
+_MAX_CHAR = '\U0010ffff'
+# Sub-accounts follow one of these after the account number
+_SEPARATORS = '-./ _'
+# Stands in for any separator in a range key; sorts below every printable character
+_SUB_ACCOUNT = '\x01'
+_KEY_WIDTH = 32
+
+
+def gl_range_key(gl_code):
+    """Key range rules compare GL codes on: zero-padded account number, then the sub-account"""
+    code = str(gl_code).strip()
+    base, suffix = code, ''
+    for position, char in enumerate(code):
+        if char in _SEPARATORS:
+            base, suffix = code[:position], _SUB_ACCOUNT + code[position + 1:]
+            break
+    if base.isascii() and base.isdigit():
+        base = base.zfill(_KEY_WIDTH)
+    return base + suffix
+
+
+def rule_key(rule_type, gl_code):
+    """The key a rule of rule_type compares a GL code on"""
+    return gl_range_key(gl_code) if rule_type == 'range' else str(gl_code)
+
+
+def rule_interval(rule_type, gl_from, gl_to=None):
+    """Half-open [start, end) interval of rule_key values covered by a rule"""
+    if rule_type == 'prefix':
+        return gl_from, gl_from + _MAX_CHAR
+    if rule_type == 'range':
+        start = gl_range_key(gl_from)
+        end = gl_range_key(gl_to) if gl_to is not None else None
+        if end is None or end < start:
+            raise ValueError(f"Invalid range {gl_from}-{gl_to}")
+        return start, end + _SUB_ACCOUNT + _MAX_CHAR
+    raise ValueError(f"Unknown rule type: {rule_type}")
+
+
+def compile_segments(intervals):
+    """Sorted, non-overlapping [start, end, rule] segments, each resolved to its winning rule"""
+    intervals = sorted(intervals, key=lambda interval: interval[0])
+
+    # Sweep the interval boundaries keeping the active rules in a heap
+    # ordered by (priority, rule_id); expired rules are dropped lazily.
+    boundaries = sorted({point for start, end, _ in intervals for point in (start, end)})
+    segments = []
+    active = []
+    next_interval = 0
+    for position, boundary in enumerate(boundaries[:-1]):
+        while next_interval < len(intervals) and intervals[next_interval][0] <= boundary:
+            start, end, rule = intervals[next_interval]
+            heapq.heappush(active, (-rule.get('priority', 0), -rule['rule_id'], end, rule))
+            next_interval += 1
+        while active and active[0][2] <= boundary:
+            heapq.heappop(active)
+        if not active:
+            continue
+        winner = active[0][3]
+        segment_end = boundaries[position + 1]
+        if segments and segments[-1][1] == boundary and segments[-1][2] is winner:
+            segments[-1][1] = segment_end
+        else:
+            segments.append([boundary, segment_end, winner])
+    return segments
+
+
+class RuleIndex:
+    """Per rule type, sorted non-overlapping GL code segments resolved to their winning rule"""
+
+    def __init__(self, rules):
+        import numpy as np
+
+        intervals = {rule_type: [] for rule_type in RULE_TYPES}
+        for rule in rules:
+            start, end = rule_interval(rule['rule_type'], rule['gl_from'], rule.get('gl_to'))
+            intervals[rule['rule_type']].append((start, end, rule))
+
+        # Segments of both rule types share the line / sign / rule arrays; each
+        # type keeps its own start / end keys and offset into them
+        segments = []
+        self.tables = []
+        for rule_type in RULE_TYPES:
+            type_segments = compile_segments(intervals[rule_type])
+            self.tables.append((
+                rule_type,
+                np.array([start for start, _, _ in type_segments], dtype=str),
+                np.array([end for _, end, _ in type_segments], dtype=str),
+                len(segments)
+            ))
+            segments.extend(type_segments)
+
+        self.rule_count = sum(len(type_intervals) for type_intervals in intervals.values())
+        self.line_ids = [rule['line_id'] for _, _, rule in segments]
+        self.signs = np.array([float(rule['sign_multiplier']) for _, _, rule in segments], dtype=np.float64)
+        self.rule_ids = np.array([rule['rule_id'] for _, _, rule in segments], dtype=np.int64)
+        self.priorities = np.array([rule.get('priority', 0) for _, _, rule in segments], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.line_ids)
+
+    def lookup(self, gl_codes):
+        """Segment positions for an array of GL codes, plus a mask of the ones a rule covers"""
+        import numpy as np
+
+        codes = np.asarray(gl_codes, dtype=str)
+        positions = np.zeros(len(codes), dtype=np.int64)
+        found = np.zeros(len(codes), dtype=bool)
+        for rule_type, starts, ends, offset in self.tables:
+            if not len(starts) or not len(codes):
+                continue
+            keys = codes if rule_type == 'prefix' else np.array([gl_range_key(code) for code in codes], dtype=str)
+            type_positions = np.searchsorted(starts, keys, side='right') - 1
+            covered = type_positions >= 0
+            type_positions = np.maximum(type_positions, 0)
+            covered &= keys < ends[type_positions]
+            type_positions += offset
+
+            # A range and a prefix rule can both cover a code - keep the winner
+            priority, current_priority = self.priorities[type_positions], self.priorities[positions]
+            wins = (priority > current_priority) | (
+                (priority == current_priority) & (self.rule_ids[type_positions] > self.rule_ids[positions])
+            )
+            take = covered & (~found | wins)
+            positions = np.where(take, type_positions, positions)
+            found |= covered
+        return positions, found
+
+    def resolve(self, gl_code):
+        """(line_id, sign_multiplier, rule_id) for one GL code, or None when no rule covers it"""
+        positions, found = self.lookup([gl_code])
+        if not found[0]:
+            return None
+        position = positions[0]
+        return self.line_ids[position], float(self.signs[position]), int(self.rule_ids[position])
+
+
+def materialize_rule_mappings(report_types=None, gl_codes=None):
+    """Write rule-resolved rows into gl_report_mapping for GL codes without an explicit mapping.
+
+    Materialized rows carry their rule_id, so the SQL report queries pick them
+    up through the usual join, and they are replaced whenever the rules
+    change. Pass gl_codes to only (re)resolve those codes, e.g. after an upload.
+    """
+    from services.database_service import get_mapping_rules, get_rule_candidate_gl_codes
+    from services.database_service import replace_rule_mappings
+
+    rules_by_type = {}
+    for rule in get_mapping_rules():
+        rules_by_type.setdefault(rule['report_type'], []).append(rule)
+
+    written = {}
+    for report_type in report_types or sorted(rules_by_type):
+        # Deleting a rule cascades to its rows, so a type without rules has nothing to write
+        if not rules_by_type.get(report_type):
+            continue
+        index = RuleIndex(rules_by_type[report_type])
+        candidates = get_rule_candidate_gl_codes(report_type, gl_codes)
+
+        rows = []
+        if candidates:
+            positions, found = index.lookup(candidates)
+            for gl_code, position, covered in zip(candidates, positions, found):
+                if covered:
+                    rows.append((gl_code, report_type, index.line_ids[position],
+                                 float(index.signs[position]), int(index.rule_ids[position])))
+
+        replace_rule_mappings(report_type, rows, gl_codes)
+        written[report_type] = len(rows)
+        print(f"✅ Materialized {len(rows)} rule mappings for {report_type} ({len(candidates)} unmapped GL codes)")
+    return written
+
+
+def load_rule_index(report_type):
+    """RuleIndex over the stored rules of one report type"""
+    from services.database_service import get_mapping_rules
+    return RuleIndex(get_mapping_rules(report_type))
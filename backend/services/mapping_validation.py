@@ -0,0 +1,62 @@
+import time
+from services.database_service import get_unmapped_gl_codes, get_orphaned_gl_mappings
+from services.settings import get_setting
+
+# Mapping coverage checks for an upload.
+#
+# Unmapped GL codes and mappings pointing at line_ids missing from
+# report_line_definitions both make amounts silently drop out of reports.
+# Each check is one anti-join over the upload's rows, cheap enough to run
+# after every upload.
+
+AMOUNT_COLUMNS = ['actual', 'budget', 'prior_year']
+
+# How many codes the post-upload summary lists (the endpoint returns all of them)
+SUMMARY_SAMPLE_SIZE = 20
+
+
+def mapping_check_enabled():
+    """Check whether uploads should run the mapping coverage check"""
+    return get_setting('MAPPING_CHECK_ON_UPLOAD', True)
+
+
+def column_totals(rows):
+    """Sum the actual / budget / prior_year amounts of check result rows"""
+    return {column: round(sum(row[column] for row in rows), 2) for column in AMOUNT_COLUMNS}
+
+
+def validate_upload_mappings(upload_id, report_type=None):
+    """Unmapped GL codes and orphaned mappings for an upload (one report type or all)"""
+    check_start = time.perf_counter()
+    unmapped = get_unmapped_gl_codes(upload_id, report_type)
+    orphaned = get_orphaned_gl_mappings(upload_id, report_type)
+
+    return {
+        'upload_id': upload_id,
+        'report_type': report_type,
+        'unmapped_gl_codes': unmapped,
+        'unmapped_totals': column_totals(unmapped),
+        'orphaned_mappings': orphaned,
+        'orphaned_totals': column_totals(orphaned),
+        'check_ms': round((time.perf_counter() - check_start) * 1000, 2)
+    }
+
+
+def summarize_upload_mappings(upload_id):
+    """Post-upload check: codes no report picks up, plus orphaned mappings"""
+    result = validate_upload_mappings(upload_id)
+    summary = {
+        'unmapped_count': len(result['unmapped_gl_codes']),
+        'unmapped_totals': result['unmapped_totals'],
+        'unmapped_gl_codes': [row['gl_code'] for row in result['unmapped_gl_codes'][:SUMMARY_SAMPLE_SIZE]],
+        'orphaned_count': len(result['orphaned_mappings']),
+        'orphaned_line_ids': sorted({f"{row['report_type']}:{row['line_id']}" for row in result['orphaned_mappings']}),
+        'check_ms': result['check_ms']
+    }
+
+    if summary['unmapped_count'] or summary['orphaned_count']:
+        print(f"⚠️ Upload {upload_id}: {summary['unmapped_count']} unmapped GL codes "
+              f"(actual {summary['unmapped_totals']['actual']}), {summary['orphaned_count']} orphaned mappings")
+    else:
+        print(f"✅ Upload {upload_id}: every GL code is mapped ({summary['check_ms']} ms)")
+    return summary
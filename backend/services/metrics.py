@@ -0,0 +1,152 @@
+import os
+import time
+from functools import wraps
+from prometheus_client import Counter, Gauge, Histogram
+
+# Prometheus metrics.
+#
+# With several gunicorn workers set PROMETHEUS_MULTIPROC_DIR to an empty
+# folder before start-up: every worker then writes its samples there and
+# /metrics aggregates them across workers (see gunicorn.conf.py).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by route',
+    ['method', 'route', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+
+UPLOAD_ROWS = Counter(
+    'upload_rows_total',
+    'Trial balance rows saved by uploads'
+)
+
+UPLOAD_ROWS_PER_SECOND = Histogram(
+    'upload_rows_per_second',
+    'Rows per second achieved by each upload (parse + insert)',
+    buckets=(100, 500, 1000, 5000, 10000, 25000, 50000, 100000, 250000)
+)
+
+PARSE_DURATION = Histogram(
+    'upload_parse_duration_seconds',
+    'Time to parse one worksheet of an upload',
+    ['sheet'],
+    buckets=LATENCY_BUCKETS
+)
+
+INSERT_DURATION = Histogram(
+    'upload_insert_duration_seconds',
+    'Time to insert and commit an upload',
+    buckets=LATENCY_BUCKETS
+)
+
+REPORT_CACHE_REQUESTS = Counter(
+    'report_cache_requests_total',
+    'Conditional requests on versioned endpoints by result (hit = 304)',
+    ['result']
+)
+
+DB_CONNECTIONS_OPENED = Counter(
+    'db_connections_opened_total',
+    'Database connections opened'
+)
+
+DB_CONNECTIONS_OPEN = Gauge(
+    'db_connections_open',
+    'Database connections currently open',
+    multiprocess_mode='livesum'
+)
+
+QUERY_LATENCY = Histogram(
+    'db_query_duration_seconds',
+    'Latency of named database_service queries',
+    ['query'],
+    buckets=LATENCY_BUCKETS
+)
+
+
+ADMISSION_IN_FLIGHT = Gauge(
+    'admission_in_flight',
+    'Requests holding an admission slot, by pool',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    'admission_queue_depth',
+    'Requests waiting for an admission slot, by pool',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+
+ADMISSION_WAIT = Histogram(
+    'admission_wait_seconds',
+    'Time spent waiting for an admission slot',
+    ['pool'],
+    buckets=LATENCY_BUCKETS
+)
+
+ADMISSION_REJECTED = Counter(
+    'admission_rejected_total',
+    'Requests turned away by admission control (queue_full = 429, timeout = 503)',
+    ['pool', 'reason']
+)
+
+
+def timed_query(func):
+    """Record the latency of a database_service function under its own name"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            QUERY_LATENCY.labels(query=func.__name__).observe(time.perf_counter() - start)
+    return wrapper
+
+
+def observe_upload(rows, seconds):
+    """Record rows and throughput for a completed upload"""
+    UPLOAD_ROWS.inc(rows)
+    if seconds > 0:
+        UPLOAD_ROWS_PER_SECOND.observe(rows / seconds)
+
+
+def get_registry():
+    """Registry for /metrics - aggregated across workers in multiprocess mode"""
+    from prometheus_client import REGISTRY, CollectorRegistry
+    from prometheus_client import multiprocess
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def init_metrics(app):
+    """Time every request and expose /metrics in Prometheus text format"""
+    from flask import g, request, Response
+    from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None and request.endpoint != 'metrics':
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_LATENCY.labels(
+                method=request.method,
+                route=route,
+                status=response.status_code
+            ).observe(time.perf_counter() - start)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(generate_latest(get_registry()), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,55 @@
+import base64
+import json
+
+# Opaque keyset cursors.
+#
+# A cursor is the sort key of the last row on a page, JSON encoded and
+# base64url wrapped so clients treat it as a token rather than building one.
+# The next page is fetched with a row comparison against that key, so every
+# page costs O(page size) no matter how deep into the history it is.
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values):
+    """Encode the sort key values of the last row as a cursor token"""
+    raw = json.dumps([v.isoformat() if hasattr(v, 'isoformat') else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Decode a cursor token back to its `size` sort key values (ValueError if malformed)"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def cursor_value(value, parse=str):
+    """Check one decoded cursor value and parse it (e.g. with date.fromisoformat); None stays None.
+
+    Raises ValueError for a token that decodes but holds a bad value, so a
+    tampered cursor is a 400 rather than a database error.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError('Invalid cursor')
+    try:
+        return parse(value)
+    except ValueError:
+        raise ValueError('Invalid cursor')
+
+
+def page_size(value):
+    """Clamp a requested page size to 1..MAX_PAGE_SIZE"""
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    if value < 1:
+        raise ValueError('limit must be positive')
+    return min(value, MAX_PAGE_SIZE)
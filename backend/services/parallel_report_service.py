@@ -0,0 +1,149 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from services.database_service import pooled_connection, get_column_window
+from services.database_service import BALANCE_SHEET_COLUMNS, RESERVES_LINE_ID
+from services.period_utils import period_key
+from services.ytd_balances import ytd_balances_enabled, ytd_balances_ready
+from services.settings import get_setting
+
+# Parallel report mode.
+#
+# Instead of one CASE-heavy scan computing every column, each report column
+# runs as its own narrow aggregation (one data_type, one date range) on its
+# own pooled connection. The queries run concurrently so Postgres can use a
+# core per column, and the results are merged into the usual
+# get_report_data shape. P&L YTD columns read one running balance row per
+# account from trial_balance_ytd, like the single query, once the company's
+# balances are built (services.ytd_balances).
+#
+# Enable with REPORT_QUERY_MODE=parallel.
+
+PROFIT_LOSS_COLUMNS = ['actual', 'budget', 'prior_year', 'ytd_actual', 'ytd_budget', 'prior_ytd']
+YTD_COLUMNS = {'ytd_actual', 'ytd_budget', 'prior_ytd'}
+
+REPORT_COLUMNS = {
+    'profit_loss': PROFIT_LOSS_COLUMNS,
+    'balance_sheet': BALANCE_SHEET_COLUMNS
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def parallel_reports_enabled():
+    """Check whether reports should use the parallel per-column queries"""
+    return get_setting('REPORT_QUERY_MODE', 'single').lower() == 'parallel'
+
+
+def get_executor():
+    """Get the process-wide thread pool for column queries (created on first use)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(get_setting('REPORT_QUERY_WORKERS', 6)),
+                    thread_name_prefix='report-column'
+                )
+    return _executor
+
+
+def in_app_context(function):
+    """Wrap function to run inside the caller's Flask app context (if any) on a pool thread.
+
+    Column queries read settings (fiscal year start, pool size) through
+    get_setting, which needs the app context to see the app config.
+    """
+    from flask import current_app, has_app_context
+
+    if not has_app_context():
+        return function
+    app = current_app._get_current_object()
+
+    def run(*args, **kwargs):
+        with app.app_context():
+            return function(*args, **kwargs)
+    return run
+
+
+def get_column_data(report_type, column, period_end_date, company, use_ytd_balances=False):
+    """Aggregate a single report column on its own pooled connection"""
+    data_type, start_date, end_date = get_column_window(report_type, column, period_end_date)
+
+    if use_ytd_balances and column in YTD_COLUMNS:
+        # Running balance at the column's last month instead of summing the months
+        query = """
+        SELECT
+            grm.line_id,
+            SUM(ty.ytd_amount * grm.sign_multiplier) as total_amount
+        FROM trial_balance_ytd ty
+        JOIN gl_accounts ga ON ty.account_id = ga.account_id
+        JOIN gl_report_mapping grm ON ga.gl_code = grm.gl_code
+        WHERE ga.company = %s
+        AND grm.report_type = %s
+        AND ty.data_type = %s
+        AND ty.month_key = %s
+        GROUP BY grm.line_id
+        """
+        params = (company, report_type, data_type, period_key(end_date) // 100)
+    elif report_type == 'balance_sheet':
+        # P&L lines roll straight into reserves inside the same scan
+        query = """
+        SELECT
+            CASE WHEN grm.report_type = 'balance_sheet' THEN grm.line_id ELSE %s END as line_id,
+            SUM(tbf.amount * grm.sign_multiplier) as total_amount
+        FROM trial_balance_facts tbf
+        JOIN trial_balance_uploads tbu ON tbf.upload_key = tbu.upload_key
+        JOIN gl_accounts ga ON tbf.account_id = ga.account_id
+        JOIN gl_report_mapping grm ON ga.gl_code = grm.gl_code
+        WHERE tbu.company = %s
+        AND grm.report_type IN ('balance_sheet', 'profit_loss')
+        AND tbf.data_type = %s
+        AND tbf.period_key BETWEEN %s AND %s
+        GROUP BY 1
+        """
+        params = (RESERVES_LINE_ID, company, data_type, period_key(start_date), period_key(end_date))
+    else:
+        query = """
+        SELECT
+            grm.line_id,
+            SUM(tbf.amount * grm.sign_multiplier) as total_amount
+        FROM trial_balance_facts tbf
+        JOIN trial_balance_uploads tbu ON tbf.upload_key = tbu.upload_key
+        JOIN gl_accounts ga ON tbf.account_id = ga.account_id
+        JOIN gl_report_mapping grm ON ga.gl_code = grm.gl_code
+        WHERE tbu.company = %s
+        AND grm.report_type = %s
+        AND tbf.data_type = %s
+        AND tbf.period_key BETWEEN %s AND %s
+        GROUP BY grm.line_id
+        """
+        params = (company, report_type, data_type, period_key(start_date), period_key(end_date))
+
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return {line_id: float(total or 0) for line_id, total in cursor.fetchall()}
+
+
+def get_report_data_parallel(report_type, period_end_date, company):
+    """Get report data by running every column query concurrently and merging"""
+    if report_type not in REPORT_COLUMNS:
+        raise ValueError(f"Unknown report type: {report_type}")
+
+    try:
+        use_ytd_balances = False
+        if report_type == 'profit_loss' and ytd_balances_enabled():
+            with pooled_connection() as conn:
+                use_ytd_balances = ytd_balances_ready(conn, company)
+
+        executor = get_executor()
+        futures = {
+            column: executor.submit(
+                in_app_context(get_column_data), report_type, column, period_end_date, company, use_ytd_balances
+            )
+            for column in REPORT_COLUMNS[report_type]
+        }
+        return {column: future.result() for column, future in futures.items()}
+    except Exception as e:
+        raise Exception(f"Failed to get report data: {str(e)}")
@@ -0,0 +1,115 @@
+from datetime import datetime, date, timedelta
+from services.settings import get_setting
+
+
+def parse_period(period_end_date):
+    """Parse a YYYY-MM-DD period string into a date (dates pass through)"""
+    if isinstance(period_end_date, str):
+        return datetime.strptime(period_end_date, '%Y-%m-%d').date()
+    return period_end_date
+
+
+def shift_years(period_date, years):
+    """Shift a date by whole years the way Postgres INTERVAL does (Feb 29 -> Feb 28)"""
+    try:
+        return period_date.replace(year=period_date.year + years)
+    except ValueError:
+        return period_date.replace(year=period_date.year + years, day=28)
+
+
+def month_start(period_date, months_back=0):
+    """First day of the month, optionally stepping back (or forward if negative) whole months"""
+    month_index = period_date.year * 12 + period_date.month - 1 - months_back
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def month_end(period_date):
+    """Last day of the month"""
+    return month_start(period_date, -1) - timedelta(days=1)
+
+
+def period_key(period_date):
+    """Integer YYYYMMDD key for a period end date (keys sort like the dates)"""
+    period_date = parse_period(period_date)
+    return period_date.year * 10000 + period_date.month * 100 + period_date.day
+
+
+def month_key(period_date):
+    """Integer YYYYMM key for the month of a period date"""
+    period_date = parse_period(period_date)
+    return period_date.year * 100 + period_date.month
+
+
+def month_key_range(period_date):
+    """(first, last) period_key bounds covering the whole month of a period date"""
+    key = month_key(period_date)
+    return key * 100 + 1, key * 100 + 31
+
+
+def fiscal_year_start_month():
+    """First month of the fiscal year (FISCAL_YEAR_START_MONTH, 1 = calendar year)"""
+    start_month = int(get_setting('FISCAL_YEAR_START_MONTH', 1))
+    if not 1 <= start_month <= 12:
+        raise ValueError(f"FISCAL_YEAR_START_MONTH must be 1-12, got {start_month}")
+    return start_month
+
+
+def fiscal_year_start(period_date, start_month=None):
+    """First day of the fiscal year containing a period date"""
+    period_date = parse_period(period_date)
+    start_month = start_month or fiscal_year_start_month()
+    year = period_date.year if period_date.month >= start_month else period_date.year - 1
+    return date(year, start_month, 1)
+
+
+def calendar_attributes(period_date, start_month=None):
+    """calendar_periods columns for a period end date.
+    
+    Fiscal years are named after the calendar year they end in, so with an
+    April start April 2025 - March 2026 is fiscal 2026, period 1 is April.
+    """
+    period_date = parse_period(period_date)
+    start_month = start_month or fiscal_year_start_month()
+    year_start = fiscal_year_start(period_date, start_month)
+    fiscal_period = (period_date.year - year_start.year) * 12 + period_date.month - start_month + 1
+    return {
+        'period_key': period_key(period_date),
+        'period_end_date': period_date,
+        'month_key': month_key(period_date),
+        'calendar_year': period_date.year,
+        'calendar_quarter': (period_date.month - 1) // 3 + 1,
+        'fiscal_year_start_month': start_month,
+        'fiscal_year': year_start.year + (1 if start_month > 1 else 0),
+        'fiscal_period': fiscal_period,
+        'fiscal_quarter': (fiscal_period - 1) // 3 + 1
+    }
+
+
+def report_period_keys(period_end_date):
+    """Integer period_key bounds for every report column of a period.
+    
+    Month columns cover the whole month, and so do the YTD columns: they run
+    from the start of the fiscal year to the end of the period's month (or
+    the same month a year earlier), which is what the running YTD balances
+    keyed by month / prior_year_month (YYYYMM) hold.
+    """
+    period_date = parse_period(period_end_date)
+    prior_year_date = shift_years(period_date, -1)
+    month_from, month_to = month_key_range(period_date)
+    prior_year_from, prior_year_to = month_key_range(prior_year_date)
+    prior_month_from, prior_month_to = month_key_range(month_start(period_date, 1))
+    return {
+        'period': period_key(period_date),
+        'month': month_key(period_date),
+        'prior_year_month': month_key(prior_year_date),
+        'month_from': month_from,
+        'month_to': month_to,
+        'prior_year_from': prior_year_from,
+        'prior_year_to': prior_year_to,
+        'prior_month_from': prior_month_from,
+        'prior_month_to': prior_month_to,
+        'ytd_from': period_key(fiscal_year_start(period_date)),
+        'ytd_to': month_to,
+        'prior_ytd_from': period_key(fiscal_year_start(prior_year_date)),
+        'prior_ytd_to': prior_year_to
+    }
@@ -0,0 +1,106 @@
+import csv
+import io
+import tempfile
+from services.report_generator import generate_profit_loss_report
+from services.report_generator import generate_balance_sheet_report
+
+# Export columns per report type: (key in report line amounts, header label)
+EXPORT_COLUMNS = {
+    'profit_loss': [
+        ('actual', 'Actual'),
+        ('budget', 'Budget'),
+        ('prior_year', 'Prior Year'),
+        ('actual_ytd', 'Actual YTD'),
+        ('budget_ytd', 'Budget YTD'),
+        ('prior_year_ytd', 'Prior Year YTD')
+    ],
+    'balance_sheet': [
+        ('actual', 'Actual'),
+        ('budget', 'Budget'),
+        ('prior_year', 'Prior Year'),
+        ('prior_month', 'Prior Month')
+    ]
+}
+
+REPORT_GENERATORS = {
+    'profit_loss': generate_profit_loss_report,
+    'balance_sheet': generate_balance_sheet_report
+}
+
+NUMBER_FORMAT = '#,##0.00;(#,##0.00)'
+XLSX_CHUNK_SIZE = 64 * 1024
+
+
+def iter_report_rows(report_type, periods, company):
+    """Yield export rows one report at a time so only one report is held in memory.
+
+    Each row is (cells, is_bold). A period banner row is written ahead of each
+    report when more than one period is exported.
+    """
+    if report_type not in REPORT_GENERATORS:
+        raise ValueError(f"Unknown report type: {report_type}")
+
+    columns = EXPORT_COLUMNS[report_type]
+    yield ['Company', 'Period End', 'Line'] + [label for _, label in columns], True
+
+    for period_end_date in periods:
+        report = REPORT_GENERATORS[report_type](period_end_date, company)
+
+        for line in report['data']:
+            if line['type'] == 'blank':
+                continue
+            amounts = line.get('amounts') or {}
+            cells = [company, period_end_date, line['name'].strip()]
+            cells += [amounts.get(key) for key, _ in columns]
+            yield cells, line['is_bold']
+
+
+def stream_csv(rows):
+    """Stream export rows as CSV text, one line at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    for cells, _ in rows:
+        writer.writerow([
+            f"{cell:.2f}" if isinstance(cell, (int, float)) else cell
+            for cell in cells
+        ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+def stream_xlsx(rows, sheet_title='Report'):
+    """Stream export rows as an XLSX workbook.
+
+    openpyxl write-only mode keeps memory flat while rows are written; the
+    finished workbook is spooled to a temp file and sent back in chunks.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=sheet_title[:31])
+    worksheet.column_dimensions['C'].width = 40
+    bold = Font(bold=True)
+
+    for cells, is_bold in rows:
+        row = []
+        for value in cells:
+            cell = WriteOnlyCell(worksheet, value=value)
+            if isinstance(value, (int, float)):
+                cell.number_format = NUMBER_FORMAT
+            if is_bold:
+                cell.font = bold
+            row.append(cell)
+        worksheet.append(row)
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(XLSX_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
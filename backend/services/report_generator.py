@@ -2,6 +2,18 @@ import json
 import os
 from services.database_service import get_report_data
 from services.database_service import get_report_data_ytd
+from services.tracing import span, span_start, record_span
+from services.period_utils import calendar_attributes, fiscal_year_start
+
+def get_fiscal_period(period_end_date):
+    """Fiscal year / period / quarter of a report period and where its YTD columns start"""
+    attributes = calendar_attributes(period_end_date)
+    return {
+        'fiscal_year': attributes['fiscal_year'],
+        'fiscal_period': attributes['fiscal_period'],
+        'fiscal_quarter': attributes['fiscal_quarter'],
+        'ytd_start': fiscal_year_start(period_end_date).isoformat()
+    }
 
 def load_report_template(report_type):
     """Load report template from JSON file"""
@@ -9,17 +21,20 @@ def load_report_template(report_type):
     with open(template_path, 'r') as file:
         return json.load(file)
 
-def generate_profit_loss_report(period_end_date, company):
+def generate_profit_loss_report(period_end_date, company, report_data=None):
     """Generate detailed Profit & Loss report with Actual, Budget, Prior Year, and YTD columns"""
     try:
         print(f"🔍 Starting P&L generation for {company} - {period_end_date}")
         
         # Load template
-        template = load_report_template('profit_loss')
+        with span('template'):
+            template = load_report_template('profit_loss')
         print(f"✅ Template loaded: {template['report_name']}")
         
-        # Get ALL data from database in ONE call
-        all_report_data = get_report_data('profit_loss', period_end_date, company)
+        # Get ALL data from database in ONE call (unless already fetched by a batch)
+        if report_data is None:
+            report_data = get_report_data('profit_loss', period_end_date, company)
+        all_report_data = report_data
         print(f"🔍 Complete report data retrieved")
         
         # Extract each data type from the returned dictionary
@@ -40,6 +55,7 @@ def generate_profit_loss_report(period_end_date, company):
         print(f"✅ Data retrieved for all 6 columns")
         
         # Build report structure
+        assemble_started = span_start()
         report_lines = []
         section_totals = {
             'actual': {},
@@ -247,9 +263,11 @@ def generate_profit_loss_report(period_end_date, company):
             'is_final': True
         })
         
+        record_span('assemble', assemble_started)
         return {
             'report_title': template['report_name'],
             'period_end_date': period_end_date,
+            'fiscal_period': get_fiscal_period(period_end_date),
             'data': report_lines,
             'summary': {
                 'total_revenue': {
@@ -282,19 +300,28 @@ def generate_profit_loss_report(period_end_date, company):
     except Exception as e:
         raise Exception(f"Failed to generate P&L report: {str(e)}")
 
-def generate_balance_sheet_report(period_end_date):
-    """Generate Balance Sheet report"""
+def generate_balance_sheet_report(period_end_date, company, report_data=None):
+    """Generate Balance Sheet report with Actual, Budget, Prior Year and Prior Month columns"""
     try:
-        print(f"🔍 Starting Balance Sheet generation for {period_end_date}")
-        template = load_report_template('balance_sheet')
+        print(f"🔍 Starting Balance Sheet generation for {company} - {period_end_date}")
+        with span('template'):
+            template = load_report_template('balance_sheet')
         print(f"✅ Template loaded: {template['report_name']}")
         
-        line_data = get_report_data('balance_sheet', period_end_date)
-        print(f"✅ Line data retrieved: {len(line_data)} items")
-        print(f"📊 Line data keys: {list(line_data.keys())}")
+        # BS lines and reserves profit come back from ONE query (unless already fetched by a batch)
+        if report_data is None:
+            report_data = get_report_data('balance_sheet', period_end_date, company)
+        all_report_data = report_data
+        columns = list(all_report_data.keys())
+        print(f"✅ Line data retrieved: {len(all_report_data['actual'])} items")
+        print(f"📊 Line data keys: {list(all_report_data['actual'].keys())}")
+        
+        def empty_amounts():
+            return {column: None for column in columns}
         
+        assemble_started = span_start()
         report_lines = []
-        section_totals = {}
+        section_totals = {column: {} for column in columns}
         
         print(f"🔄 Processing {len(template['sections'])} sections...")
         
@@ -305,13 +332,14 @@ def generate_balance_sheet_report(period_end_date):
             report_lines.append({
                 'name': section['section_name'],
                 'amount': None,
+                'amounts': empty_amounts(),
                 'is_header': True,
                 'is_bold': True,
                 'indent_level': 0,
                 'type': 'section_header'
             })
             
-            section_total = 0
+            section_total = {column: 0 for column in columns}
             
             # Process subsections (Current Assets, Fixed Assets, etc.)
             if 'subsections' in section:
@@ -324,23 +352,30 @@ def generate_balance_sheet_report(period_end_date):
                     report_lines.append({
                         'name': f"  {subsection['subsection_name']}",
                         'amount': None,
+                        'amounts': empty_amounts(),
                         'is_header': True,
                         'is_bold': False,
                         'indent_level': 1,
                         'type': 'subsection_header'
                     })
                     
-                    subsection_total = 0
+                    subsection_total = {column: 0 for column in columns}
                     
                     # Add line items
                     for line in subsection['lines']:
-                        line_amount = line_data.get(line['line_id'], 0)
-                        subsection_total += line_amount
+                        line_amounts = {
+                            column: all_report_data[column].get(line['line_id'], 0)
+                            for column in columns
+                        }
+                        for column in columns:
+                            subsection_total[column] += line_amounts[column]
                         
-                        if line_amount != 0:  # Only show lines with data
+                        # Only show lines with data in ANY column
+                        if any(amount != 0 for amount in line_amounts.values()):
                             report_lines.append({
                                 'name': f"    {line['name']}",
-                                'amount': line_amount,
+                                'amount': line_amounts['actual'],
+                                'amounts': line_amounts,
                                 'is_header': False,
                                 'is_bold': False,
                                 'indent_level': 2,
@@ -348,13 +383,15 @@ def generate_balance_sheet_report(period_end_date):
                             })
                     
                     # Add subsection total
-                    if subsection_total != 0:
-                        section_totals[subsection['total_line']['line_id']] = subsection_total
-                        section_total += subsection_total
+                    if any(amount != 0 for amount in subsection_total.values()):
+                        for column in columns:
+                            section_totals[column][subsection['total_line']['line_id']] = subsection_total[column]
+                            section_total[column] += subsection_total[column]
                         
                         report_lines.append({
                             'name': f"  {subsection['total_line']['name']}",
-                            'amount': subsection_total,
+                            'amount': subsection_total['actual'],
+                            'amounts': subsection_total,
                             'is_header': False,
                             'is_bold': True,
                             'indent_level': 1,
@@ -365,6 +402,7 @@ def generate_balance_sheet_report(period_end_date):
                         report_lines.append({
                             'name': '',
                             'amount': None,
+                            'amounts': empty_amounts(),
                             'is_header': False,
                             'is_bold': False,
                             'indent_level': 0,
@@ -372,10 +410,12 @@ def generate_balance_sheet_report(period_end_date):
                         })
             
             # Add main section total
-            section_totals[section['total_line']['line_id']] = section_total
+            for column in columns:
+                section_totals[column][section['total_line']['line_id']] = section_total[column]
             report_lines.append({
                 'name': section['total_line']['name'],
-                'amount': section_total,
+                'amount': section_total['actual'],
+                'amounts': section_total,
                 'is_header': False,
                 'is_bold': True,
                 'indent_level': 0,
@@ -386,6 +426,7 @@ def generate_balance_sheet_report(period_end_date):
             report_lines.append({
                 'name': '',
                 'amount': None,
+                'amounts': empty_amounts(),
                 'is_header': False,
                 'is_bold': False,
                 'indent_level': 0,
@@ -393,29 +434,32 @@ def generate_balance_sheet_report(period_end_date):
             })
         
         # Check if balance sheet balances
-        total_assets = section_totals.get('total_assets', 0)
-        total_liab_equity = section_totals.get('total_liab_equity', 0)
+        total_assets = section_totals['actual'].get('total_assets', 0)
+        total_liab_equity = section_totals['actual'].get('total_liab_equity', 0)
         difference = total_assets - total_liab_equity
         
         print(f"💰 Total Assets: {total_assets}")
         print(f"💰 Total Liab & Equity: {total_liab_equity}")
         print(f"⚖️ Difference: {difference}")
         
+        record_span('assemble', assemble_started)
         return {
             'report_title': template['report_name'],
             'period_end_date': period_end_date,
+            'company': company,
             'data': report_lines,
             'balances': abs(difference) < 0.01,
             'difference': difference,
             'summary': {
                 'total_assets': total_assets,
                 'total_liabilities_equity': total_liab_equity,
-                **section_totals
-            }
+                **section_totals['actual']
+            },
+            'column_totals': section_totals
         }
         
     except Exception as e:
         print(f"❌ Balance Sheet Error: {str(e)}")
         import traceback
         print(f"❌ Full traceback: {traceback.format_exc()}")
-        raise Exception(f"Failed to generate Balance Sheet: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Failed to generate Balance Sheet: {str(e)}")
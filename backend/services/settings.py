@@ -0,0 +1,31 @@
+import os
+
+# Runtime settings.
+#
+# Inside the Flask app a setting comes from current_app.config (config.py),
+# the same place admission control and compression read theirs, so a config
+# class or test override applies everywhere. CLIs, benchmarks and threads
+# without an app context fall back to the environment, read at call time.
+
+
+def get_setting(name, default):
+    """Get a setting from the app config, or from the environment outside the app.
+
+    Environment values are converted to the type of default ('true' / 'false'
+    for booleans); an unset or empty variable gives default.
+    """
+    from flask import current_app, has_app_context
+
+    if has_app_context() and name in current_app.config:
+        return current_app.config[name]
+
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    if isinstance(default, bool):
+        return value.lower() == 'true'
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value
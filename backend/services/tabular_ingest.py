@@ -0,0 +1,190 @@
+import os
+import time
+import zipfile
+from services.excel_processor import ACTUAL_SHEET_NAMES, BUDGET_SHEET_NAMES, PRIOR_YEAR_SHEET_NAMES
+from services.excel_processor import GL_CODE_COLUMNS, ACCOUNT_NAME_COLUMNS
+from services.excel_processor import find_sheet_name, parse_header_date, save_parsed_trial_balance
+from services.tracing import span
+from services.metrics import PARSE_DURATION
+
+# CSV / Parquet trial balance ingestion.
+#
+# ERP exports arrive as one file per data_type - actual.csv, budget.parquet,
+# "Prior Year.csv", acme_prior_year.csv ... - either zipped together or as a
+# multipart set, in the same wide-month layout as the workbook sheets (GL
+# Code, Account Name, one column per month end). Files are read with Arrow's
+# multithreaded CSV / Parquet readers and reshaped to long rows with Arrow
+# compute, then saved through the same path as Excel uploads
+# (save_parsed_trial_balance). Requires pyarrow.
+
+DATA_TYPES = [
+    ('actual', ACTUAL_SHEET_NAMES),
+    ('budget', BUDGET_SHEET_NAMES),
+    ('prior_year', PRIOR_YEAR_SHEET_NAMES)
+]
+TABULAR_EXTENSIONS = {'csv', 'parquet'}
+# Largest single file accepted from a zip once uncompressed
+MAX_MEMBER_BYTES = 512 * 1024 * 1024
+
+
+def file_extension(filename):
+    """Lower-case extension without the dot ('' if none)"""
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
+def detect_data_type(filename):
+    """data_type a file holds, from its name (actual.csv, Budget.parquet, acme_prior_year.csv ...)"""
+    stem = os.path.splitext(os.path.basename(filename))[0].strip().lower()
+    for data_type, names in DATA_TYPES:
+        candidates = names + [data_type]
+        if find_sheet_name([stem], candidates):
+            return data_type
+        for name in candidates:
+            if any(stem.endswith(f"{separator}{name.lower()}") for separator in '_- .'):
+                return data_type
+    return None
+
+
+def read_zip_sources(zip_path):
+    """{data_type: (member name, bytes)} for the CSV / Parquet files in a zip"""
+    sources = {}
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in archive.infolist():
+            name = os.path.basename(member.filename)
+            if member.is_dir() or name.startswith('.') or '__MACOSX' in member.filename:
+                continue
+            if file_extension(name) not in TABULAR_EXTENSIONS:
+                continue
+            data_type = detect_data_type(name)
+            if not data_type:
+                print(f"⚠️ Skipping {member.filename}: not an actual / budget / prior year file")
+                continue
+            if data_type in sources:
+                raise Exception(f"More than one {data_type} file: {sources[data_type][0]}, {name}")
+            if member.file_size > MAX_MEMBER_BYTES:
+                raise Exception(f"{name} is too large ({member.file_size / 1024 / 1024:.0f} MB uncompressed)")
+            sources[data_type] = (name, archive.read(member))
+    return sources
+
+
+def read_arrow_table(source, extension):
+    """Read a CSV / Parquet file (path or bytes) with Arrow's multithreaded readers"""
+    import pyarrow as pa
+
+    if isinstance(source, bytes):
+        source = pa.BufferReader(source)
+    if extension == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(source, use_threads=True)
+    if extension != 'csv':
+        raise Exception(f"Unsupported file type: .{extension}")
+
+    import pyarrow.csv as pv
+    # GL codes stay text so leading zeros survive
+    text_columns = {name: pa.string() for name in GL_CODE_COLUMNS + ACCOUNT_NAME_COLUMNS}
+    return pv.read_csv(
+        source,
+        read_options=pv.ReadOptions(use_threads=True),
+        convert_options=pv.ConvertOptions(column_types=text_columns)
+    )
+
+
+def numeric_column(column):
+    """A column as float64; text that is not a number becomes null (like pd.to_numeric(errors='coerce'))"""
+    import pyarrow as pa
+
+    if pa.types.is_integer(column.type) or pa.types.is_floating(column.type) or pa.types.is_null(column.type):
+        return column.cast(pa.float64())
+    if pa.types.is_decimal(column.type):
+        return column.cast(pa.float64())
+    import pandas as pd
+    return pa.chunked_array([pa.array(pd.to_numeric(column.to_pandas(), errors='coerce'), pa.float64())])
+
+
+def wide_to_long(table, data_type):
+    """Reshape a wide-month table into long (gl_code, account_name, period_end_date, amount, data_type) rows.
+
+    Applies process_worksheet's rules: rows without a GL code and zero or
+    non-numeric amounts are skipped. Returns (long table, period dates).
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    names = table.column_names
+    gl_index = account_index = None
+    for index, name in enumerate(names):
+        if str(name).strip() in GL_CODE_COLUMNS:
+            gl_index = index
+        if str(name).strip() in ACCOUNT_NAME_COLUMNS:
+            account_index = index
+    if gl_index is None or account_index is None:
+        raise Exception(f"Missing GL Code or Account Name column in {data_type} file. Found: {names}")
+
+    date_columns = []
+    for index, name in enumerate(names):
+        if index in (gl_index, account_index) or str(name).strip() in ('', 'nan'):
+            continue
+        period_date, _ = parse_header_date(name)
+        if period_date:
+            date_columns.append((index, period_date))
+    if not date_columns:
+        raise Exception(f"No valid date columns found in {data_type} file.")
+
+    gl_codes = pc.utf8_trim_whitespace(table.column(gl_index).cast(pa.string()))
+    account_names = pc.utf8_trim_whitespace(pc.fill_null(table.column(account_index).cast(pa.string()), ''))
+    has_gl_code = pc.and_(pc.not_equal(gl_codes, ''), pc.not_equal(gl_codes, 'nan'))
+
+    pieces = []
+    for index, period_date in date_columns:
+        amounts = numeric_column(table.column(index))
+        # Nulls (blank / non-numeric) drop out of the filter; NaN and zero are skipped explicitly
+        keep = pc.and_(has_gl_code, pc.and_(pc.invert(pc.is_nan(amounts)), pc.not_equal(amounts, 0)))
+        count = pc.sum(pc.cast(pc.fill_null(keep, False), pa.int64())).as_py() or 0
+        pieces.append(pa.table({
+            'gl_code': gl_codes.filter(keep),
+            'account_name': account_names.filter(keep),
+            'period_end_date': pa.repeat(pa.scalar(period_date, pa.date32()), count),
+            'amount': amounts.filter(keep),
+            'data_type': pa.repeat(pa.scalar(data_type, pa.string()), count)
+        }))
+    return pa.concat_tables(pieces), [period_date for _, period_date in date_columns]
+
+
+def parse_tabular_sources(sources):
+    """Parse {data_type: (filename, path or bytes)} into (combined long rows, latest actual period)"""
+    import pyarrow as pa
+
+    missing = [data_type for data_type, _ in DATA_TYPES if data_type not in sources]
+    if missing:
+        found = [filename for filename, _ in sources.values()]
+        raise Exception(f"Missing files for: {', '.join(missing)}. Found: {found}")
+
+    tables = []
+    period_end_date = None
+    for data_type, _ in DATA_TYPES:
+        filename, source = sources[data_type]
+        with span(f'parse_{data_type}'), PARSE_DURATION.labels(sheet=data_type).time():
+            table = read_arrow_table(source, file_extension(filename))
+        with span(f'process_{data_type}'):
+            long_table, period_dates = wide_to_long(table, data_type)
+        print(f"✅ Processed {long_table.num_rows} rows for {data_type} from {filename}")
+        tables.append(long_table)
+        if data_type == 'actual':
+            # Latest month end in the actual file's headers
+            period_end_date = max(period_dates)
+
+    with span('combine'):
+        combined_data = pa.concat_tables(tables).to_pylist()
+    return combined_data, period_end_date
+
+
+def process_tabular_trial_balance(sources, upload_id, original_filename, company):
+    """Process a set of CSV / Parquet files (one per data_type) like an Excel upload"""
+    upload_start = time.perf_counter()
+    try:
+        combined_data, period_end_date = parse_tabular_sources(sources)
+        return save_parsed_trial_balance(
+            upload_id, original_filename, period_end_date, combined_data, company, upload_start
+        )
+    except Exception as e:
+        raise Exception(f"File processing error: {str(e)}")
@@ -0,0 +1,99 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+# Lightweight per-request stage timing.
+#
+# Wrap a stage in `with span('query'):` and its duration is collected for the
+# current request, then sent back as a Server-Timing header (and optionally
+# printed as one JSON log line). When tracing is off span() hands back a
+# shared no-op context, so instrumented code costs one flag check.
+
+_enabled = False
+_log_enabled = False
+_current_spans = ContextVar('current_spans', default=None)
+_NOOP_SPAN = nullcontext()
+
+
+@contextmanager
+def _timed_span(name, spans):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, (time.perf_counter() - start) * 1000))
+
+
+def span(name):
+    """Time a stage of the current request (no-op when tracing is disabled)"""
+    if not _enabled:
+        return _NOOP_SPAN
+    spans = _current_spans.get()
+    if spans is None:
+        return _NOOP_SPAN
+    return _timed_span(name, spans)
+
+
+def span_start():
+    """Start timing a stage that can't be wrapped in a with-block"""
+    return time.perf_counter() if _enabled else None
+
+
+def record_span(name, started):
+    """Record a stage started with span_start()"""
+    if started is None:
+        return
+    spans = _current_spans.get()
+    if spans is not None:
+        spans.append((name, (time.perf_counter() - started) * 1000))
+
+
+def format_server_timing(spans, total_ms):
+    """Format spans as a Server-Timing header value"""
+    entries = [f"{name};dur={duration:.2f}" for name, duration in spans]
+    entries.append(f"total;dur={total_ms:.2f}")
+    return ', '.join(entries)
+
+
+def init_tracing(app):
+    """Collect spans per request and emit them as Server-Timing / log lines"""
+    global _enabled, _log_enabled
+    _enabled = app.config.get('TRACING_ENABLED', False)
+    _log_enabled = app.config.get('TRACE_LOG', False)
+
+    if not _enabled:
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def start_trace():
+        g.trace_start = time.perf_counter()
+        g.trace_token = _current_spans.set([])
+
+    @app.after_request
+    def finish_trace(response):
+        spans = _current_spans.get()
+        if spans is None or 'trace_start' not in g:
+            return response
+        total_ms = (time.perf_counter() - g.trace_start) * 1000
+
+        response.headers['Server-Timing'] = format_server_timing(spans, total_ms)
+        response.headers['Timing-Allow-Origin'] = '*'
+        if _log_enabled:
+            print(json.dumps({
+                'event': 'request_trace',
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 2),
+                'spans': [{'name': name, 'ms': round(duration, 2)} for name, duration in spans]
+            }))
+        return response
+
+    @app.teardown_request
+    def clear_trace(exc):
+        token = g.pop('trace_token', None)
+        if token is not None:
+            _current_spans.reset(token)
@@ -0,0 +1,202 @@
+import argparse
+import os
+import re
+import time
+from datetime import datetime
+from services.settings import get_setting
+
+# Parquet archive of parsed uploads.
+#
+# Uploaded workbooks are deleted once parsed, so each successful upload's
+# long-format rows (gl_code, account_name, period_end_date, data_type,
+# amount) are kept as one ZSTD-compressed Parquet file per upload under
+# UPLOAD_ARCHIVE_DIR/<company>/<upload_id>.parquet, with the upload record
+# in the file metadata. Re-importing an archive bulk-loads it with COPY,
+# far quicker than re-parsing the workbook:
+#
+#     python -m services.upload_archive list
+#     python -m services.upload_archive reimport upload_archive/ [--replace]
+#
+# Deleting a trial balance renames its archive to *.parquet.deleted: it is
+# kept for audit but skipped by a directory re-import.
+#
+# Requires pyarrow.
+
+ARCHIVE_COLUMNS = ['gl_code', 'account_name', 'period_end_date', 'data_type', 'amount']
+METADATA_PREFIX = 'archive.'
+METADATA_FIELDS = ['upload_id', 'filename', 'company', 'period_end_date', 'archived_at', 'row_count']
+
+
+def archive_enabled():
+    """Check whether successful uploads should be archived to Parquet"""
+    return get_setting('UPLOAD_ARCHIVE_ENABLED', True)
+
+
+def get_archive_dir():
+    """Get the folder holding the upload archives"""
+    return get_setting('UPLOAD_ARCHIVE_DIR', '') or 'upload_archive'
+
+
+def get_archive_path(company, upload_id):
+    """Get the Parquet archive path for an upload"""
+    safe_company = re.sub(r'[^A-Za-z0-9_.-]', '_', company or '')
+    return os.path.join(get_archive_dir(), safe_company, f"{upload_id}.parquet")
+
+
+def write_upload_archive(upload_id, filename, company, period_end_date, combined_data):
+    """Write an upload's parsed rows to its Parquet archive, returning the path"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table({
+        'gl_code': pa.array([row['gl_code'] for row in combined_data], pa.string()),
+        'account_name': pa.array([row['account_name'] for row in combined_data], pa.string()),
+        'period_end_date': pa.array([row['period_end_date'] for row in combined_data], pa.date32()),
+        'data_type': pa.array([row['data_type'] for row in combined_data], pa.string()),
+        'amount': pa.array([row['amount'] for row in combined_data], pa.float64())
+    })
+    # Sorted rows compress much better (repeated codes / names / dates)
+    table = table.sort_by([('data_type', 'ascending'), ('gl_code', 'ascending'), ('period_end_date', 'ascending')])
+
+    metadata = {
+        'upload_id': upload_id,
+        'filename': filename,
+        'company': company,
+        'period_end_date': str(period_end_date),
+        'archived_at': datetime.now().isoformat(timespec='seconds'),
+        'row_count': str(len(combined_data))
+    }
+    table = table.replace_schema_metadata({f"{METADATA_PREFIX}{key}": value or '' for key, value in metadata.items()})
+
+    path = get_archive_path(company, upload_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, temp_path, compression='zstd')
+    os.replace(temp_path, path)
+    print(f"✅ Upload {upload_id} archived: {len(combined_data)} rows, {os.path.getsize(path) / 1024:.1f} KB")
+    return path
+
+
+def read_archive_metadata(path):
+    """Read an archive's upload record without loading its rows"""
+    import pyarrow.parquet as pq
+
+    raw = pq.read_schema(path).metadata or {}
+    metadata = {field: raw.get(f"{METADATA_PREFIX}{field}".encode(), b'').decode() for field in METADATA_FIELDS}
+    if not metadata['upload_id']:
+        raise Exception(f"{path} is not an upload archive (no upload metadata)")
+    return metadata
+
+
+def read_upload_archive(path):
+    """Read an archive as (metadata dict, pandas DataFrame)"""
+    import pyarrow.parquet as pq
+
+    metadata = read_archive_metadata(path)
+    return metadata, pq.read_table(path, columns=ARCHIVE_COLUMNS).to_pandas()
+
+
+def retire_upload_archive(company, upload_id):
+    """Keep a deleted upload's archive for audit, out of the way of directory re-imports"""
+    path = get_archive_path(company, upload_id)
+    if os.path.exists(path):
+        os.replace(path, f"{path}.deleted")
+        print(f"🔄 Upload archive retired: {path}.deleted")
+
+
+def find_archives(paths):
+    """Archive files under the given files / directories, in name order"""
+    archives = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, names in os.walk(path):
+                archives.extend(os.path.join(folder, name) for name in names if name.endswith('.parquet'))
+        else:
+            archives.append(path)
+    return sorted(archives)
+
+
+def reimport_upload_archive(path, replace=False):
+    """Bulk-load one archive into the database; existing uploads are skipped unless replace"""
+    from services.database_service import bulk_load_trial_balance
+
+    metadata, frame = read_upload_archive(path)
+    period_end_date = datetime.strptime(metadata['period_end_date'], '%Y-%m-%d').date()
+    result = bulk_load_trial_balance(
+        metadata['upload_id'],
+        metadata['filename'],
+        period_end_date,
+        metadata['company'],
+        frame,
+        replace=replace
+    )
+
+    if not result['skipped']:
+        # Map any new GL codes covered by range / prefix rules, as an upload does
+        try:
+            from services.mapping_rules import materialize_rule_mappings
+            materialize_rule_mappings(gl_codes=sorted(frame['gl_code'].unique()))
+        except Exception as e:
+            print(f"⚠️ Rule mappings not refreshed after re-import: {str(e)}")
+    return metadata, result
+
+
+def list_archives(paths, company=None):
+    """Print the upload record of every archive"""
+    for path in find_archives(paths):
+        metadata = read_archive_metadata(path)
+        if company and metadata['company'] != company:
+            continue
+        print(f"{metadata['company']:<24} {metadata['period_end_date']:<12} {metadata['row_count']:>8} rows   "
+              f"{metadata['upload_id']}   {metadata['filename']}")
+
+
+def main():
+    import config  # noqa: F401 - loads DATABASE_URL from .env
+
+    parser = argparse.ArgumentParser(description='Upload archive tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help='List archived uploads')
+    list_parser.add_argument('paths', nargs='*', help='Archive files or folders (default UPLOAD_ARCHIVE_DIR)')
+    list_parser.add_argument('--company')
+
+    reimport_parser = commands.add_parser('reimport', help='Bulk-load archives into the database')
+    reimport_parser.add_argument('paths', nargs='*', help='Archive files or folders (default UPLOAD_ARCHIVE_DIR)')
+    reimport_parser.add_argument('--company', help='Only re-import this company')
+    reimport_parser.add_argument('--replace', action='store_true', help='Replace uploads that already exist')
+    args = parser.parse_args()
+
+    paths = args.paths or [get_archive_dir()]
+    if args.command == 'list':
+        list_archives(paths, args.company)
+        return
+
+    total_rows = 0
+    failures = 0
+    start = time.perf_counter()
+    for path in find_archives(paths):
+        file_start = time.perf_counter()
+        try:
+            if args.company and read_archive_metadata(path)['company'] != args.company:
+                continue
+            metadata, result = reimport_upload_archive(path, replace=args.replace)
+        except Exception as e:
+            failures += 1
+            print(f"❌ {path}: {str(e)}")
+            continue
+
+        if result['skipped']:
+            print(f"⚠️ {metadata['upload_id']} already loaded, skipped (use --replace)")
+            continue
+        total_rows += result['rows_processed']
+        print(f"✅ {metadata['company']} {metadata['period_end_date']}: {result['rows_processed']} rows "
+              f"in {(time.perf_counter() - file_start) * 1000:.0f} ms")
+
+    elapsed = time.perf_counter() - start
+    print(f"🔍 Re-imported {total_rows} rows in {elapsed:.2f} s ({total_rows / max(elapsed, 1e-9):,.0f} rows/s), "
+          f"{failures} failed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+import os
+import time
+from datetime import date
+from services.excel_processor import ACTUAL_SHEET_NAMES, BUDGET_SHEET_NAMES, PRIOR_YEAR_SHEET_NAMES
+from services.excel_processor import GL_CODE_COLUMNS, ACCOUNT_NAME_COLUMNS
+from services.excel_processor import find_sheet_name, parse_header_date
+from services.settings import get_setting
+
+# Header-only dry run of a trial balance workbook.
+#
+# Reads the sheet names and the header row (plus an optional sample of data
+# rows) of the Actual / Budget / Prior Year sheets - .xlsx files through
+# openpyxl's read-only mode, which streams just those rows - and applies the
+# same sheet, column and date header rules as process_trial_balance_file.
+# Missing sheets or columns and unparseable date headers are reported in
+# milliseconds, before the full parse and any database work.
+
+SHEETS = [
+    ('actual', ACTUAL_SHEET_NAMES),
+    ('budget', BUDGET_SHEET_NAMES),
+    ('prior_year', PRIOR_YEAR_SHEET_NAMES)
+]
+
+# process_worksheet reads the header from row 1 (pd.read_excel header=0)
+HEADER_ROWS = 1
+MAX_SAMPLE_ROWS = 1000
+
+
+def precheck_enabled():
+    """Check whether uploads are validated header-only before the full parse"""
+    return get_setting('UPLOAD_PRECHECK_ENABLED', True)
+
+
+def column_letter(index):
+    """Excel column letter for a 0-based column index"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def is_blank(value):
+    """Empty cell (None, NaN or whitespace)"""
+    return value is None or (isinstance(value, float) and value != value) or str(value).strip() == ''
+
+
+def read_workbook_heads(filepath, row_limit):
+    """Sheet names plus {data_type: (sheet, first row_limit rows, row count or None)} for the sheets found"""
+    if filepath.lower().endswith('.xls'):
+        # Legacy .xls has no streaming reader - read the first rows through pandas
+        import pandas as pd
+        excel_file = pd.ExcelFile(filepath)
+        try:
+            heads = {}
+            for data_type, names in SHEETS:
+                sheet = find_sheet_name(excel_file.sheet_names, names)
+                if sheet:
+                    frame = pd.read_excel(excel_file, sheet_name=sheet, header=None, nrows=row_limit)
+                    rows = [tuple(None if is_blank(value) else value for value in row)
+                            for row in frame.itertuples(index=False)]
+                    heads[data_type] = (sheet, rows, None)
+            return excel_file.sheet_names, heads
+        finally:
+            excel_file.close()
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        heads = {}
+        for data_type, names in SHEETS:
+            sheet = find_sheet_name(workbook.sheetnames, names)
+            if sheet:
+                worksheet = workbook[sheet]
+                rows = list(worksheet.iter_rows(max_row=row_limit, values_only=True))
+                # From the sheet's stored dimension - no need to read the rows
+                heads[data_type] = (sheet, rows, worksheet.max_row)
+        return workbook.sheetnames, heads
+    finally:
+        workbook.close()
+
+
+def ambiguous_reading(header, date_format):
+    """The month-first reading of a day-first text header, when both are valid dates"""
+    if not date_format or not date_format.startswith('DD'):
+        return None
+    separator = date_format[2]
+    first, second, year = (int(part) for part in str(header).strip().split(separator))
+    if first == second or first > 12 or second > 12:
+        return None
+    return date(year, first, second)
+
+
+def validate_sheet(rows, row_count, data_type, sample_rows=0):
+    """Validate one sheet's header row (and sample rows) the way process_worksheet reads it"""
+    result = {
+        'header_row': None,
+        'gl_code_column': None,
+        'account_name_column': None,
+        'date_columns': [],
+        'ambiguous_dates': [],
+        'unparsed_headers': [],
+        'data_rows': None,
+        'expected_rows': None,
+        'errors': [],
+        'warnings': []
+    }
+
+    # Row 1 is the header, as in the full parse - a blank row above it is not skipped there
+    if not rows or all(is_blank(value) for value in rows[0]):
+        result['errors'].append(f"Row 1 of the {data_type} worksheet is blank; the header (GL Code, Account Name, dates) must be on row 1")
+        return result
+    header_index = 0
+    header = rows[header_index]
+    result['header_row'] = header_index + 1
+
+    gl_index = account_index = None
+    for index, value in enumerate(header):
+        if is_blank(value):
+            continue
+        if str(value).strip() in GL_CODE_COLUMNS:
+            gl_index = index
+        if str(value).strip() in ACCOUNT_NAME_COLUMNS:
+            account_index = index
+    if gl_index is None or account_index is None:
+        found = [str(value) for value in header if not is_blank(value)]
+        result['errors'].append(f"Missing GL Code or Account Name column in {data_type} worksheet. Found: {found}")
+        return result
+    result['gl_code_column'] = {'header': str(header[gl_index]).strip(), 'column': column_letter(gl_index)}
+    result['account_name_column'] = {'header': str(header[account_index]).strip(), 'column': column_letter(account_index)}
+
+    date_indexes = []
+    formats = set()
+    for index, value in enumerate(header):
+        if index in (gl_index, account_index) or is_blank(value):
+            continue
+        date_obj, date_format = parse_header_date(value)
+        if not date_obj:
+            result['unparsed_headers'].append({'header': str(value).strip(), 'column': column_letter(index)})
+            continue
+        date_indexes.append(index)
+        result['date_columns'].append({
+            'header': str(value).strip(),
+            'column': column_letter(index),
+            'date': date_obj.isoformat(),
+            'format': date_format
+        })
+        if date_format != 'datetime':
+            formats.add(date_format[:2])
+        alternative = ambiguous_reading(value, date_format)
+        if alternative:
+            result['ambiguous_dates'].append({
+                'header': str(value).strip(),
+                'column': column_letter(index),
+                'read_as': date_obj.isoformat(),
+                'could_be': alternative.isoformat()
+            })
+
+    if not date_indexes:
+        result['errors'].append(f"No valid date columns found in {data_type} worksheet.")
+        return result
+
+    if {'DD', 'MM'} <= formats:
+        result['warnings'].append(
+            f"{data_type} date headers mix day-first and month-first text dates; "
+            f"day-first headers may be read with day and month swapped"
+        )
+    elif result['ambiguous_dates']:
+        result['warnings'].append(
+            f"{len(result['ambiguous_dates'])} {data_type} date headers could be DD/MM or MM/DD; they are read as DD/MM"
+        )
+    dates = [column['date'] for column in result['date_columns']]
+    if len(set(dates)) < len(dates):
+        result['warnings'].append(f"{data_type} worksheet has more than one column for the same date")
+
+    if row_count is not None:
+        result['data_rows'] = max(row_count - result['header_row'], 0)
+        # Upper bound: zero amounts are skipped by the full parse
+        result['expected_rows'] = result['data_rows'] * len(date_indexes)
+
+    sample = rows[header_index + 1:header_index + 1 + sample_rows]
+    if sample:
+        sampled_rows = [row for row in sample if gl_index < len(row) and not is_blank(row[gl_index])]
+        amounts = [row[index] if index < len(row) else None for row in sampled_rows for index in date_indexes]
+        non_numeric = [value for value in amounts if not is_blank(value) and not isinstance(value, (int, float))]
+        non_zero = [value for value in amounts if isinstance(value, (int, float)) and value == value and value != 0]
+        result['sample'] = {
+            'rows': len(sample),
+            'gl_rows': len(sampled_rows),
+            'non_zero_amounts': len(non_zero),
+            'non_numeric_amounts': len(non_numeric)
+        }
+        if non_numeric:
+            result['warnings'].append(
+                f"{len(non_numeric)} sampled {data_type} amounts are not numbers and will be skipped "
+                f"(e.g. {str(non_numeric[0])!r})"
+            )
+        if result['data_rows'] is not None and len(sample) == sample_rows:
+            # Scale the sample's non-zero cells up to the whole sheet
+            result['expected_rows'] = round(len(non_zero) / len(sample) * result['data_rows'])
+        elif len(sample) < sample_rows:
+            # The sample covered the whole sheet
+            result['data_rows'] = len(sample)
+            result['expected_rows'] = len(non_zero)
+
+    return result
+
+
+def validate_trial_balance_file(filepath, sample_rows=0):
+    """Header-only dry run of an uploaded trial balance workbook.
+
+    Returns a report with valid / errors / warnings, the workbook's sheet
+    names and, per data_type, the header row, detected GL / name / date
+    columns, ambiguous DD/MM headers and expected row counts.
+    """
+    start = time.perf_counter()
+    sample_rows = max(0, min(int(sample_rows or 0), MAX_SAMPLE_ROWS))
+
+    try:
+        sheet_names, heads = read_workbook_heads(filepath, HEADER_ROWS + sample_rows)
+    except Exception as e:
+        raise Exception(f"Could not read workbook: {str(e)}")
+
+    report = {
+        'valid': False,
+        'errors': [],
+        'warnings': [],
+        'sheet_names': sheet_names,
+        'sheets': {},
+        'period_end_date': None,
+        'expected_rows': None
+    }
+
+    missing = [data_type for data_type, _ in SHEETS if data_type not in heads]
+    if missing:
+        report['errors'].append(f"Missing required worksheets: {', '.join(missing)}. Found: {sheet_names}")
+
+    for data_type, (sheet, rows, row_count) in heads.items():
+        sheet_report = validate_sheet(rows, row_count, data_type, sample_rows)
+        sheet_report['sheet_name'] = sheet
+        report['sheets'][data_type] = sheet_report
+        report['errors'].extend(sheet_report['errors'])
+        report['warnings'].extend(sheet_report['warnings'])
+
+    actual = report['sheets'].get('actual')
+    if actual and actual['date_columns']:
+        report['period_end_date'] = max(column['date'] for column in actual['date_columns'])
+    expected = [sheet['expected_rows'] for sheet in report['sheets'].values()]
+    if expected and len(report['sheets']) == len(SHEETS) and None not in expected:
+        report['expected_rows'] = sum(expected)
+
+    report['valid'] = not report['errors']
+    report['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    status = 'valid' if report['valid'] else f"{len(report['errors'])} errors"
+    print(f"🔍 Validated {os.path.basename(filepath)} in {report['elapsed_ms']} ms: "
+          f"{status}, {len(report['warnings'])} warnings")
+    return report
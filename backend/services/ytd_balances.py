@@ -0,0 +1,197 @@
+import argparse
+import io
+import time
+from services.database_service import get_db_connection, ensure_calendar_periods
+from services.period_utils import parse_period, calendar_attributes, fiscal_year_start_month
+from services.settings import get_setting
+
+# Running YTD balances (trial_balance_ytd).
+#
+# Monthly totals per (account, data_type) are turned into cumulative totals
+# within each fiscal year with a grouped cumulative sum. Every month of a
+# fiscal year gets a row, including months without postings, so a report
+# for any month reads exactly one row per account.
+#
+# Uploads, deletes and archive re-imports call refresh_ytd_balances inside
+# their own transaction for the fiscal years they touch, which keeps the
+# totals right when an earlier month is re-uploaded or removed. Reports only
+# read the balances once ytd_balances_ready confirms they were built for the
+# current FISCAL_YEAR_START_MONTH; until then (new deployment, changed
+# setting) they fall back to summing the months. Nothing is rebuilt while
+# serving a report - the next upload of the company or the CLI does it.
+#
+#     python -m services.ytd_balances rebuild [--company "Acme Ltd"]
+
+YTD_COLUMNS = ['account_id', 'data_type', 'month_key', 'fiscal_year', 'ytd_amount']
+GROUP_COLUMNS = ['account_id', 'data_type', 'fiscal_year']
+
+
+def ytd_balances_enabled():
+    """Check whether P&L YTD columns should read the precomputed running balances"""
+    return get_setting('YTD_BALANCES_ENABLED', True)
+
+
+def fiscal_year_months(fiscal_year, start_month):
+    """The twelve YYYYMM keys of a fiscal year (named after the year it ends in)"""
+    first_year = fiscal_year - (1 if start_month > 1 else 0)
+    first_index = first_year * 12 + start_month - 1
+    return [(index // 12) * 100 + index % 12 + 1 for index in range(first_index, first_index + 12)]
+
+
+def build_ytd_rows(monthly, start_month):
+    """Cumulative fiscal YTD rows from monthly totals.
+
+    monthly is a DataFrame of (account_id, data_type, month_key, fiscal_year,
+    amount). Returns a DataFrame with YTD_COLUMNS, one row per account,
+    data_type and month of every fiscal year the account has data in.
+    """
+    import pandas as pd
+
+    if monthly.empty:
+        return pd.DataFrame(columns=YTD_COLUMNS)
+
+    months = pd.DataFrame(
+        [(fiscal_year, month) for fiscal_year in monthly['fiscal_year'].unique()
+         for month in fiscal_year_months(int(fiscal_year), start_month)],
+        columns=['fiscal_year', 'month_key']
+    )
+    groups = monthly[GROUP_COLUMNS].drop_duplicates()
+    grid = groups.merge(months, on='fiscal_year')
+    grid = grid.merge(monthly, how='left', on=GROUP_COLUMNS + ['month_key'])
+    grid['amount'] = grid['amount'].fillna(0.0)
+    grid = grid.sort_values(GROUP_COLUMNS + ['month_key'], kind='stable')
+    grid['ytd_amount'] = grid.groupby(GROUP_COLUMNS, sort=False)['amount'].cumsum().round(2)
+    return grid[YTD_COLUMNS]
+
+
+def refresh_ytd_balances(cursor, company, period_dates=None):
+    """Recompute a company's running YTD balances inside the caller's transaction.
+
+    Only the fiscal years containing period_dates are rebuilt; all of them
+    when period_dates is None or the company was built for another fiscal
+    year start month. Returns the number of rows written.
+    """
+    import pandas as pd
+
+    company = company or ''
+    start_month = fiscal_year_start_month()
+    # One refresh per company at a time (concurrent uploads / CLI rebuilds);
+    # the state below is read after the lock, so a waiter sees the winner's work
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"ytd:{company}",))
+    # Bring calendar_periods.fiscal_year in line with the current setting
+    ensure_calendar_periods(cursor, [])
+
+    cursor.execute("SELECT fiscal_year_start_month FROM ytd_balance_state WHERE company = %s", (company,))
+    state = cursor.fetchone()
+    fiscal_years = None
+    if period_dates is not None and state and state[0] == start_month:
+        fiscal_years = sorted({
+            calendar_attributes(parse_period(period_date), start_month)['fiscal_year']
+            for period_date in period_dates
+        })
+        if not fiscal_years:
+            return 0
+
+    cursor.execute("""
+        SELECT tbf.account_id, tbf.data_type, cp.month_key, cp.fiscal_year, SUM(tbf.amount)::float8
+        FROM trial_balance_facts tbf
+        JOIN gl_accounts ga ON tbf.account_id = ga.account_id
+        JOIN calendar_periods cp ON tbf.period_key = cp.period_key
+        WHERE ga.company = %s
+        AND (%s::integer[] IS NULL OR cp.fiscal_year = ANY(%s::integer[]))
+        GROUP BY tbf.account_id, tbf.data_type, cp.month_key, cp.fiscal_year
+    """, (company, fiscal_years, fiscal_years))
+    monthly = pd.DataFrame(cursor.fetchall(), columns=['account_id', 'data_type', 'month_key', 'fiscal_year', 'amount'])
+    ytd = build_ytd_rows(monthly, start_month)
+
+    cursor.execute("""
+        DELETE FROM trial_balance_ytd ty
+        USING gl_accounts ga
+        WHERE ty.account_id = ga.account_id
+        AND ga.company = %s
+        AND (%s::integer[] IS NULL OR ty.fiscal_year = ANY(%s::integer[]))
+    """, (company, fiscal_years, fiscal_years))
+
+    if len(ytd):
+        buffer = io.StringIO()
+        ytd.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY trial_balance_ytd ({', '.join(YTD_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+
+    cursor.execute("""
+        INSERT INTO ytd_balance_state (company, fiscal_year_start_month, refreshed_at)
+        VALUES (%s, %s, NOW())
+        ON CONFLICT (company) DO UPDATE
+        SET fiscal_year_start_month = EXCLUDED.fiscal_year_start_month, refreshed_at = NOW()
+    """, (company, start_month))
+    return len(ytd)
+
+
+def invalidate_ytd_balances(cursor, company):
+    """Mark a company's balances stale (reports sum months until rebuilt) - used while YTD balances are disabled"""
+    cursor.execute("DELETE FROM ytd_balance_state WHERE company = %s", (company or '',))
+
+
+def ytd_balances_ready(conn, company):
+    """Check whether a company's balances were built for the current fiscal year start.
+
+    Never rebuilds - reports sum the months instead until the next upload or
+    `python -m services.ytd_balances rebuild` brings the company up to date.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT fiscal_year_start_month FROM ytd_balance_state WHERE company = %s", (company or '',))
+        state = cursor.fetchone()
+    if state and state[0] == fiscal_year_start_month():
+        return True
+    print(f"⚠️ YTD balances not built for {company} (fiscal year start {fiscal_year_start_month()}); "
+          f"summing months - run: python -m services.ytd_balances rebuild --company \"{company}\"")
+    return False
+
+
+def maintain_ytd_balances(cursor, company, period_dates=None):
+    """Ingest hook: refresh the touched fiscal years, or mark them stale when disabled"""
+    if ytd_balances_enabled():
+        return refresh_ytd_balances(cursor, company, period_dates)
+    invalidate_ytd_balances(cursor, company)
+    return 0
+
+
+def rebuild_ytd_balances(companies=None):
+    """Rebuild every fiscal year for the given companies (all companies by default)"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            if companies is None:
+                cursor.execute("SELECT DISTINCT company FROM gl_accounts ORDER BY company")
+                companies = [row[0] for row in cursor.fetchall()]
+        for company in companies:
+            start = time.perf_counter()
+            with conn.cursor() as cursor:
+                rows = refresh_ytd_balances(cursor, company)
+            conn.commit()
+            print(f"✅ {company or '(no company)'}: {rows} YTD rows in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except Exception as e:
+        conn.rollback()
+        raise Exception(f"Failed to rebuild YTD balances: {str(e)}")
+    finally:
+        conn.close()
+
+
+def main():
+    import config  # noqa: F401 - loads DATABASE_URL from .env
+
+    parser = argparse.ArgumentParser(description='Running YTD balance tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+    rebuild_parser = commands.add_parser('rebuild', help='Recompute YTD balances from trial_balance_facts')
+    rebuild_parser.add_argument('--company', action='append', help='Only this company (repeatable)')
+    args = parser.parse_args()
+
+    if args.command == 'rebuild':
+        rebuild_ytd_balances(args.company)
+
+
+if __name__ == '__main__':
+    main()
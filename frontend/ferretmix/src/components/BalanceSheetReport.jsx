@@ -58,7 +58,7 @@ const BalanceSheetReport = () => {
 
     try {
       console.log("🔍 About to make API call...");
-      const response = await fetch(`http://localhost:5000/api/reports/balance-sheet?period_end_date=${selectedPeriod}`);
+      const response = await fetch(`http://localhost:5000/api/reports/balance-sheet?period_end_date=${selectedPeriod}&company=${selectedCompany}`);
       console.log("🔍 API response:", response.status, response.ok);
       
       const data = await response.json();
@@ -1,5 +1,7 @@
 import { useState, useEffect } from 'react';
 
+const PAGE_SIZE = 100;
+
 const GLMappingTool = () => {
   const [trialBalances, setTrialBalances] = useState([]);
   const [selectedTB, setSelectedTB] = useState('');
@@ -8,6 +10,10 @@ const GLMappingTool = () => {
   const [reportLines, setReportLines] = useState({});
   const [existingMappings, setExistingMappings] = useState({});
   const [loading, setLoading] = useState(false);
+  // Keyset cursors for the next page of each list (null on the last page)
+  const [trialBalancesCursor, setTrialBalancesCursor] = useState(null);
+  const [glCodesCursor, setGLCodesCursor] = useState(null);
+  const [glSearch, setGLSearch] = useState('');
 
   // Load available trial balances on component mount
   useEffect(() => {
@@ -22,29 +28,46 @@ const GLMappingTool = () => {
     }
   }, [reportType]);
 
-  // Load GL codes when trial balance is selected
+  // Load the first page of GL codes when a trial balance is selected or the search changes
   useEffect(() => {
-    if (selectedTB) {
-      fetchGLCodes();
+    if (!selectedTB) {
+      return;
+    }
+    const timer = setTimeout(() => fetchGLCodes(), 300);
+    return () => clearTimeout(timer);
+  }, [selectedTB, glSearch]);
+
+  // List endpoints are keyset paginated - fetch one page, pass next_cursor for the next
+  const fetchPage = async (url, params, cursor) => {
+    const query = new URLSearchParams({ ...params, limit: PAGE_SIZE });
+    if (cursor) {
+      query.set('cursor', cursor);
     }
-  }, [selectedTB]);
+    const response = await fetch(`${url}?${query}`);
+    return response.json();
+  };
 
-  const fetchTrialBalances = async () => {
+  const fetchTrialBalances = async (cursor = null) => {
     try {
-      const response = await fetch('http://localhost:5000/api/mappings/trial-balances');
-      const data = await response.json();
-      setTrialBalances(data.trial_balances || []);
+      const data = await fetchPage('http://localhost:5000/api/mappings/trial-balances', {}, cursor);
+      const page = data.trial_balances || [];
+      setTrialBalances(previous => (cursor ? [...previous, ...page] : page));
+      setTrialBalancesCursor(data.next_cursor || null);
     } catch (error) {
       console.error('Error fetching trial balances:', error);
     }
   };
 
-  const fetchGLCodes = async () => {
+  const fetchGLCodes = async (cursor = null) => {
     try {
-      setLoading(true);
-      const response = await fetch(`http://localhost:5000/api/mappings/gl-codes/${selectedTB}`);
-      const data = await response.json();
-      setGLCodes(data.gl_codes || []);
+      if (!cursor) {
+        setLoading(true);
+      }
+      const params = glSearch.trim() ? { search: glSearch.trim() } : {};
+      const data = await fetchPage(`http://localhost:5000/api/mappings/gl-codes/${selectedTB}`, params, cursor);
+      const page = data.gl_codes || [];
+      setGLCodes(previous => (cursor ? [...previous, ...page] : page));
+      setGLCodesCursor(data.next_cursor || null);
     } catch (error) {
       console.error('Error fetching GL codes:', error);
     } finally {
@@ -172,10 +195,35 @@ const handleMappingChange = async (glCode, lineId, signMultiplier) => {
               </option>
             ))}
           </select>
+          {trialBalancesCursor && (
+            <button
+              onClick={() => fetchTrialBalances(trialBalancesCursor)}
+              style={{ marginLeft: '10px', padding: '5px 10px' }}
+            >
+              Load older trial balances
+            </button>
+          )}
         </div>
+
+        {selectedTB && (
+          <div>
+            <label>Search GL Codes:</label>
+            <input
+              type="text"
+              value={glSearch}
+              onChange={(e) => setGLSearch(e.target.value)}
+              placeholder="GL code or account name"
+              style={{ marginLeft: '10px', padding: '5px', minWidth: '200px' }}
+            />
+          </div>
+        )}
        
       </div>
 
+      {selectedTB && !loading && glCodes.length === 0 && (
+        <p>No GL codes found.</p>
+      )}
+
       {/* Mapping Table */}
       {selectedTB && glCodes.length > 0 && (
   <div>
@@ -285,6 +333,16 @@ const handleMappingChange = async (glCode, lineId, signMultiplier) => {
               </tbody>
             </table>
           )}
+          {!loading && glCodesCursor && (
+            <div style={{ textAlign: 'center', marginTop: '15px' }}>
+              <button
+                onClick={() => fetchGLCodes(glCodesCursor)}
+                style={{ padding: '8px 16px' }}
+              >
+                Load more GL codes
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>